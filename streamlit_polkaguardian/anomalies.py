@@ -0,0 +1,243 @@
+# anomalies.py
+"""
+Online anomaly detection over the daily ecosystem metrics.
+
+Every (chain, metric) series keeps a small state: a ring buffer of its last
+WINDOW values and an exponentially weighted mean/variance. Each new value is
+scored against the state built from the values before it:
+  - robust z-score: 0.6745 * (value - median) / MAD over the window
+    (the EWMA z-score where the MAD is zero)
+  - EWMA z-score: (value - ewma) / ewm std
+It is flagged as a spike or drop when both scores agree in sign and reach
+their thresholds. The EWMA adapts within days, so a level shift is
+flagged once rather than for as long as the window median lags. Then the
+value is folded into the state. Days are processed in order, and all
+series with a value on a day are scored together as arrays.
+
+The state and the anomalies found so far are saved in CACHE_DIR, and an
+update only scores rows newer than each series' last processed day, so a
+refreshed dataset costs O(new rows). Rows at or before that day are assumed
+unchanged.
+
+    detector = AnomalyDetector.load(anomaly_state_path())
+    detector.update(daily_metrics(eco_df))
+    detector.save(anomaly_state_path())
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from datasets import cache_path
+from instrumentation import span
+
+METRICS = ["transfers_cnt", "active_cnt", "events_cnt", "extrinsics_cnt"]
+WINDOW = 28
+ALPHA = 0.1  # EWMA weight of the newest value
+THRESHOLD = 3.5  # robust z
+EWMA_THRESHOLD = 3.0
+MIN_PERIODS = 7  # values a series needs before it is scored
+NS_PER_DAY = 86_400 * 10**9
+# A saved state built with other parameters is discarded
+PARAMS = (WINDOW, ALPHA, THRESHOLD, EWMA_THRESHOLD, MIN_PERIODS)
+
+ANOMALY_COLUMNS = ["chain", "metric", "day", "value", "expected", "robust_z", "ewma_z", "kind"]
+
+
+def anomaly_state_path():
+    return cache_path("ecosystem_anomalies.npz")
+
+
+def daily_metrics(eco_df):
+    """
+    One row per (chain, day) with each metric's value. The raw export has
+    a separate row per metric, so rows are collapsed to the first non-null
+    value of each metric.
+    """
+    metrics = [m for m in METRICS if m in eco_df.columns]
+    daily = eco_df.groupby(["chain", "block_time"], sort=False)[metrics].first().reset_index()
+    return daily.sort_values("block_time", kind="stable").reset_index(drop=True)
+
+
+class AnomalyDetector:
+    """
+    Per-series detector state plus the anomalies flagged so far.
+    """
+
+    def __init__(self, chains=(), metrics=(), window=None, count=None, mean=None, var=None,
+                 last_day=None, anomalies=None):
+        n = len(chains)
+        self.chains = list(chains)
+        self.metrics = list(metrics)
+        self.window = np.full((n, WINDOW), np.nan) if window is None else window
+        self.count = np.zeros(n, dtype=np.int64) if count is None else count
+        self.mean = np.zeros(n) if mean is None else mean
+        self.var = np.zeros(n) if var is None else var
+        self.last_day = np.full(n, np.iinfo(np.int64).min) if last_day is None else last_day
+        self.anomalies = pd.DataFrame(columns=ANOMALY_COLUMNS) if anomalies is None else anomalies
+        self._ids = {key: i for i, key in enumerate(zip(self.chains, self.metrics))}
+
+    def save(self, path):
+        # Write next to the target and swap in, so readers never see a partial file
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        a = self.anomalies
+        np.savez_compressed(
+            tmp, params=np.array(PARAMS),
+            chains=np.array(self.chains, dtype=str), metrics=np.array(self.metrics, dtype=str),
+            window=self.window, count=self.count, mean=self.mean, var=self.var, last_day=self.last_day,
+            a_chain=a["chain"].to_numpy(dtype=str), a_metric=a["metric"].to_numpy(dtype=str),
+            a_day=(a["day"].astype("int64") // NS_PER_DAY).to_numpy(dtype=np.int64) if len(a) else np.empty(0, dtype=np.int64),
+            a_values=a[["value", "expected", "robust_z", "ewma_z"]].to_numpy(dtype=float),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Saved detector, or a fresh one when there is none or it was saved
+        with different parameters.
+        """
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as data:
+            if not np.array_equal(data["params"], PARAMS):
+                return cls()
+            values = data["a_values"].reshape(-1, 4)
+            anomalies = pd.DataFrame({
+                "chain": data["a_chain"].astype(object),
+                "metric": data["a_metric"].astype(object),
+                "day": pd.to_datetime(data["a_day"], unit="D", utc=True),
+                "value": values[:, 0],
+                "expected": values[:, 1],
+                "robust_z": values[:, 2],
+                "ewma_z": values[:, 3],
+            })
+            anomalies["kind"] = np.where(anomalies["robust_z"] > 0, "spike", "drop")
+            return cls(
+                data["chains"].tolist(), data["metrics"].tolist(), data["window"], data["count"],
+                data["mean"], data["var"], data["last_day"], anomalies[ANOMALY_COLUMNS]
+            )
+
+    def _series_ids(self, chains, metrics):
+        """
+        State row of each (chain, metric), adding rows for new series.
+        """
+        codes, keys = pd.factorize(pd.MultiIndex.from_arrays([chains, metrics]))
+        key_ids = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            if key not in self._ids:
+                self._ids[key] = len(self.chains)
+                self.chains.append(key[0])
+                self.metrics.append(key[1])
+            key_ids[i] = self._ids[key]
+        grow = len(self.chains) - len(self.count)
+        if grow:
+            self.window = np.vstack([self.window, np.full((grow, WINDOW), np.nan)])
+            self.count = np.concatenate([self.count, np.zeros(grow, dtype=np.int64)])
+            self.mean = np.concatenate([self.mean, np.zeros(grow)])
+            self.var = np.concatenate([self.var, np.zeros(grow)])
+            self.last_day = np.concatenate([self.last_day, np.full(grow, np.iinfo(np.int64).min)])
+        return key_ids[codes]
+
+    def update(self, daily):
+        """
+        Score the rows of `daily` (see daily_metrics) newer than each
+        series' last processed day. Returns the anomalies found in them.
+        """
+        # Skip rows every known series has already processed before reshaping
+        if len(self.chains):
+            seen = (daily["block_time"].to_numpy(dtype="datetime64[ns]").astype(np.int64) // NS_PER_DAY) <= self.last_day.min()
+            daily = daily[~seen | ~daily["chain"].isin(self.chains)]
+
+        metrics = [m for m in METRICS if m in daily.columns]
+        long = daily.melt(id_vars=["chain", "block_time"], value_vars=metrics, var_name="metric").dropna(subset=["value"])
+        days = long["block_time"].to_numpy(dtype="datetime64[ns]").astype(np.int64) // NS_PER_DAY
+        sids = self._series_ids(long["chain"].to_numpy(dtype=object), long["metric"].to_numpy(dtype=object))
+        new = days > self.last_day[sids]
+        days, sids, values = days[new], sids[new], long["value"].to_numpy(dtype=float)[new]
+
+        with span("transform.ecosystem_anomalies", rows=len(values)):
+            order = np.argsort(days, kind="stable")
+            days, sids, values = days[order], sids[order], values[order]
+            hits = []
+            # One pass per day; every series has at most one value per day
+            for start, end in zip(*_runs(days)):
+                hit = self._step(days[start], sids[start:end], values[start:end])
+                if hit is not None:
+                    hits.append(hit)
+
+        if not hits:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+        hit_sids, hit_days, value, expected, robust_z, ewma_z = (np.concatenate(a) for a in zip(*hits))
+        found = pd.DataFrame({
+            "chain": np.asarray(self.chains, dtype=object)[hit_sids],
+            "metric": np.asarray(self.metrics, dtype=object)[hit_sids],
+            "day": pd.to_datetime(hit_days, unit="D", utc=True),
+            "value": value,
+            "expected": expected,
+            "robust_z": robust_z,
+            "ewma_z": ewma_z,
+            "kind": np.where(robust_z > 0, "spike", "drop"),
+        })
+        self.anomalies = found if self.anomalies.empty else pd.concat([self.anomalies, found], ignore_index=True)
+        return found
+
+    def _step(self, day, sids, values):
+        """
+        Score one day's values, fold them into the state and return the
+        flagged ones as (series, day, value, median, robust z, EWMA z)
+        arrays, or None.
+        """
+        ready = self.count[sids] >= MIN_PERIODS
+        flagged = None
+        if ready.any():
+            r, x = sids[ready], values[ready]
+            window = self.window[r]
+            # Windows are only partly filled until a series has WINDOW values
+            median_of = np.median if self.count[r].min() >= WINDOW else np.nanmedian
+            median = median_of(window, axis=1)
+            mad = median_of(np.abs(window - median[:, None]), axis=1)
+            std = np.sqrt(self.var[r])
+            ewma_z = np.divide(x - self.mean[r], std, out=np.zeros(len(r)), where=std > 0)
+            robust_z = np.divide(0.6745 * (x - median), mad, out=ewma_z.copy(), where=mad > 0)
+            hit = (
+                (np.abs(robust_z) >= THRESHOLD)
+                & (np.abs(ewma_z) >= EWMA_THRESHOLD)
+                & (np.sign(robust_z) == np.sign(ewma_z))
+            )
+            if hit.any():
+                flagged = (r[hit], np.full(hit.sum(), day), x[hit], median[hit], robust_z[hit], ewma_z[hit])
+
+        # Fold the new values into the state
+        first = self.count[sids] == 0
+        delta = values - self.mean[sids]
+        self.mean[sids] = np.where(first, values, self.mean[sids] + ALPHA * delta)
+        self.var[sids] = np.where(first, 0.0, (1 - ALPHA) * (self.var[sids] + ALPHA * delta**2))
+        self.window[sids, self.count[sids] % WINDOW] = values
+        self.count[sids] += 1
+        self.last_day[sids] = day
+        return flagged
+
+
+def _runs(sorted_values):
+    """
+    (starts, ends) of the runs of equal values in a sorted array.
+    """
+    if not len(sorted_values):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(sorted_values)) + 1
+    return np.concatenate([[0], breaks]), np.concatenate([breaks, [len(sorted_values)]])
+
+
+def update_anomalies(eco_df):
+    """
+    Bring the saved detector up to date with `eco_df` and return every
+    anomaly flagged so far.
+    """
+    path = anomaly_state_path()
+    detector = AnomalyDetector.load(path)
+    seen = detector.count.sum()
+    detector.update(daily_metrics(eco_df))
+    if detector.count.sum() != seen:
+        detector.save(path)
+    return detector.anomalies
@@ -0,0 +1,94 @@
+# balance_history.py
+"""
+Running balance per asset reconstructed from an account's transfer history.
+
+Every transfer becomes a signed flow (+amount received, -amount sent, 0 for
+self-transfers and failed transfers) and every extrinsic the account signed
+becomes a -fee flow in the native token. Flows are binned per (day, asset)
+with np.bincount and cumulated down the days, so a 1M-transfer history
+reconstructs in well under a second without Python-level loops.
+
+The series is the net change since the first fetched record; balance the
+chain credits without a transfer (staking rewards, ...) is not included.
+
+    daily = reconstruct_daily(transfers_df, extrinsics_df, address, "DOT", 10)
+    weekly = resample(daily, "W")
+"""
+import numpy as np
+import pandas as pd
+
+from instrumentation import span
+
+GRAINS = {"Daily": "D", "Weekly": "W"}
+SECONDS_PER_DAY = 86_400
+
+
+def transfer_flows(transfers_df, address):
+    """
+    (day numbers, asset symbols, signed amounts) for the address's transfers.
+    """
+    if transfers_df.empty or "amount" not in transfers_df.columns:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=object), np.empty(0)
+
+    amount = pd.to_numeric(transfers_df["amount"], errors="coerce").to_numpy(dtype=float)
+    sign = (transfers_df["to"] == address).to_numpy(dtype=np.int8) - (transfers_df["from"] == address).to_numpy(dtype=np.int8)
+    if "success" in transfers_df.columns:
+        sign[~transfers_df["success"].fillna(True).to_numpy(dtype=bool)] = 0
+    if "asset_symbol" in transfers_df.columns:
+        assets = transfers_df["asset_symbol"].astype(object).fillna("?").to_numpy()
+    else:
+        assets = np.full(len(transfers_df), "?", dtype=object)
+
+    days = transfers_df["block_timestamp"].to_numpy(dtype=np.int64) // SECONDS_PER_DAY
+    return days, assets, np.nan_to_num(amount) * sign
+
+
+def fee_flows(extrinsics_df, native_symbol, decimals):
+    """
+    (day numbers, asset symbols, -fee) for the address's extrinsics.
+    Only the extrinsics that were fetched are covered.
+    """
+    if extrinsics_df.empty or "fee" not in extrinsics_df.columns:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=object), np.empty(0)
+
+    fee = pd.to_numeric(extrinsics_df["fee"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    days = extrinsics_df["block_timestamp"].to_numpy(dtype=np.int64) // SECONDS_PER_DAY
+    return days, np.full(len(days), native_symbol, dtype=object), -fee / 10**decimals
+
+
+def reconstruct_daily(transfers_df, extrinsics_df, address, native_symbol, decimals):
+    """
+    Day-by-asset frame of running balances (net change since the first
+    record), with a row for every day in the history.
+    """
+    with span("transform.balance_history", rows=len(transfers_df) + len(extrinsics_df)):
+        parts = [transfer_flows(transfers_df, address), fee_flows(extrinsics_df, native_symbol, decimals)]
+        days = np.concatenate([p[0] for p in parts])
+        if not len(days):
+            return pd.DataFrame()
+        asset_codes, assets = pd.factorize(np.concatenate([p[1] for p in parts]))
+        deltas = np.concatenate([p[2] for p in parts])
+
+        first = days.min()
+        n_days, n_assets = days.max() - first + 1, len(assets)
+        totals = np.bincount(
+            (days - first) * n_assets + asset_codes,
+            weights=deltas,
+            minlength=n_days * n_assets
+        ).reshape(n_days, n_assets)
+
+        daily = pd.DataFrame(
+            np.cumsum(totals, axis=0),
+            index=pd.date_range(pd.Timestamp(first * SECONDS_PER_DAY, unit="s"), periods=n_days, freq="D", name="day"),
+            columns=pd.Index(assets, name="asset"),
+        )
+        return daily.sort_index(axis=1)
+
+
+def resample(daily, freq):
+    """
+    Balances at the end of each `freq` period ("D" returns `daily` as is).
+    """
+    if daily.empty or freq == "D":
+        return daily
+    return daily.resample(freq).last()
@@ -0,0 +1,301 @@
+# batch_analysis.py
+"""
+Headless bulk analysis of many addresses, built on the subscan.py fetchers.
+
+Addresses are fetched concurrently by a small thread pool. Every Subscan call
+still goes through the process-wide rate limiter, so the pool never exceeds
+the call budget. Results go to partitioned Parquet, one file per address
+and dataset:
+
+    <out>/accounts/chain=polkadot/<address>.parquet
+    <out>/transfers/chain=polkadot/<address>.parquet
+    <out>/extrinsics/..., <out>/staking/..., <out>/votes/...
+
+Read a dataset back with `pd.read_parquet("<out>/transfers")` (the chain
+becomes a column). An address is appended to <out>/checkpoint.jsonl only
+after all its files are written. Re-running with the same --out resumes and
+skips completed addresses; failed ones are retried. Rewriting an address
+replaces its files, so resuming never duplicates rows. Finally
+<out>/summary.csv and <out>/report.txt summarize every address of the run.
+
+    SUBSCAN_API_KEY=... python batch_analysis.py --input addresses.txt --out batch/
+    SUBSCAN_API_KEY=... python batch_analysis.py --top-voters 200 --out batch/top_voters
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+import subscan
+from datasets import VOTERS_CSV
+from request_scheduler import BACKGROUND, request_context
+from staking import staking_events
+
+DATASETS = ("accounts", "transfers", "extrinsics", "staking", "votes")
+DEFAULT_WORKERS = 4
+# Calls/second for the whole batch; leave headroom under Subscan's 5/s
+DEFAULT_CALL_BUDGET = 4
+DEFAULT_TRANSFER_PAGES = 10
+
+SUMMARY_COLUMNS = [
+    "chain", "address", "status", "balance", "bonded", "nonce", "transfers", "sent", "received",
+    "first_transfer", "last_transfer", "extrinsics", "staking_events", "staking_net", "votes",
+    "seconds", "error",
+]
+
+
+# ---- Inputs ----
+
+def read_addresses(path, column=None):
+    """
+    Addresses from a text file (one per line, # comments) or a CSV column
+    (`column`, else "address" or "voter"). Duplicates are dropped, order kept.
+    """
+    if path.endswith(".csv"):
+        df = pd.read_csv(path)
+        column = column or next((c for c in ("address", "voter") if c in df.columns), None)
+        if column not in df.columns:
+            raise Exception(f"{path} has no {column or 'address/voter'} column")
+        addresses = df[column].dropna().astype(str)
+    else:
+        with open(path) as f:
+            addresses = [line.split("#", 1)[0] for line in f]
+    return list(dict.fromkeys(a.strip() for a in addresses if a.strip()))
+
+
+def top_voters(n):
+    """
+    The `n` voters with the most tokens cast in the governance dataset.
+    """
+    voters = pd.read_csv(VOTERS_CSV, usecols=["voter", "total_tokens_cast"])
+    voters["total_tokens_cast"] = pd.to_numeric(voters["total_tokens_cast"], errors="coerce")
+    ranked = voters.dropna(subset=["voter"]).sort_values("total_tokens_cast", ascending=False)
+    return list(dict.fromkeys(ranked["voter"].astype(str).head(n)))
+
+
+# ---- Checkpoint ----
+
+class Checkpoint:
+    """
+    Append-only JSON-lines log of finished addresses; the last entry for an
+    address wins.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from an interrupted run
+                    self.entries[(entry["chain"], entry["address"])] = entry
+
+    def completed(self, chain_key, address):
+        entry = self.entries.get((chain_key, address))
+        return entry is not None and entry["status"] == "ok"
+
+    def record(self, entry):
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+            self.entries[(entry["chain"], entry["address"])] = entry
+
+
+# ---- Per address ----
+
+def _parquet_safe(df):
+    """
+    Object columns as strings: nested values as JSON, mixed scalars via str().
+    """
+    for col in df.columns[df.dtypes == object]:
+        values = df[col]
+        nested = values.map(lambda v: isinstance(v, (dict, list)))
+        if nested.any():
+            values = values.where(~nested, values[nested].map(json.dumps))
+        if values.dropna().map(type).nunique() > 1:
+            values = values.where(values.isna(), values.astype(str))
+        df[col] = values
+    return df
+
+
+def write_partition(out_dir, dataset, chain_key, address, df):
+    """
+    Write (or replace) one address's file of a dataset.
+    """
+    directory = os.path.join(out_dir, dataset, f"chain={chain_key}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{address}.parquet")
+    tmp = f"{path}.tmp"
+    _parquet_safe(df.copy()).to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def analyze_address(chain_key, address, api_key, token, max_pages):
+    """
+    Fetch one address and return ({dataset: frame}, summary row).
+    Raises if any fetch fails, so a partial address is never checkpointed.
+    """
+    account = subscan.fetch_account_data(chain_key, address, api_key)
+    data = (account.get("data") or {}).get("account") or {}
+    # Never analyze a different account than the one asked for
+    returned = data.get("address")
+    if returned and returned != address:
+        raise Exception(f"account lookup returned {returned} instead of {address}")
+
+    transfers = subscan.transfers_to_frame(subscan.get_transfer_records(chain_key, address, api_key, max_pages))
+    extrinsics = subscan.extrinsics_to_frame(subscan.get_extrinsic_records(chain_key, address, api_key))
+    staking = subscan.records_to_frame(subscan.get_staking_records(chain_key, address, api_key), "staking_history")
+    votes = subscan.records_to_frame(subscan.get_vote_records(chain_key, address, api_key), "referenda_votes")
+
+    accounts = pd.DataFrame([{
+        "address": address,
+        "display": data.get("display", ""),
+        "balance": float(data.get("balance") or 0),
+        "lock": float(data.get("lock") or 0),
+        "reserved": float(data.get("reserved") or 0),
+        "bonded": float(data.get("bonded") or 0),
+        "nonce": int(data.get("nonce") or 0),
+        "role": data.get("role", ""),
+    }])
+
+    sent = received = 0.0
+    first_transfer = last_transfer = None
+    if not transfers.empty:
+        native = transfers["asset_symbol"] == token["symbol"] if "asset_symbol" in transfers.columns else True
+        sent = float(transfers.loc[native & (transfers["from"] == address), "amount"].sum())
+        received = float(transfers.loc[native & (transfers["to"] == address), "amount"].sum())
+        first_transfer, last_transfer = transfers["datetime"].min(), transfers["datetime"].max()
+    events = staking_events(staking, token["decimals"])
+
+    summary = {
+        "balance": accounts.at[0, "balance"],
+        "bonded": accounts.at[0, "bonded"],
+        "nonce": int(accounts.at[0, "nonce"]),
+        "transfers": len(transfers),
+        "sent": sent,
+        "received": received,
+        "first_transfer": first_transfer,
+        "last_transfer": last_transfer,
+        "extrinsics": len(extrinsics),
+        "staking_events": len(events),
+        "staking_net": float(events["reward"].sum() - events["slash"].sum()),
+        "votes": len(votes),
+    }
+    frames = {"accounts": accounts, "transfers": transfers, "extrinsics": extrinsics, "staking": staking, "votes": votes}
+    return frames, summary
+
+
+def process_address(chain_key, address, api_key, token, max_pages, out_dir, checkpoint):
+    started = time.time()
+    entry = {"chain": chain_key, "address": address}
+    try:
+        with request_context(BACKGROUND, user="batch"):
+            frames, summary = analyze_address(chain_key, address, api_key, token, max_pages)
+        for dataset, df in frames.items():
+            if not df.empty:
+                write_partition(out_dir, dataset, chain_key, address, df)
+        entry.update(summary, status="ok")
+    except Exception as e:
+        entry.update(status="failed", error=str(e))
+    entry["seconds"] = round(time.time() - started, 3)
+    checkpoint.record(entry)
+    return entry
+
+
+# ---- Report ----
+
+def build_report(summary, elapsed, processed, symbol):
+    ok = summary[summary["status"] == "ok"]
+    failed = summary[summary["status"] != "ok"]
+    lines = [
+        f"Addresses: {len(summary):,} ({len(ok):,} ok, {len(failed):,} failed)",
+        f"This run: {processed:,} addresses in {elapsed:.1f}s "
+        f"({processed / (elapsed / 60) if elapsed else 0:,.1f} addresses/minute)",
+    ]
+    if not ok.empty:
+        lines += [
+            f"Total balance: {ok['balance'].sum():,.2f} {symbol} · bonded: {ok['bonded'].sum():,.2f} {symbol}",
+            f"Transfers: {int(ok['transfers'].sum()):,} · extrinsics: {int(ok['extrinsics'].sum()):,} · "
+            f"votes: {int(ok['votes'].sum()):,} · staking net: {ok['staking_net'].sum():,.4f} {symbol}",
+            "",
+            "Largest balances:",
+        ]
+        for row in ok.nlargest(10, "balance").itertuples():
+            lines.append(f"  {row.address}  {row.balance:,.2f} {symbol}  ({row.transfers:,} transfers)")
+    if not failed.empty:
+        lines += ["", "Failed:"]
+        lines += [f"  {row.address}: {row.error}" for row in failed.itertuples()]
+    return "\n".join(lines)
+
+
+def run_batch(addresses, chain_key, api_key, out_dir, workers=DEFAULT_WORKERS, max_pages=DEFAULT_TRANSFER_PAGES):
+    """
+    Analyze every address not yet completed in `out_dir`'s checkpoint, then
+    write the summary and report. Returns (summary frame, report text).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(out_dir, "checkpoint.jsonl"))
+    pending = [a for a in addresses if not checkpoint.completed(chain_key, a)]
+    print(f"{len(addresses):,} addresses, {len(addresses) - len(pending):,} already done, {len(pending):,} to fetch")
+
+    token = subscan.get_token_metadata(chain_key, api_key)
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(process_address, chain_key, a, api_key, token, max_pages or None, out_dir, checkpoint)
+            for a in pending
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            entry = future.result()
+            detail = f"{entry.get('transfers', 0):,} transfers" if entry["status"] == "ok" else entry["error"]
+            print(f"[{done}/{len(pending)}] {entry['address']} {entry['status']} ({entry['seconds']:.1f}s, {detail})")
+    elapsed = time.time() - started
+
+    rows = [checkpoint.entries[(chain_key, a)] for a in addresses if (chain_key, a) in checkpoint.entries]
+    summary = pd.DataFrame(rows).reindex(columns=SUMMARY_COLUMNS)
+    summary.to_csv(os.path.join(out_dir, "summary.csv"), index=False)
+    report = build_report(summary, elapsed, len(pending), token["symbol"])
+    with open(os.path.join(out_dir, "report.txt"), "w") as f:
+        f.write(report + "\n")
+    return summary, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch and analyze many addresses into partitioned Parquet.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="Text file (one address per line) or CSV")
+    source.add_argument("--top-voters", type=int, help="Use the N largest voters from the governance dataset")
+    parser.add_argument("--column", help="CSV column holding the addresses (default: address or voter)")
+    parser.add_argument("--chain", default="polkadot")
+    parser.add_argument("--out", required=True, help="Output directory (re-use it to resume)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--budget", type=float, default=DEFAULT_CALL_BUDGET, help="Subscan calls per second for the whole batch")
+    parser.add_argument("--max-transfer-pages", type=int, default=DEFAULT_TRANSFER_PAGES, help="Transfer pages (100 each) per address; 0 fetches all")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and fetch every address again")
+    args = parser.parse_args()
+
+    api_key = os.environ.get("SUBSCAN_API_KEY")
+    if not api_key:
+        parser.error("SUBSCAN_API_KEY must be set")
+
+    addresses = read_addresses(args.input, args.column) if args.input else top_voters(args.top_voters)
+    checkpoint_path = os.path.join(args.out, "checkpoint.jsonl")
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    # A sustained batch paces at the budget instead of bursting and backing off
+    subscan.set_call_budget(args.budget, buffer=0)
+    _, report = run_batch(addresses, args.chain.lower(), api_key, args.out, args.workers, args.max_transfer_pages)
+    print()
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Ecosystem-metric anomaly detection time: scoring a full synthetic history
+from scratch versus the incremental update when one new day arrives.
+
+    python benchmarks/anomaly_detection.py --chains 20 --days 365 3650
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("POLKAGUARDIAN_CACHE_DIR", tempfile.mkdtemp(prefix="anomaly-bench-"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from anomalies import METRICS, AnomalyDetector, anomaly_state_path, daily_metrics  # noqa: E402
+
+
+def synthetic_metrics(n_chains, n_days):
+    """
+    Raw-export layout (one row per chain, day and metric) with weekly
+    seasonality, noise and a few injected spikes and drops.
+    """
+    rng = np.random.default_rng(0)
+    days = pd.date_range("2016-01-01", periods=n_days, freq="D", tz="UTC")
+    frames = []
+    for c in range(n_chains):
+        base = 10 ** rng.uniform(2, 5)
+        for metric in METRICS:
+            values = base * (1 + 0.1 * np.sin(np.arange(n_days) * 2 * np.pi / 7)) * rng.lognormal(0, 0.1, n_days)
+            shocks = rng.random(n_days) < 0.01
+            values[shocks] *= rng.choice([0.2, 5.0], shocks.sum())
+            frames.append(pd.DataFrame({"chain": f"chain-{c}", "block_time": days, metric: values.round()}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ecosystem anomaly detection.")
+    parser.add_argument("--chains", type=int, default=20)
+    parser.add_argument("--days", type=int, nargs="+", default=[365, 3650])
+    args = parser.parse_args()
+
+    print(f"{'points':>9} {'full s':>8} {'new day s':>10} {'anomalies':>10}")
+    for n_days in args.days:
+        daily = daily_metrics(synthetic_metrics(args.chains, n_days))
+        history, last_day = daily.iloc[:-args.chains], daily.iloc[-args.chains:]
+
+        start = time.perf_counter()
+        detector = AnomalyDetector()
+        detector.update(history)
+        full_s = time.perf_counter() - start
+        detector.save(anomaly_state_path())
+
+        # Refresh: the whole dataset again, of which only the last day is new
+        start = time.perf_counter()
+        detector = AnomalyDetector.load(anomaly_state_path())
+        detector.update(daily)
+        new_day_s = time.perf_counter() - start
+        print(f"{len(daily) * len(METRICS):>9,} {full_s:>8.3f} {new_day_s:>10.4f} {len(detector.anomalies):>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Balance-history reconstruction time for large transfer histories.
+
+    python benchmarks/balance_history.py --sizes 10000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from balance_history import reconstruct_daily, resample  # noqa: E402
+from mock_subscan import extrinsic, transfer  # noqa: E402
+from subscan import extrinsics_to_frame, transfers_to_frame  # noqa: E402
+
+ADDRESS = "bench"
+REPEATS = 3
+
+
+def best_of(func):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark balance-history reconstruction.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    args = parser.parse_args()
+
+    extrinsics_df = extrinsics_to_frame([extrinsic(ADDRESS, i) for i in range(1_000)])
+    print(f"{'transfers':>10} {'daily s':>9} {'weekly s':>9} {'days':>7} {'assets':>7}")
+    for n in args.sizes:
+        transfers_df = transfers_to_frame([transfer(ADDRESS, n, i) for i in range(n)])
+        daily_s, daily = best_of(lambda: reconstruct_daily(transfers_df, extrinsics_df, ADDRESS, "DOT", 10))
+        weekly_s, _ = best_of(lambda: resample(daily, "W"))
+        print(f"{n:>10,} {daily_s:>9.3f} {weekly_s:>9.4f} {len(daily):>7,} {len(daily.columns):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Ecosystem metrics load time as history and chain count grow: the flat CSV
+(read everything, then filter) against the chain/month-partitioned store
+(read only the selected chain, or one month), plus the cost of appending
+one new day.
+
+    python benchmarks/ecosystem_partitions.py --chains 25 100 --days 90 730
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import ecosystem_store  # noqa: E402
+
+REPEATS = 3
+
+
+def best_of(func):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def synthetic_export(n_chains, n_days, first_day="2023-01-01"):
+    """
+    Raw export layout: one row per chain, day and metric.
+    """
+    rng = np.random.default_rng(n_chains * n_days)
+    days = pd.date_range(first_day, periods=n_days, freq="D", tz="UTC")
+    chains = [f"Chain{i:03d}" for i in range(n_chains)]
+    frames = []
+    for metric in ecosystem_store.METRIC_COLUMNS[:4]:
+        frame = pd.DataFrame({
+            "block_time": np.tile(days.strftime("%Y-%m-%d %H:%M:%S.000 UTC"), n_chains),
+            "chain": np.repeat(chains, n_days),
+        })
+        frame[metric] = rng.integers(100, 100_000, len(frame)).astype(float)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark partitioned ecosystem metrics storage.")
+    parser.add_argument("--chains", type=int, nargs="+", default=[25, 100])
+    parser.add_argument("--days", type=int, nargs="+", default=[90, 730])
+    args = parser.parse_args()
+
+    print(f"{'chains':>6} {'days':>5} {'csv all+filter':>15} {'store 1 chain':>14} {'store 1 month':>14} "
+          f"{'store all':>10} {'append day':>11} {'file':>8}")
+    for n_chains in args.chains:
+        for n_days in args.days:
+            with tempfile.TemporaryDirectory(prefix="ecosystem-bench-") as tmp:
+                csv_path = os.path.join(tmp, "metrics.csv")
+                root = os.path.join(tmp, "store")
+                export = synthetic_export(n_chains, n_days)
+                export.to_csv(csv_path, index=False)
+                ecosystem_store.import_csv(csv_path, root)
+
+                def csv_one_chain():
+                    df = pd.read_csv(csv_path)
+                    df["block_time"] = pd.to_datetime(df["block_time"])
+                    return df[df["chain"] == "Chain000"]
+
+                last_month = pd.Timestamp(export["block_time"].iloc[-1]).strftime("%Y-%m-01")
+                csv_s, _ = best_of(csv_one_chain)
+                chain_s, one = best_of(lambda: ecosystem_store.read(["Chain000"], root=root))
+                month_s, _ = best_of(lambda: ecosystem_store.read(["Chain000"], start=last_month, root=root))
+                all_s, _ = best_of(lambda: ecosystem_store.read(root=root))
+                assert len(one) == n_days
+
+                new_day = synthetic_export(1, 1, pd.Timestamp(one["block_time"].max()) + pd.Timedelta(days=1))
+                start = time.perf_counter()
+                written = ecosystem_store.append(new_day, root)
+                append_s = time.perf_counter() - start
+                size = os.path.getsize(written[0])
+                print(f"{n_chains:>6} {n_days:>5} {csv_s * 1000:>13.1f}ms {chain_s * 1000:>12.1f}ms "
+                      f"{month_s * 1000:>12.1f}ms {all_s * 1000:>8.1f}ms {append_s * 1000:>9.1f}ms {size / 1024:>6.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Governance refresh cost against the mock Subscan server: the first full
+load versus incremental refreshes after a few referenda are submitted,
+counting referenda/vote requests and checking that re-fetched referenda
+keep one ballot per voter and that the incrementally maintained monthly
+aggregates match a full recompute. Then times the
+aggregation engine over the whole store and over a window.
+
+    python benchmarks/governance_refresh.py --referenda 600 --new 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("POLKAGUARDIAN_CACHE_DIR", tempfile.mkdtemp(prefix="governance-bench-"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pandas as pd  # noqa: E402
+
+import subscan  # noqa: E402
+from governance_aggregates import (  # noqa: E402
+    MONTHLY_COLUMNS, VOTE_COLUMNS, month_start, monthly_outcomes, monthly_voting_power, outcome_counts, voter_totals
+)
+from governance_etl import REFERENDUM_COLUMNS, SubscanSource, load_table, refresh  # noqa: E402
+from mock_subscan import MockSubscanServer  # noqa: E402
+
+
+class CountingSource(SubscanSource):
+    def __init__(self, api_key):
+        super().__init__(api_key)
+        self.vote_calls = 0
+
+    def votes(self, chain_key, referendum):
+        self.vote_calls += 1
+        return super().votes(chain_key, referendum)
+
+
+def timed_refresh(chain):
+    source = CountingSource("bench")
+    start = time.perf_counter()
+    summary = refresh(chain, source)
+    return time.perf_counter() - start, source.vote_calls, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the incremental governance refresh.")
+    parser.add_argument("--referenda", type=int, default=600)
+    parser.add_argument("--new", type=int, default=5, help="Referenda submitted between refreshes")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    server = MockSubscanServer(referenda=args.referenda).start()
+    subscan.SUBSCAN_BASE_URL = server.base_url
+    subscan.set_call_budget(10_000)
+    chain = "polkadot"
+
+    print(f"{'run':<14} {'referenda':>9} {'changed':>8} {'vote calls':>10} {'votes':>8} {'months':>7} {'time':>9}")
+    seconds, calls, summary = timed_refresh(chain)
+    print(f"{'full load':<14} {server.referenda:>9} {summary['referenda_changed']:>8} {calls:>10} "
+          f"{summary['votes']:>8,} {len(summary['months']):>7} {seconds:>8.2f}s")
+    for i in range(args.rounds):
+        server.referenda += args.new
+        seconds, calls, summary = timed_refresh(chain)
+        print(f"{f'incremental {i + 1}':<14} {server.referenda:>9} {summary['referenda_changed']:>8} {calls:>10} "
+              f"{summary['votes']:>8,} {len(summary['months']):>7} {seconds:>8.2f}s")
+
+    votes = load_table(chain, "votes", VOTE_COLUMNS)
+    assert not votes.duplicated(["referendum", "voter"]).any(), "refreshing a referendum duplicated its ballots"
+    stored = load_table(chain, "monthly", MONTHLY_COLUMNS)
+    pd.testing.assert_frame_equal(stored, monthly_voting_power(votes), check_dtype=False)
+    print(f"Incremental monthly aggregates match a full recompute ({len(stored)} months, {len(votes):,} ballots)")
+
+    referenda = load_table(chain, "referenda", REFERENDUM_COLUMNS)
+    months = month_start(votes["block_timestamp"])
+    windows = {"all months": (None, None), "last 12 months": (months.iloc[-1] - pd.DateOffset(months=11), None)}
+    print(f"\n{'aggregate':<18} {'window':<15} {'rows':>7} {'time':>9}")
+    for label, (start, end) in windows.items():
+        for name, func in [
+            ("monthly", lambda: monthly_voting_power(votes, start=start, end=end)),
+            ("outcomes", lambda: outcome_counts(monthly_outcomes(referenda, start=start, end=end))),
+            ("voter totals", lambda: voter_totals(votes, start=start, end=end)),
+        ]:
+            begin = time.perf_counter()
+            result = func()
+            print(f"{name:<18} {label:<15} {len(result):>7} {(time.perf_counter() - begin) * 1000:>7.1f}ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Cold-start import cost of the dashboard: runs the top-level imports of
+`dashboard.py` in a fresh interpreter under `python -X importtime` and
+reports the time per dashboard import (shared dependencies are charged to
+the first import that loads them) and per top-level package. Heavy modules
+that should only load when a view needs them (the OpenAI SDK, Plotly
+Express, scipy's clustering) are checked to stay out of startup.
+Streamlit itself imports `plotly.graph_objects` when Plotly is installed,
+so that part of Plotly's cost is not the app's to defer.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --json imports.json
+    python benchmarks/import_time.py --compare imports.json --threshold 0.25
+
+Exits non-zero when a deferred module is imported at startup or, with
+--compare, when the total is slower than the baseline by more than the
+threshold (as a fraction).
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Imported on first use only (chat/AI summaries, chart rendering, offline index build)
+DEFERRED = ("openai", "plotly.express", "scipy.cluster")
+
+
+def dashboard_imports(path=os.path.join(APP_DIR, "dashboard.py")):
+    """
+    Top-level modules imported by the dashboard script, in order.
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def parse_importtime(stderr):
+    """
+    (depth, module, self_us, cumulative_us) per `-X importtime` line.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(modules):
+    """
+    One cold import of `modules`: ms per module and per package, total ms
+    and which deferred modules got loaded.
+    """
+    code = (
+        "import sys; sys.path.insert(0, '.')\n"
+        + "".join(f"import {m}\n" for m in modules)
+        + f"print(','.join(sorted(set(sys.modules) & {set(DEFERRED)!r})))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=APP_DIR, capture_output=True, text=True, check=True
+    )
+    rows = parse_importtime(proc.stderr)
+    wanted = set(modules)
+    per_module = {}
+    per_package = {}
+    for depth, name, self_us, cumulative_us in rows:
+        package = name.split(".")[0]
+        per_package[package] = per_package.get(package, 0) + self_us / 1000
+        if name in wanted and name not in per_module:
+            per_module[name] = cumulative_us / 1000
+    total = sum(cumulative for depth, _, _, cumulative in rows if depth == 1) / 1000
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return per_module, per_package, total, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the dashboard's import time.")
+    parser.add_argument("--runs", type=int, default=5, help="Cold runs; medians are reported")
+    parser.add_argument("--top", type=int, default=12, help="Packages to list")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Baseline results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown as a fraction of the baseline (default 0.25)")
+    args = parser.parse_args()
+
+    modules = dashboard_imports()
+    runs = [measure(modules) for _ in range(args.runs)]
+    per_module = {m: statistics.median(r[0].get(m, 0.0) for r in runs) for m in modules}
+    packages = {p for r in runs for p in r[1]}
+    per_package = {p: statistics.median(r[1].get(p, 0.0) for r in runs) for p in packages}
+    total = statistics.median(r[2] for r in runs)
+    loaded = sorted({m for r in runs for m in r[3]})
+
+    print(f"{'dashboard import':<22} {'ms':>8}")
+    for module in modules:
+        print(f"{module:<22} {per_module[module]:>8.1f}")
+    print(f"{'total':<22} {total:>8.1f}")
+
+    print(f"\n{'package (self time)':<22} {'ms':>8}")
+    for package, ms in sorted(per_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<22} {ms:>8.1f}")
+
+    results = {"total_ms": round(total, 1), "modules": {m: round(ms, 1) for m, ms in per_module.items()},
+               "deferred_loaded": loaded}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    if loaded:
+        print(f"\nDeferred modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    else:
+        print(f"\nDeferred modules not imported at startup: {', '.join(DEFERRED)}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        limit = baseline["total_ms"] * (1 + args.threshold)
+        if total > limit:
+            print(f"Import time regressed: {total:.1f} ms vs baseline {baseline['total_ms']:.1f} ms")
+            failed = True
+        else:
+            print(f"No regression against baseline ({baseline['total_ms']:.1f} ms).")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Script execution time per dashboard interaction.
+
+Drives dashboard.py with Streamlit's AppTest (against the mock Subscan
+server for wallet data) and times common interactions. AppTest always
+reruns the whole script, so the "full rerun" column is what an interaction
+costs without fragments; the "fragment" column is the time spent in the
+interaction's own region (its @st.fragment span), which is all that reruns
+in a browser session.
+
+    python benchmarks/interactions.py --repeats 5
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, APP_DIR)
+
+from streamlit.logger import set_log_level  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import instrumentation  # noqa: E402
+import snapshot_cache  # noqa: E402
+import subscan  # noqa: E402
+from mock_subscan import MockSubscanServer  # noqa: E402
+from snapshot_cache import MemoryBackend, SnapshotCache  # noqa: E402
+
+BENCH_ACCOUNT = "bench-10000"
+SAMPLE_VOTER = "1557x4U7JTAcso9AHpiVfrEsadABQ2swNWhDeh5WvUn9Zdog"
+
+
+def _widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+def _cycle(options, i):
+    return options[(i + 1) % len(options)]
+
+
+def load_wallet(at):
+    at.text_input(key="wallet_input_field").set_value(BENCH_ACCOUNT)
+    _widget(at.button, "🔍 Fetch Account Data").click()
+    at.run()
+
+
+def show_view(name):
+    def prepare(at):
+        at.radio(key="main_view_selector").set_value(name)
+        at.run()
+    return prepare
+
+
+# (name, span of the region that owns the widget, prepare, act)
+INTERACTIONS = [
+    (
+        "Ecosystem: switch chain",
+        "chart.ecosystem_basic_metrics",
+        show_view("Ecosystem Overview"),
+        lambda at, i: at.selectbox(key="ecosystem_chain_selector").set_value(
+            _cycle(["Polkadot", "Astar", "Moonbeam"], i)
+        ),
+    ),
+    (
+        "Ecosystem: treasury window",
+        "chart.treasury_analytics",
+        show_view("Ecosystem Overview"),
+        lambda at, i: at.select_slider(key="treasury_window").set_value(
+            _cycle([("Jan 2024", "Dec 2024"), ("Jan 2023", "Jul 2025")], i)
+        ),
+    ),
+    (
+        "Wallet: clear chat (10k transfers loaded)",
+        "view.chat",
+        lambda at: (load_wallet(at), show_view("Wallet Activity")(at)),
+        lambda at, i: _widget(at.button, "🗑️ Clear").click(),
+    ),
+    (
+        "Wallet: switch activity tab",
+        "view.wallet",
+        lambda at: (load_wallet(at), show_view("Wallet Activity")(at)),
+        lambda at, i: at.radio(key="wallet_activity_tab").set_value(
+            _cycle(["💸 Transfers", "📉 Balance History", "🕸️ Counterparties", "⚙️ Extrinsics", "🪙 Staking", "🗳️ Votes"], i)
+        ),
+    ),
+    (
+        "Wallet: next transfers page",
+        "view.wallet",
+        lambda at: (load_wallet(at), show_view("Wallet Activity")(at)),
+        lambda at, i: at.number_input(key="transfers_table_page").set_value(2 + i % 2),
+    ),
+    (
+        "Wallet: sort transfers by amount",
+        "view.wallet",
+        lambda at: (load_wallet(at), show_view("Wallet Activity")(at)),
+        lambda at, i: at.selectbox(key="transfers_table_sort").set_value(_cycle(["datetime", "amount"], i)),
+    ),
+    (
+        "Wallet: filter transfers by min amount",
+        "view.wallet",
+        lambda at: (load_wallet(at), show_view("Wallet Activity")(at)),
+        lambda at, i: at.number_input(key="transfers_table_amount_min").set_value([None, 5.0][(i + 1) % 2]),
+    ),
+    (
+        "Wallet: balance history daily/weekly",
+        "view.wallet",
+        lambda at: (load_wallet(at), show_view("Wallet Activity")(at),
+                    at.radio(key="wallet_activity_tab").set_value("📉 Balance History"), at.run()),
+        lambda at, i: at.radio(key="balance_history_grain").set_value(_cycle(["Daily", "Weekly"], i)),
+    ),
+    (
+        "Wallet: counterparty graph hops",
+        "view.wallet",
+        lambda at: (load_wallet(at), show_view("Wallet Activity")(at),
+                    at.radio(key="wallet_activity_tab").set_value("🕸️ Counterparties"), at.run()),
+        lambda at, i: at.slider(key="counterparty_hops").set_value(1 + (i + 1) % 3),
+    ),
+    (
+        "Wallet: staking rewards month/era",
+        "view.wallet",
+        lambda at: (load_wallet(at), show_view("Wallet Activity")(at),
+                    at.radio(key="wallet_activity_tab").set_value("🪙 Staking"), at.run()),
+        lambda at, i: at.radio(key="staking_rewards_grain").set_value(_cycle(["Month", "Era"], i)),
+    ),
+    (
+        "Governance: change chart metric",
+        "chart.monthly_voters_voting_power",
+        show_view("Governance Monitor"),
+        lambda at, i: at.selectbox(key="monthly_metric_selector").set_value(
+            _cycle(["Voters", "Voting Power"], i)
+        ),
+    ),
+    (
+        "Governance: vote control top N",
+        "view.governance",
+        show_view("Governance Monitor"),
+        lambda at, i: at.slider(key="vote_control_top").set_value(_cycle([15, 30], i)),
+    ),
+    (
+        "Governance: select proposal",
+        "view.governance",
+        show_view("Governance Monitor"),
+        lambda at, i: _widget(at.selectbox, "Select a proposal to explore:").set_value((i + 1) % 5),
+    ),
+    (
+        "Governance: voter lookup",
+        "view.governance",
+        show_view("Governance Monitor"),
+        lambda at, i: at.text_input(key="governance_voter_lookup").set_value(
+            _cycle([SAMPLE_VOTER, ""], i)
+        ),
+    ),
+]
+
+
+def setup_environment():
+    server = MockSubscanServer().start()
+    subscan.SUBSCAN_BASE_URL = server.base_url
+    subscan.PAGE_DELAY = 0
+    subscan._rate_limiter.max_calls = 10**9
+    subscan._rate_limiter.buffer = 0
+    snapshot_cache._default_cache = SnapshotCache(MemoryBackend())
+    # The chat panel only renders with an API key set; no request is made
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.chdir(APP_DIR)
+    set_log_level("error")
+    return server
+
+
+def region_seconds(stage, since):
+    return sum(
+        s["seconds"] for s in instrumentation.recent_spans()
+        if s["stage"] == stage and s["at"] >= since
+    )
+
+
+def measure(repeats):
+    results = []
+    for name, stage, prepare, act in INTERACTIONS:
+        at = AppTest.from_file(os.path.join(APP_DIR, "dashboard.py"), default_timeout=300)
+        at.secrets["SUBSCAN_API_KEY"] = "benchmark"
+        with contextlib.redirect_stdout(io.StringIO()):
+            at.run()
+            prepare(at)
+            full, region = [], []
+            for i in range(repeats):
+                act(at, i)
+                start = time.time()
+                at.run()
+                full.append(time.time() - start)
+                region.append(region_seconds(stage, start))
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+        results.append((name, statistics.median(full), statistics.median(region)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time dashboard interactions with AppTest.")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    server = setup_environment()
+    try:
+        results = measure(args.repeats)
+    finally:
+        server.shutdown()
+
+    print(f"{'interaction':<44} {'full rerun ms':>14} {'fragment ms':>12}")
+    for name, full, region in results:
+        fragment = f"{region * 1000:>12.1f}" if region else f"{'-':>12}"
+        print(f"{name:<44} {full * 1000:>14.1f} {fragment}")
+
+
+if __name__ == "__main__":
+    main()
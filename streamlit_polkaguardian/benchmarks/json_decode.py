@@ -0,0 +1,97 @@
+"""
+Decode + DataFrame build time per 10k Subscan records.
+
+Compares the previous path (stdlib json into full dicts, then pd.DataFrame)
+with json_codec using whichever of msgspec / orjson is installed, and with
+each fast library switched off. Also times the cache round trip and the
+snapshot serialization used for chat prompts.
+
+    python benchmarks/json_decode.py --records 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import json_codec  # noqa: E402
+from mock_subscan import extrinsic, transfer  # noqa: E402
+from subscan import extrinsics_to_frame, transfers_to_frame  # noqa: E402
+
+REPEATS = 5
+
+
+def best_of(func):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def payloads(n):
+    transfers = [transfer("bench", n, i) for i in range(n)]
+    extrinsics = [extrinsic("bench", i) for i in range(n)]
+    return {
+        "transfers": (json.dumps({"code": 0, "data": {"transfers": transfers}}).encode(), transfers_to_frame),
+        "extrinsics": (json.dumps({"code": 0, "data": {"extrinsics": extrinsics}}).encode(), extrinsics_to_frame),
+    }
+
+
+def stdlib_baseline(body, kind, to_frame):
+    records = json.loads(body)["data"][json_codec.LIST_KEYS[kind]]
+    return to_frame(records)
+
+
+def codec_path(body, kind, to_frame):
+    _, _, records = json_codec.decode_list(body, kind)
+    return to_frame(records)
+
+
+def configurations():
+    """
+    (label, msgspec module or None, orjson module or None) for installed libraries.
+    """
+    msgspec, orjson = json_codec.msgspec, json_codec.orjson
+    configs = [("json_codec (stdlib only)", None, None)]
+    if orjson:
+        configs.append(("json_codec (orjson)", None, orjson))
+    if msgspec:
+        configs.append(("json_codec (msgspec typed)", msgspec, orjson))
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Subscan JSON decode + frame build.")
+    parser.add_argument("--records", type=int, default=10_000)
+    args = parser.parse_args()
+
+    installed = [name for name in ("msgspec", "orjson") if getattr(json_codec, name)]
+    print(f"{args.records:,} records per payload; installed: {', '.join(installed) or 'none'}\n")
+    print(f"{'path':<30} {'kind':<11} {'decode+frame ms':>16}")
+
+    original = json_codec.msgspec, json_codec.orjson
+    for kind, (body, to_frame) in payloads(args.records).items():
+        print(f"{'stdlib json + full dicts':<30} {kind:<11} {best_of(lambda: stdlib_baseline(body, kind, to_frame)):>16.1f}")
+        for label, msgspec, orjson in configurations():
+            json_codec.msgspec, json_codec.orjson = msgspec, orjson
+            print(f"{label:<30} {kind:<11} {best_of(lambda: codec_path(body, kind, to_frame)):>16.1f}")
+        json_codec.msgspec, json_codec.orjson = original
+
+    # Cache entries and chat snapshot text
+    records = json_codec.decode_list(payloads(args.records)["transfers"][0], "transfers")[2]
+    envelope = {"stored_at": 0, "value": records}
+    stored = json_codec.dumps(envelope)
+    print(f"\n{'cache write':<30} stdlib {best_of(lambda: json.dumps(envelope, default=str).encode()):>8.1f} ms"
+          f"   json_codec {best_of(lambda: json_codec.dumps(envelope)):>8.1f} ms")
+    print(f"{'cache read':<30} stdlib {best_of(lambda: json.loads(stored)):>8.1f} ms"
+          f"   json_codec {best_of(lambda: json_codec.loads(stored)):>8.1f} ms")
+    print(f"{'snapshot text (chat prompt)':<30} stdlib {best_of(lambda: json.dumps(records, indent=2, default=str)):>8.1f} ms"
+          f"   json_codec {best_of(lambda: json_codec.dumps_text(records)):>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Local mock of the Subscan endpoints used by subscan.py, serving synthetic
+accounts so benchmarks don't depend on the network or an API key.
+
+An address of the form "bench-<n>" has n transfers (generated on demand,
+newest first); any other address has 250. Run standalone with:
+
+    python benchmarks/mock_subscan.py --port 8765
+    SUBSCAN_BASE_URL=http://127.0.0.1:8765 streamlit run dashboard.py
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_TIMESTAMP = 1_600_000_000
+DEFAULT_TRANSFERS = 250
+REFERENDUM_VOTERS = 300
+REFERENDA = 120
+OPEN_REFERENDA = 5  # the newest referenda are still being decided
+REFERENDUM_SECONDS = 3 * 86400  # between referendum submissions
+FIRST_ERA = 1000
+STAKING_ERAS = 400
+ASSETS = ("DOT", "DOT", "DOT", "USDT", "USDC")
+
+
+def account_size(address):
+    if address.startswith("bench-"):
+        try:
+            return int(address.split("-", 1)[1])
+        except ValueError:
+            pass
+    return DEFAULT_TRANSFERS
+
+
+def counterparty(i):
+    return f"1{(i * 7919) % 5000:047d}"
+
+
+def transfer(address, n, i):
+    """
+    The i-th newest transfer of an account with n transfers.
+    """
+    seq = n - 1 - i
+    incoming = seq % 3 == 0
+    other = counterparty(seq)
+    return {
+        "from": other if incoming else address,
+        "to": address if incoming else other,
+        "extrinsic_index": f"{10_000_000 + seq}-2",
+        "success": True,
+        "hash": f"0x{seq:064x}",
+        "block_num": 10_000_000 + seq,
+        "block_timestamp": BASE_TIMESTAMP + seq * 600,
+        "module": "balances",
+        "amount": f"{(seq % 997) + 0.5:.4f}",
+        "amount_v2": str(((seq % 997) * 10**10) + 5 * 10**9),
+        "usd_amount": f"{((seq % 997) + 0.5) * 4.2:.4f}",
+        "fee": "157000000",
+        "nonce": seq,
+        "asset_symbol": ASSETS[seq % len(ASSETS)],
+        "asset_unique_id": ASSETS[seq % len(ASSETS)],
+        "asset_type": "",
+        "event_idx": 3,
+        "is_lock": False,
+        "from_account_display": {"address": other if incoming else address},
+        "to_account_display": {"address": address if incoming else other},
+    }
+
+
+def extrinsic(address, i):
+    return {
+        "id": i,
+        "block_num": 10_000_000 + i,
+        "block_timestamp": BASE_TIMESTAMP + i * 600,
+        "extrinsic_index": f"{10_000_000 + i}-1",
+        "call_module_function": ("transfer_keep_alive", "vote", "add_proxy")[i % 3],
+        "call_module": ("balances", "convictionvoting", "proxy")[i % 3],
+        "account_display": {"address": address},
+        "nonce": i,
+        "extrinsic_hash": f"0x{i:064x}",
+        "success": True,
+        "fee": "157000000",
+        "tip": "0",
+    }
+
+
+def staking_history():
+    """
+    Reward/slash records (newest first) over STAKING_ERAS eras. Every 23rd
+    era is missed and every 97th era also has a slash.
+    """
+    records = []
+    for era in range(FIRST_ERA, FIRST_ERA + STAKING_ERAS):
+        timestamp = BASE_TIMESTAMP + (era - FIRST_ERA) * 86400
+        if era % 23:
+            records.append({
+                "era": era, "block_num": 10_000_000 + era * 14_400, "block_timestamp": timestamp,
+                "event_id": "Rewarded", "event_index": f"{10_000_000 + era * 14_400}-7",
+                "amount": str(2 * 10**8 + (era % 13) * 10**6),
+            })
+        if era % 97 == 0:
+            records.append({
+                "era": era, "block_num": 10_000_000 + era * 14_400 + 1, "block_timestamp": timestamp + 6,
+                "event_id": "Slashed", "event_index": f"{10_000_000 + era * 14_400 + 1}-3",
+                "amount": str(10**9),
+            })
+    return records[::-1]
+
+
+def referendum(index, total):
+    """
+    OpenGov referendum `index` when `total` have been submitted; the last
+    OPEN_REFERENDA are still deciding, older ones have an outcome.
+    """
+    created = BASE_TIMESTAMP + index * REFERENDUM_SECONDS
+    is_open = index >= total - OPEN_REFERENDA
+    if is_open:
+        status = "Decision"
+    elif index % 31 == 0:
+        status = "Cancelled"
+    else:
+        status = ("Executed", "Executed", "Rejected", "Executed", "TimedOut")[index % 5]
+    return {
+        "referendum_index": index,
+        "created_block": 20_000_000 + index * 1000,
+        "created_block_timestamp": created,
+        "origins": ("SmallSpender", "MediumSpender", "Root", "WhitelistedCaller")[index % 4],
+        "account": {"address": f"voter-{index % 40}", "people": {"display": f"Proposer {index % 40}"}},
+        "status": status,
+        "latest_block_num": 20_000_000 + index * 1000 + (10 if is_open else 900),
+        "latest_block_timestamp": created + (600 if is_open else 14 * 86400),
+        "title": f"Referendum {index}",
+    }
+
+
+def referendum_vote(referendum, j):
+    """
+    Vote of voter j on a referendum. Voters fall into four blocs that
+    vote alike, so similarity and clustering have structure to find.
+    Every fifth voter votes through a delegate, and every sixth record
+    leaves out referendum_index, so callers must attribute votes to the
+    referendum they asked for.
+    """
+    bloc = j % 4
+    status = ("Aye", "Nay", "Abstain")[0 if (referendum + bloc) % 4 else 1 + (j % 7 == 0)]
+    vote = {
+        "referendum_index": referendum,
+        "account": {"address": f"voter-{j}"},
+        "amount": str((j % 50 + 1) * 10**12),
+        "status": status,
+        "conviction": str(j % 7),
+        "block_num": 20_000_000 + referendum * 1000 + j,
+        "block_timestamp": BASE_TIMESTAMP + referendum * REFERENDUM_SECONDS + j * 60,
+    }
+    if j % 5 == 4:
+        vote["delegate_account"] = {"address": f"voter-{j - 1}"}
+    if j % 6 == 4:
+        del vote["referendum_index"]
+    return vote
+
+
+class MockSubscanHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, data):
+        body = json.dumps({"code": 0, "message": "Success", "data": data}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/api/scan/token"):
+            self._reply({"detail": {"DOT": {
+                "symbol": "DOT", "token_decimals": 10, "price": "4.2", "is_native": True
+            }}})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        address = str(body.get("address") or body.get("key") or "")
+        page, row = int(body.get("page", 0)), int(body.get("row", 100))
+
+        if self.path.startswith("/api/v2/scan/search"):
+            self._reply({"account": {
+                "address": address, "balance": "1234.5", "lock": "100", "reserved": "0",
+                "bonded": "50", "democracy_lock": "0", "conviction_lock": "100",
+                "nonce": account_size(address), "role": "", "display": "",
+            }})
+        elif self.path.startswith("/api/v2/scan/transfers"):
+            n = account_size(address)
+            start = page * row
+            self._reply({
+                "count": n,
+                "transfers": [transfer(address, n, i) for i in range(start, min(start + row, n))] or None,
+            })
+        elif self.path.startswith("/api/v2/scan/extrinsics"):
+            self._reply({"count": 50, "extrinsics": [extrinsic(address, i) for i in range(min(row, 50))]})
+        elif self.path.startswith("/api/scan/staking_history"):
+            records = staking_history()
+            self._reply({"count": len(records), "list": records[page * row:(page + 1) * row] or None})
+        elif self.path.startswith("/api/scan/referenda/votes"):
+            ref = int(body.get("referendum_index", 0))
+            # Referenda still deciding have only half their votes so far
+            voters = self.server.referendum_voters
+            if ref >= self.server.referenda - OPEN_REFERENDA:
+                voters //= 2
+            votes = [referendum_vote(ref, j) for j in range(voters) if (j * 31 + ref * 17) % 3]
+            self._reply({"count": len(votes), "list": votes[page * row:(page + 1) * row] or None})
+        elif self.path.startswith("/api/scan/referenda/referendums"):
+            total = self.server.referenda
+            indexes = range(total - 1 - page * row, max(total - 1 - (page + 1) * row, -1), -1)
+            self._reply({"count": total, "list": [referendum(i, total) for i in indexes] or None})
+        elif self.path.startswith("/api/scan/gov/votes"):
+            self._reply({"count": 100, "list": [
+                {"referendum_index": i, "block_timestamp": BASE_TIMESTAMP + i * 86400,
+                 "status": ("Aye", "Nay", "Abstain")[i % 3], "amount": str(10**12),
+                 "conviction": "1"}
+                for i in range(100)
+            ]})
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockSubscanServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, referenda=REFERENDA, referendum_voters=REFERENDUM_VOTERS):
+        super().__init__((host, port), MockSubscanHandler)
+        # Raise `referenda` while running to submit new ones (and close the open ones)
+        self.referenda = referenda
+        self.referendum_voters = referendum_voters
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic Subscan responses.")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = MockSubscanServer(port=args.port)
+    print(f"Mock Subscan listening on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,244 @@
+"""
+Benchmark the account data pipeline against the local mock Subscan server.
+
+For synthetic accounts of each size this measures the end-to-end account
+snapshot latency, transfer pages fetched per second, peak Python memory of
+fetch_all_transfers, and the DataFrame construction cost; it also times the
+governance CSV loads, building the voter address index and a voter lookup. Rate limiting and page delays are
+disabled so the numbers reflect our own code. Before timing anything it
+checks that different addresses get separate account cache entries.
+
+    python benchmarks/pipeline.py --sizes 100 10000
+    python benchmarks/pipeline.py --json baseline.json
+    python benchmarks/pipeline.py --compare baseline.json --threshold 0.25
+
+With --compare the run exits non-zero if any metric is worse than the
+baseline by more than the threshold (as a fraction), so it can gate CI.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pandas as pd  # noqa: E402
+
+import snapshot_cache  # noqa: E402
+import subscan  # noqa: E402
+from chart_components import find_voter, shared_voters, voter_lookup  # noqa: E402
+from datasets import PROPOSALS_CSV, VOTERS_CSV, dataset_version  # noqa: E402
+from mock_subscan import MockSubscanServer  # noqa: E402
+from snapshot_cache import MemoryBackend, SnapshotCache  # noqa: E402
+
+DEFAULT_SIZES = (100, 10_000, 500_000)
+CHAIN = "polkadot"
+API_KEY = "benchmark"
+REPEATS = 3
+
+# metric -> True if higher is better
+METRICS = {
+    "snapshot_s": False,
+    "pages_per_s": True,
+    "fetch_peak_mb": False,
+    "frame_s": False,
+}
+GOVERNANCE_METRICS = {
+    "voters_load_s": False,
+    "proposals_load_s": False,
+    "voter_index_s": False,
+    "voter_lookup_ms": False,
+}
+
+
+def fresh_cache():
+    """
+    Point subscan at an empty in-memory snapshot cache so every run hits the server.
+    """
+    snapshot_cache._default_cache = SnapshotCache(MemoryBackend(max_entries=64))
+
+
+def best_of(func, repeats=REPEATS):
+    """
+    Minimum wall time of `repeats` calls and the last result.
+    """
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def check_account_isolation():
+    """
+    Different addresses must not share a cache entry: each fetch through the
+    snapshot cache returns the requested account.
+    """
+    keys = {snapshot_cache.make_cache_key("account", CHAIN, {"address": a}) for a in ("bench-a", "bench-b")}
+    assert len(keys) == 2, "different addresses produced the same account cache key"
+    fresh_cache()
+    for address in ("bench-a", "bench-b", "bench-a"):
+        account = subscan.fetch_account_data(CHAIN, address, API_KEY)["data"]["account"]
+        assert account["address"] == address, f"fetched {account['address']} for {address}"
+
+
+def bench_account(size):
+    address = f"bench-{size}"
+    repeats = REPEATS if size <= 10_000 else 1
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    def snapshot():
+        fresh_cache()
+        with quiet:
+            return subscan.get_full_account_snapshot(CHAIN, address, API_KEY)
+
+    snapshot_s, snap = best_of(snapshot, repeats)
+    assert len(snap["transfers"]) == size, f"expected {size} transfers, got {len(snap['transfers'])}"
+
+    def fetch():
+        fresh_cache()
+        with quiet:
+            return subscan.fetch_all_transfers(CHAIN, address, API_KEY)
+
+    fetch_s, df = best_of(fetch, repeats)
+    assert len(df) == size
+    pages = -(-size // 100)
+
+    # tracemalloc slows allocation-heavy code, so memory gets its own run
+    tracemalloc.start()
+    fetch()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    records = snapshot_cache._default_cache.peek("transfers", CHAIN, {"address": address, "max_pages": None})[0]
+    frame_s, _ = best_of(lambda: subscan.transfers_to_frame(records), repeats)
+
+    return {
+        "snapshot_s": snapshot_s,
+        "pages_per_s": pages / fetch_s,
+        "fetch_peak_mb": peak / 1e6,
+        "frame_s": frame_s,
+    }
+
+
+def bench_governance():
+    voters_load_s, voters = best_of(lambda: pd.read_csv(VOTERS_CSV))
+    proposals_load_s, _ = best_of(lambda: pd.read_csv(PROPOSALS_CSV))
+
+    # Same path as the dashboard's Voter Lookup: the shared read-only frame,
+    # its address index (built once per dataset version), then find_voter
+    version = dataset_version(VOTERS_CSV)
+    shared_voters(version)
+
+    def build_index():
+        voter_lookup.clear()
+        return voter_lookup(version)
+
+    voter_index_s, _ = best_of(build_index)
+
+    addresses = voters["voter"].sample(200, random_state=0).tolist()
+    start = time.perf_counter()
+    for address in addresses:
+        assert not find_voter(version, address).empty
+    voter_lookup_ms = (time.perf_counter() - start) / len(addresses) * 1000
+
+    return {
+        "voters_load_s": voters_load_s,
+        "proposals_load_s": proposals_load_s,
+        "voter_index_s": voter_index_s,
+        "voter_lookup_ms": voter_lookup_ms,
+    }
+
+
+def run(sizes):
+    server = MockSubscanServer().start()
+    subscan.SUBSCAN_BASE_URL = server.base_url
+    subscan.PAGE_DELAY = 0
+    subscan._rate_limiter.max_calls = 10**9
+    subscan._rate_limiter.buffer = 0
+    try:
+        check_account_isolation()
+        results = {"accounts": {}, "governance": bench_governance()}
+        for size in sizes:
+            print(f"Benchmarking account with {size:,} transfers...", file=sys.stderr)
+            results["accounts"][str(size)] = bench_account(size)
+    finally:
+        server.shutdown()
+    return results
+
+
+def print_report(results):
+    print(f"{'transfers':>10} {'snapshot s':>11} {'pages/s':>9} {'peak MB':>9} {'frame s':>9}")
+    for size, r in results["accounts"].items():
+        print(
+            f"{int(size):>10,} {r['snapshot_s']:>11.3f} {r['pages_per_s']:>9.1f} "
+            f"{r['fetch_peak_mb']:>9.1f} {r['frame_s']:>9.4f}"
+        )
+    g = results["governance"]
+    print(
+        f"\nGovernance: voters.csv {g['voters_load_s'] * 1000:.1f} ms, "
+        f"proposals.csv {g['proposals_load_s'] * 1000:.1f} ms, "
+        f"voter index {g['voter_index_s'] * 1000:.1f} ms, voter lookup {g['voter_lookup_ms']:.3f} ms"
+    )
+
+
+def regressions(results, baseline, threshold):
+    """
+    List of human-readable regressions of `results` against `baseline`.
+    """
+    found = []
+
+    def check(label, metric, higher_is_better, new, old):
+        if old is None or new is None or old <= 0:
+            return
+        change = (old - new) / old if higher_is_better else (new - old) / old
+        if change > threshold:
+            found.append(f"{label} {metric}: {old:.4g} -> {new:.4g} ({change:+.0%} worse)")
+
+    for size, r in results["accounts"].items():
+        old = baseline.get("accounts", {}).get(size)
+        if old:
+            for metric, higher in METRICS.items():
+                check(f"{int(size):,} transfers", metric, higher, r.get(metric), old.get(metric))
+    for metric, higher in GOVERNANCE_METRICS.items():
+        check("governance", metric, higher, results["governance"].get(metric),
+              baseline.get("governance", {}).get(metric))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Subscan data pipeline against a mock server.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Transfer counts of the synthetic accounts")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Baseline results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown as a fraction of the baseline (default 0.25)")
+    args = parser.parse_args()
+
+    results = run(args.sizes)
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.threshold)
+        if found:
+            print("\nRegressions:")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Simulate interactive lookups competing with transfer crawls for Subscan slots.
+
+Compares first-come-first-served (every call in one class) against the
+RequestScheduler priority classes and reports interactive wait percentiles.
+Time is scaled down: the limiter allows 10 calls per 100ms instead of 5/s.
+
+    python benchmarks/scheduler_simulation.py
+"""
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from request_scheduler import BACKGROUND, INTERACTIVE, PAGING, RequestScheduler, request_context  # noqa: E402
+from subscan import RateLimiter  # noqa: E402
+
+CRAWLERS = 40
+INTERACTIVE_USERS = 5
+REQUESTS_PER_USER = 20
+BACKGROUND_WORKERS = 10
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def simulate(prioritized, seed=7):
+    random.seed(seed)
+    scheduler = RequestScheduler(RateLimiter(max_calls=10, time_window=0.1, buffer=0.0))
+    stop = threading.Event()
+    interactive_waits = []
+    crawl_pages = [0]
+    lock = threading.Lock()
+
+    def crawler(i):
+        with request_context(INTERACTIVE, user=f"crawler-{i}"):
+            while not stop.is_set():
+                # Follow-up pages are PAGING when prioritized, plain FIFO otherwise
+                scheduler.acquire(PAGING if prioritized else None)
+                with lock:
+                    crawl_pages[0] += 1
+
+    def background(i):
+        priority = BACKGROUND if prioritized else INTERACTIVE
+        with request_context(priority, user=f"worker-{i}"):
+            while not stop.is_set():
+                scheduler.acquire()
+
+    def user(i):
+        with request_context(INTERACTIVE, user=f"user-{i}"):
+            for _ in range(REQUESTS_PER_USER):
+                time.sleep(random.uniform(0.02, 0.1))
+                waited = scheduler.acquire()
+                with lock:
+                    interactive_waits.append(waited)
+
+    load = [threading.Thread(target=crawler, args=(i,), daemon=True) for i in range(CRAWLERS)]
+    load += [threading.Thread(target=background, args=(i,), daemon=True) for i in range(BACKGROUND_WORKERS)]
+    users = [threading.Thread(target=user, args=(i,)) for i in range(INTERACTIVE_USERS)]
+    started = time.time()
+    for t in load + users:
+        t.start()
+    for t in users:
+        t.join()
+    stop.set()
+    elapsed = time.time() - started
+    return {
+        "p50_ms": statistics.median(interactive_waits) * 1000,
+        "p95_ms": percentile(interactive_waits, 95) * 1000,
+        "max_ms": max(interactive_waits) * 1000,
+        "crawl_pages_per_s": crawl_pages[0] / elapsed,
+    }
+
+
+def main():
+    print(f"{CRAWLERS} crawlers + {BACKGROUND_WORKERS} background workers vs "
+          f"{INTERACTIVE_USERS} interactive users x {REQUESTS_PER_USER} requests (limit 100 calls/s)")
+    print(f"{'mode':<12}{'p50 wait':>12}{'p95 wait':>12}{'max wait':>12}{'crawl pages/s':>16}")
+    for name, prioritized in (("fifo", False), ("priority", True)):
+        r = simulate(prioritized)
+        print(f"{name:<12}{r['p50_ms']:>10.1f}ms{r['p95_ms']:>10.1f}ms{r['max_ms']:>10.1f}ms{r['crawl_pages_per_s']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
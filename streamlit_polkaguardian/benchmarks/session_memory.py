@@ -0,0 +1,90 @@
+"""
+Governance dataset memory across concurrent sessions: each simulated
+session loads the voters/proposals datasets and looks up one voter, the
+way the Governance Monitor does, and keeps what the view keeps between
+reruns. Compares per-session copies (st.cache_data hands every caller its
+own unpickled copy, and the lookup copied the voters frame to add an
+address column) with the shared read-only frames (st.cache_resource plus
+an address index), reporting memory retained by all sessions, peak memory
+and lookup time.
+
+    python benchmarks/session_memory.py --sessions 100
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(os.path.join(os.path.dirname(__file__), ".."))
+
+import pandas as pd  # noqa: E402
+import streamlit as st  # noqa: E402
+
+from chart_components import find_voter, shared_proposals, shared_voters  # noqa: E402
+from datasets import PROPOSALS_CSV, VOTERS_CSV, dataset_version  # noqa: E402
+
+
+@st.cache_data
+def copied_governance_data():
+    return pd.read_csv(VOTERS_CSV), pd.read_csv(PROPOSALS_CSV)
+
+
+def copied_session(address):
+    voters, proposals = copied_governance_data()
+    lookup = voters.copy()
+    lookup["address"] = lookup["voter"].astype(str).str.strip()
+    voter_info = lookup[lookup["address"].astype(str).str.lower() == address.lower()]
+    return {"governance_voters": voters, "governance_proposals": proposals, "voter_info": voter_info}
+
+
+def shared_session(address):
+    voters = shared_voters(dataset_version(VOTERS_CSV))
+    proposals = shared_proposals(dataset_version(PROPOSALS_CSV))
+    return {"voters": voters, "proposals": proposals, "voter_info": find_voter(dataset_version(VOTERS_CSV), address)}
+
+
+def simulate(session, addresses):
+    """
+    Sessions kept alive together; returns them with retained/peak MB and
+    mean ms per session.
+    """
+    session(addresses[0])  # Warm the cache: loading the CSVs once is the same for both
+    tracemalloc.start()
+    start = time.perf_counter()
+    sessions = [session(address) for address in addresses]
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sessions, retained / 1e6, peak / 1e6, elapsed / len(addresses) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark governance dataset memory per session.")
+    parser.add_argument("--sessions", type=int, default=100)
+    args = parser.parse_args()
+
+    voters = pd.read_csv(VOTERS_CSV, usecols=["voter"])["voter"].astype(str)
+    addresses = [voters.iloc[i * 37 % len(voters)] for i in range(args.sessions)]
+
+    print(f"{'mode':<18} {'sessions':>8} {'retained':>10} {'per session':>12} {'peak':>9} {'per lookup':>11}")
+    for label, session in (("per-session copy", copied_session), ("shared read-only", shared_session)):
+        sessions, retained, peak, ms = simulate(session, addresses)
+        assert all(len(s["voter_info"]) == 1 for s in sessions)
+        print(f"{label:<18} {len(sessions):>8} {retained:>8.1f}MB {retained / len(sessions):>10.2f}MB "
+              f"{peak:>7.1f}MB {ms:>9.2f}ms")
+        del sessions
+
+    frames = [shared_session(address)["voters"] for address in addresses[:2]]
+    assert frames[0] is frames[1], "sessions should share one voters frame"
+    try:
+        frames[0].loc[frames[0].index[0], "total_votes"] = -1
+        print("Shared voters frame accepted an in-place write")
+        sys.exit(1)
+    except ValueError:
+        print("Shared voters frame is read-only (in-place writes raise)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Staking analytics time for long reward histories: full era aggregation
+versus the incremental cache update when one new era arrives, plus the
+monthly/APY/missed-era derivations.
+
+    python benchmarks/staking_analytics.py --eras 6000 --payouts 1 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("POLKAGUARDIAN_CACHE_DIR", tempfile.mkdtemp(prefix="staking-bench-"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from staking import (  # noqa: E402
+    aggregate_eras, aggregate_months, era_table, missed_eras, summarize, update_era_cache
+)
+
+ADDRESS = "bench"
+CHAIN = "kusama"
+BONDED = 1_000.0
+REPEATS = 3
+
+
+def best_of(func):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def synthetic_events(n_eras, payouts, first_era=0):
+    """
+    `payouts` rewards per era (several nominated validators), every 23rd era
+    missed and a slash every 500 eras.
+    """
+    rng = np.random.default_rng(first_era)
+    eras = np.repeat(np.arange(first_era, first_era + n_eras), payouts)
+    eras = eras[eras % 23 != 0]
+    reward = rng.uniform(0.01, 0.05, len(eras)) / payouts
+    slash = np.where((eras % 500 == 0) & (np.arange(len(eras)) % payouts == 0), 1.0, 0.0)
+    return pd.DataFrame({
+        "era": eras,
+        "block_timestamp": 1_600_000_000 + eras * 21_600,
+        "reward": np.where(slash > 0, 0.0, reward),
+        "slash": slash,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark staking era aggregation.")
+    parser.add_argument("--eras", type=int, default=6_000)
+    parser.add_argument("--payouts", type=int, nargs="+", default=[1, 20])
+    args = parser.parse_args()
+
+    print(f"{'events':>10} {'full s':>8} {'append s':>9} {'derive s':>9} {'eras':>6} {'missed':>7} {'APY %':>7}")
+    for payouts in args.payouts:
+        events = synthetic_events(args.eras, payouts)
+        full_s, _ = best_of(lambda: aggregate_eras(events))
+
+        # Cache the history, then time updates that bring one new era
+        address = f"{ADDRESS}-{payouts}"
+        update_era_cache(CHAIN, address, events)
+        grown = pd.concat([events, synthetic_events(1, payouts, first_era=args.eras + 1)], ignore_index=True)
+        append_s, eras = best_of(lambda: update_era_cache(CHAIN, address, grown))
+
+        def derive():
+            table = era_table(eras)
+            return table, aggregate_months(table, BONDED, CHAIN), missed_eras(table), summarize(table, BONDED, CHAIN)
+
+        derive_s, (table, months, gaps, summary) = best_of(derive)
+        print(f"{len(grown):>10,} {full_s:>8.4f} {append_s:>9.4f} {derive_s:>9.4f} "
+              f"{len(table):>6,} {summary['missed']:>7,} {summary['apy_pct']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Build time and query latency of the voter similarity index.
+
+Generates synthetic vote matrices (voters in blocs that vote alike, each
+voter taking part in a random share of referenda) and times the matrix
+build, neighbor/cluster precomputation and per-address queries.
+
+    python benchmarks/vote_similarity.py --voters 5000 30000 --referenda 1500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from vote_matrix import DIRECTIONS, NeighborIndex, VoteMatrix  # noqa: E402
+
+BLOCS = 6
+
+
+def synthetic_votes(n_voters, n_referenda, participation, seed=0):
+    rng = np.random.default_rng(seed)
+    voter = np.repeat(np.arange(n_voters), rng.binomial(n_referenda, participation, n_voters))
+    referendum = rng.integers(0, n_referenda, len(voter))
+    bloc = voter % BLOCS
+    # Each bloc leans one way per referendum; 15% of votes go against the bloc
+    direction = (referendum * 7 + bloc) % 3
+    flip = rng.random(len(voter)) < 0.15
+    direction[flip] = rng.integers(0, 3, flip.sum())
+    tokens = rng.lognormal(8, 2, len(voter))
+    votes = pd.DataFrame({"voter": voter.astype(str), "referendum": referendum})
+    for d, name in enumerate(DIRECTIONS):
+        votes[name] = np.where(direction == d, tokens, 0.0)
+    return votes.drop_duplicates(["voter", "referendum"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the voter similarity index.")
+    parser.add_argument("--voters", type=int, nargs="+", default=[5_000, 30_000])
+    parser.add_argument("--referenda", type=int, default=1_500)
+    parser.add_argument("--participation", type=float, default=0.03)
+    args = parser.parse_args()
+
+    print(f"{'voters':>8} {'votes':>10} {'matrix s':>9} {'index s':>8} {'query ms p50':>13} {'query ms max':>13}")
+    for n in args.voters:
+        votes = synthetic_votes(n, args.referenda, args.participation)
+        start = time.perf_counter()
+        VoteMatrix.from_votes(votes)
+        matrix_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = NeighborIndex.build(votes)
+        index_s = time.perf_counter() - start
+
+        queries = []
+        for address in index.voters[:: max(1, len(index) // 200)]:
+            start = time.perf_counter()
+            index.similar(address)
+            queries.append((time.perf_counter() - start) * 1000)
+        print(f"{n:>8,} {len(votes):>10,} {matrix_s:>9.2f} {index_s:>8.2f} "
+              f"{statistics.median(queries):>13.3f} {max(queries):>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
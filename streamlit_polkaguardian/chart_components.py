@@ -2,96 +2,571 @@
 Chart components for integrating governance charts into the dashboard.
 These functions render charts without standalone page configuration.
 """
+import os
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
+# Plotly is imported inside the figure functions, so it only loads once a chart is drawn
+from datasets import (
+    VOTERS_CSV,
+    PROPOSALS_CSV,
+    ECOSYSTEM_METRICS_CSV,
+    MONTHLY_VOTERS_CSV,
+    REFERENDA_OUTCOME_CSV,
+    TREASURY_FLOW_CSV,
+    dataset_version
+)
+from instrumentation import timed
+from balance_history import GRAINS, reconstruct_daily, resample
+from counterparty_graph import CounterpartyGraph
+from delegation import DelegationGraph, short_address
+import ecosystem_store
+from governance_aggregates import VOTE_COLUMNS, month_start, monthly_outcomes, monthly_voting_power, outcome_counts
+from governance_etl import CHAIN_DECIMALS, REFERENDUM_COLUMNS, load_table, store_path
+from json_codec import loads
+from anomalies import THRESHOLD, WINDOW, update_anomalies
+from treasury import ROLLING_MONTHS, TreasuryAnalytics
+from staking import aggregate_months, era_table, missed_eras, staking_events, summarize, update_era_cache
+from vote_matrix import NeighborIndex, index_path
 
 
+# ---- Cached inputs ----
+# Keyed on the dataset version so a refreshed CSV is picked up without a restart.
+
+def monthly_chart_data(monthly):
+    """Long format (one row per month and type) of the monthly voters aggregates"""
+    months = pd.to_datetime(monthly["month"], utc=True).dt.tz_localize(None).dt.to_period("M").astype(str)
+    frames = [
+        pd.DataFrame({
+            "Month": months,
+            "Type": label,
+            "Voters": monthly[f"{kind}_voters"],
+            "Voting Power": monthly[f"{kind}_voting_power"],
+        })
+        for kind, label in [("delegated", "Delegated"), ("direct", "Direct")]
+    ]
+    return pd.concat(frames, ignore_index=True).sort_values("Month", kind="stable")
+
+
+@st.cache_data(show_spinner=False)
+def load_monthly_voters(version):
+    return monthly_chart_data(pd.read_csv(MONTHLY_VOTERS_CSV))
+
+
+@st.cache_data(show_spinner=False)
+def load_referenda_outcomes(version):
+    return pd.read_csv(REFERENDA_OUTCOME_CSV)
+
+
+# ---- Shared governance datasets ----
+# Loaded once per process (per dataset version) and shared by every session:
+# st.cache_data would hand each caller its own unpickled copy. The column
+# arrays are read-only, so an in-place write raises instead of showing up in
+# other sessions; derive new frames instead.
+
+def read_only(df):
+    """`df` rebuilt on read-only copies of its NumPy column arrays"""
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy(copy=True) if isinstance(df[col].dtype, np.dtype) else df[col].array
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+        columns[col] = values
+    # copy=False keeps one block per column instead of consolidating into fresh (writable) arrays
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def shared_voters(version):
+    """The voters dataset (shared, read-only)"""
+    return read_only(pd.read_csv(VOTERS_CSV))
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def shared_proposals(version):
+    """The proposals dataset (shared, read-only)"""
+    return read_only(pd.read_csv(PROPOSALS_CSV))
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def voter_lookup(version):
+    """Row position per lowercased address (first row wins) and identity name per address"""
+    voters = shared_voters(version)
+    if "voter" not in voters.columns:
+        return {}, pd.Series(dtype=object)
+    keys = voters["voter"].astype(str).str.strip().str.lower()
+    first = ~keys.duplicated()
+    positions = dict(zip(keys[first], np.flatnonzero(first)))
+    names = pd.Series(dtype=object)
+    if "voter_name" in voters.columns:
+        names = voters.drop_duplicates("voter").set_index("voter")["voter_name"]
+    return positions, names
+
+
+def find_voter(version, address):
+    """The voters row(s) of `address` (case-insensitive), without copying the dataset"""
+    voters = shared_voters(version)
+    position = voter_lookup(version)[0].get(address.strip().lower())
+    return voters.iloc[:0] if position is None else voters.iloc[[position]]
+
+
+def governance_store_chains():
+    """Chains with a local governance store (see governance_etl.py)"""
+    return [chain for chain in sorted(CHAIN_DECIMALS) if os.path.exists(store_path(chain, "votes"))]
+
+
+def governance_store_version(chain_key):
+    return dataset_version(store_path(chain_key, "votes"), store_path(chain_key, "referenda"))
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def governance_store(version, chain_key):
+    """Raw votes and referenda of a chain's governance store (shared, read-only)"""
+    return load_table(chain_key, "votes", VOTE_COLUMNS), load_table(chain_key, "referenda", REFERENDUM_COLUMNS)
+
+
+@st.cache_data(show_spinner=False)
+def governance_store_months(version, chain_key):
+    votes, _ = governance_store(version, chain_key)
+    return sorted(month_start(votes["block_timestamp"]).dt.strftime("%Y-%m").unique())
+
+
+def monthly_voters_data(version, chain_key, start, end):
+    if chain_key is None:
+        return load_monthly_voters(version)
+    votes, _ = governance_store(version, chain_key)
+    return monthly_chart_data(monthly_voting_power(votes, start=start, end=end))
+
+
+def referenda_outcomes_data(version, chain_key, start, end):
+    if chain_key is None:
+        return load_referenda_outcomes(version)
+    _, referenda = governance_store(version, chain_key)
+    return outcome_counts(monthly_outcomes(referenda, start=start, end=end))
+
+
+@st.cache_data(show_spinner=False)
+def monthly_voters_figure(version, metric, chain_key=None, start=None, end=None):
+    """Grouped monthly bars of delegated vs direct voters or voting power (the CSV, or a chain's store over [start, end))"""
+    import plotly.express as px
+    fig = px.bar(
+        monthly_voters_data(version, chain_key, start, end),
+        x="Month",
+        y=metric,
+        color="Type",
+        barmode="group",
+        text_auto=".2s",
+        title=f"Monthly {metric} by Type (Delegated vs Direct)",
+    )
+    fig.update_layout(
+        xaxis_title="Month",
+        yaxis_title=metric,
+        legend_title="Type",
+        bargap=0.15,
+        template="plotly_white",
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def referenda_outcome_figure(version, chain_key=None, start=None, end=None):
+    """Pie chart of OpenGov referenda by outcome (the CSV, or a chain's store over [start, end))"""
+    import plotly.express as px
+    pie_fig = px.pie(
+        referenda_outcomes_data(version, chain_key, start, end),
+        values="count",
+        names="status",
+        title="Referenda by Outcome",
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+    pie_fig.update_traces(textposition="inside", textinfo="percent+label")
+    pie_fig.update_layout(showlegend=False)
+    return pie_fig
+
+
+def ecosystem_version():
+    """Version of the partitioned ecosystem metrics store, imported from the CSV export on first use"""
+    if not ecosystem_store.has_store() and os.path.exists(ECOSYSTEM_METRICS_CSV):
+        ecosystem_store.import_csv()
+    return dataset_version(ecosystem_store.version_path())
+
+
+@st.cache_data(show_spinner=False)
+def load_ecosystem_metrics(version, chain=None):
+    """Daily metrics of one chain (None: every chain); only that chain's partitions are read"""
+    return ecosystem_store.read(None if chain is None else [chain])
+
+
+@st.cache_data(show_spinner=False)
+def ecosystem_metrics_with_data(version, selected_chain):
+    """Metric columns with at least one value for the chain (unless "All Chains"); missing metrics load as NaN"""
+    eco_df = load_ecosystem_metrics(version, None if selected_chain == "All Chains" else selected_chain)
+    return [col for col in ecosystem_store.METRIC_COLUMNS if col in eco_df.columns and eco_df[col].notna().any()]
+
+
+@st.cache_data(show_spinner=False)
+def ecosystem_chains(version):
+    return ecosystem_store.chains()
+
+
+@st.cache_data(show_spinner=False)
+def load_ecosystem_anomalies(version):
+    # The detector state persists in CACHE_DIR, so a new version only scores new rows
+    return update_anomalies(load_ecosystem_metrics(version))
+
+
+def ecosystem_anomalies(version, selected_chain, y_col):
+    anomalies = load_ecosystem_anomalies(version)
+    anomalies = anomalies[anomalies["metric"] == y_col]
+    if selected_chain != "All Chains":
+        anomalies = anomalies[anomalies["chain"] == selected_chain]
+    return anomalies
+
+
+@st.cache_data(show_spinner=False)
+def ecosystem_metric_figure(version, selected_chain, y_col, title, y_label, color_palette):
+    """Stacked column chart of one daily metric, filtered by chain (unless "All Chains"), with anomalies marked (`color_palette` names a Plotly qualitative palette)"""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    eco_df = load_ecosystem_metrics(version, None if selected_chain == "All Chains" else selected_chain)
+    fig = px.bar(
+        eco_df,
+        x="block_time",
+        y=y_col,
+        color="chain",
+        barmode="stack",
+        title=title,
+        text_auto=True,
+        color_discrete_sequence=getattr(px.colors.qualitative, color_palette)
+    )
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title=y_label,
+        legend_title="Chain",
+        bargap=0.2,
+        template="plotly_white",
+        hovermode="x unified"
+    )
+    fig.update_traces(textfont_size=10)
+    
+    # Markers sit on top of the day's stack
+    anomalies = ecosystem_anomalies(version, selected_chain, y_col)
+    stack_height = eco_df.groupby("block_time")[y_col].sum()
+    for kind, symbol, color in (("spike", "triangle-up", "#d62728"), ("drop", "triangle-down", "#1f77b4")):
+        marked = anomalies[anomalies["kind"] == kind]
+        if marked.empty:
+            continue
+        fig.add_trace(go.Scatter(
+            x=marked["day"],
+            y=marked["day"].map(stack_height),
+            mode="markers",
+            name=kind.capitalize(),
+            marker=dict(symbol=symbol, size=12, color=color, line=dict(width=1, color="white")),
+            hovertext=[
+                f"{chain} {kind}: {value:,.0f} (typical {expected:,.0f}, z={z:+.1f})"
+                for chain, value, expected, z in zip(marked["chain"], marked["value"], marked["expected"], marked["robust_z"])
+            ],
+            hoverinfo="text",
+        ))
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def load_treasury_flow(version):
+    df = pd.read_csv(TREASURY_FLOW_CSV)
+    df["block_time"] = pd.to_datetime(df["block_time"])
+    return df.sort_values("block_time")
+
+
+# Shared read-only object: rolling and prefix sums are computed once per
+# dataset version, window selections only read them.
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def treasury_analytics(version):
+    return TreasuryAnalytics.from_frame(load_treasury_flow(version))
+
+
+def treasury_balance_figure(analytics, opening_balance, end):
+    """Cumulative balance up to the window end and its projection at each trailing average"""
+    import plotly.graph_objects as go
+    balance, projection, _ = analytics.runway(opening_balance, end)
+    history = analytics.monthly.iloc[:analytics.position(end) + 1]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=history["month"], y=opening_balance + history["cumulative"],
+        name="Balance", mode="lines+markers", line=dict(color="black", width=3)
+    ))
+    for col, dash in zip(projection.columns, ("dot", "dash", "longdash")):
+        fig.add_trace(go.Scatter(
+            x=projection.index, y=projection[col], name=f"Projection ({col})",
+            mode="lines", line=dict(dash=dash)
+        ))
+    fig.add_hline(y=0, line_color="#d62728", line_width=1)
+    fig.update_layout(
+        title="Cumulative Treasury Balance and Projection",
+        xaxis_title="Month",
+        yaxis_title="Balance (DOT)",
+        template="plotly_white",
+        hovermode="x unified"
+    )
+    return fig
+
+
+def treasury_rolling_figure(monthly, months):
+    """Rolling inflow, outflow and net sums over `months` months"""
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    for col, color in (("inflow", "#2ca02c"), ("outflow", "#d62728"), ("net", "black")):
+        fig.add_trace(go.Scatter(
+            x=monthly["month"], y=monthly[f"{col}_{months}m"], name=col.title(),
+            mode="lines", line=dict(color=color, width=3 if col == "net" else 2)
+        ))
+    fig.update_layout(
+        title=f"Rolling {months}-Month Treasury Flows",
+        xaxis_title="Month",
+        yaxis_title="Amount (DOT)",
+        template="plotly_white",
+        hovermode="x unified"
+    )
+    return fig
+
+
+# Keyed on the snapshot version (new on every fetch); the frames themselves
+# are not hashed.
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def balance_history_daily(snapshot_version, _transfers_df, _extrinsics_df, address, native_symbol, decimals):
+    return reconstruct_daily(_transfers_df, _extrinsics_df, address, native_symbol, decimals)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def balance_history_figure(snapshot_version, _transfers_df, _extrinsics_df, address, native_symbol, decimals, grain, assets):
+    """Running balance line per asset at daily or weekly grain"""
+    import plotly.express as px
+    daily = balance_history_daily(snapshot_version, _transfers_df, _extrinsics_df, address, native_symbol, decimals)
+    series = resample(daily[list(assets)], GRAINS[grain])
+    fig = px.line(
+        series.reset_index().melt(id_vars="day", var_name="Asset", value_name="Balance"),
+        x="day",
+        y="Balance",
+        color="Asset",
+        title=f"{grain} Running Balance (net change since first transfer)",
+    )
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title="Balance",
+        legend_title="Asset",
+        template="plotly_white",
+        hovermode="x unified"
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def staking_era_table(snapshot_version, chain_key, address, decimals, _staking_df):
+    eras = update_era_cache(chain_key, address, staking_events(_staking_df, decimals))
+    return era_table(eras)
+
+
+def staking_figure(periods, x, symbol, title):
+    """Rewards above and slashes below the axis per era or month"""
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=periods[x], y=periods["rewards"], name="Rewards", marker_color="#2ca02c"))
+    if periods["slashes"].any():
+        fig.add_trace(go.Bar(x=periods[x], y=-periods["slashes"], name="Slashes", marker_color="#d62728"))
+    fig.update_layout(
+        title=title,
+        barmode="relative",
+        xaxis_title=x.capitalize(),
+        yaxis_title=symbol,
+        template="plotly_white",
+        hovermode="x unified"
+    )
+    return fig
+
+
+# Shared read-only object (no per-call copy); keyed on the snapshot versions
+# of the histories it was built from.
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def counterparty_graph(history_versions, _frames):
+    return CounterpartyGraph.from_frames(_frames)
+
+
+def counterparty_figure(nodes, edges, symbol):
+    """Ring layout of a k-hop neighborhood: one ring per hop, larger nodes moved more volume"""
+    import plotly.graph_objects as go
+    x = np.zeros(len(nodes))
+    y = np.zeros(len(nodes))
+    for hop, positions in nodes.groupby("hop").indices.items():
+        if hop == 0:
+            continue
+        angles = np.linspace(0, 2 * np.pi, len(positions), endpoint=False) + hop * 0.3
+        x[positions] = hop * np.cos(angles)
+        y[positions] = hop * np.sin(angles)
+
+    # All edges in one trace, segments separated by None
+    edge_x = np.column_stack([x[edges["source"]], x[edges["target"]], np.full(len(edges), np.nan)]).ravel()
+    edge_y = np.column_stack([y[edges["source"]], y[edges["target"]], np.full(len(edges), np.nan)]).ravel()
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=edge_x, y=edge_y, mode="lines",
+        line=dict(width=0.6, color="#bbbbbb"),
+        hoverinfo="skip", showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=x, y=y, mode="markers",
+        marker=dict(
+            size=8 + 4 * np.log10(1 + nodes["volume"].to_numpy()),
+            color=nodes["hop"],
+            colorscale="Viridis",
+            line=dict(width=1, color="white"),
+        ),
+        text=[
+            f"{address}<br>hop {hop}<br>{volume:,.2f} {symbol}"
+            for address, hop, volume in zip(nodes["address"], nodes["hop"], nodes["volume"])
+        ],
+        hovertemplate="%{text}<extra></extra>",
+        showlegend=False
+    ))
+    fig.update_layout(
+        template="plotly_white",
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False, scaleanchor="x"),
+        height=600,
+        margin=dict(l=10, r=10, t=30, b=10)
+    )
+    return fig
+
+
+# Resolved once per voters dataset version (plus the loaded account's own
+# delegations) and shared read-only between sessions.
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def delegation_graph(version, address=None, decimals=10, delegations_json="[]"):
+    graph = DelegationGraph.from_voters(shared_voters(version))
+    if address:
+        graph.add_snapshot(address, {"delegate": {"conviction_delegate": loads(delegations_json)}}, decimals)
+    graph.resolve()
+    return graph
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def vote_neighbor_index(chain_key, version):
+    """Precomputed voter similarity index (built with `python vote_matrix.py build`), or None"""
+    path = index_path(chain_key)
+    return NeighborIndex.load(path) if os.path.exists(path) else None
+
+
+def vote_control_figure(control, top_n):
+    """Horizontal bars of the largest controllers' share of effective votes"""
+    import plotly.graph_objects as go
+    top = control.head(top_n).iloc[::-1]
+    labels = [name or short_address(address) for name, address in zip(top["name"], top["controller"])]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=top["direct_votes"], y=labels, orientation="h", name="Direct",
+        hovertemplate="%{x:,.0f}<extra>Direct</extra>"
+    ))
+    fig.add_trace(go.Bar(
+        x=top["delegated_votes"], y=labels, orientation="h", name="Delegated",
+        hovertemplate="%{x:,.0f}<extra>Delegated</extra>"
+    ))
+    fig.update_layout(
+        barmode="stack",
+        xaxis_title="Effective votes",
+        template="plotly_white",
+        height=max(300, 28 * len(top)),
+        legend_title="Source",
+        margin=dict(l=10, r=10, t=30, b=10)
+    )
+    return fig
+
+
+@st.fragment
+@timed("chart.monthly_voters_voting_power")
 def render_monthly_voters_voting_power():
-    """Render Monthly Voters & Voting Power by Type (No Conviction) charts"""
+    """Render Monthly Voters & Voting Power by Type (No Conviction) charts (fragment: the metric selector reruns only this block)"""
     try:
-        df = pd.read_csv("governace_app/data/monthly_voters_voting_power_by_type.csv")
-        df["month"] = pd.to_datetime(df["month"]).dt.to_period("M").astype(str)
-        
-        # Prepare chart data
-        chart_data = pd.DataFrame({
-            "Month": df["month"].repeat(2),
-            "Type": ["Delegated", "Direct"] * len(df),
-            "Voters": df["delegated_voters"].tolist() + df["direct_voters"].tolist(),
-            "Voting Power": df["delegated_voting_power"].tolist() + df["direct_voting_power"].tolist()
-        })
-        
         st.subheader("📈 Monthly Voters & Voting Power by Type (No Conviction)")
-        
+
+        # Chains refreshed into the local governance store can be aggregated over any window
+        chain_key, start, end = None, None, None
+        sources = {"Bundled dataset (Polkadot)": None}
+        sources.update({f"{chain.title()} (local store)": chain for chain in governance_store_chains()})
+        if len(sources) > 1:
+            source_col, window_col = st.columns([1, 2])
+            with source_col:
+                chain_key = sources[st.selectbox("Data source", list(sources), key="monthly_source")]
+            if chain_key is not None:
+                store_version = governance_store_version(chain_key)
+                months = governance_store_months(store_version, chain_key)
+                if months:
+                    with window_col:
+                        first, last = st.select_slider(
+                            "Months", options=months, value=(months[0], months[-1]), key=f"monthly_window_{chain_key}"
+                        )
+                    start = first
+                    end = str((pd.Period(last, "M") + 1).start_time.date())
+
         # Create columns: 2:1 ratio
         col1, col2 = st.columns([2, 1])
-        
+
         with col1:
             # Metric selector
             metric = st.selectbox("Select Metric", ["Voters", "Voting Power"], key="monthly_metric_selector")
-            
-            fig = px.bar(
-                chart_data,
-                x="Month",
-                y=metric,
-                color="Type",
-                barmode="group",
-                text_auto=".2s",
-                title=f"Monthly {metric} by Type (Delegated vs Direct)",
-            )
-            
-            fig.update_layout(
-                xaxis_title="Month",
-                yaxis_title=metric,
-                legend_title="Type",
-                bargap=0.15,
-                template="plotly_white",
-            )
-            
+
+            if chain_key is None:
+                fig = monthly_voters_figure(dataset_version(MONTHLY_VOTERS_CSV), metric)
+            else:
+                fig = monthly_voters_figure(store_version, metric, chain_key, start, end)
+
             st.plotly_chart(fig, use_container_width=True)
-        
+
         with col2:
             st.subheader("🗳️ Referenda Outcomes")
-            
-            # Load referenda outcome data
-            df_outcome = pd.read_csv("governace_app/data/polkadot_number_of_referenda_by_outcome_opengov.csv")
-            
-            pie_fig = px.pie(
-                df_outcome,
-                values="count",
-                names="status",
-                title="Referenda by Outcome",
-                color_discrete_sequence=px.colors.qualitative.Pastel
-            )
-            
-            pie_fig.update_traces(textposition="inside", textinfo="percent+label")
-            pie_fig.update_layout(showlegend=False)
-            
+
+            if chain_key is None:
+                pie_fig = referenda_outcome_figure(dataset_version(REFERENDA_OUTCOME_CSV))
+            else:
+                pie_fig = referenda_outcome_figure(store_version, chain_key, start, end)
+
             st.plotly_chart(pie_fig, use_container_width=True)
     
     except Exception as e:
         st.error(f"Error loading monthly voters chart: {e}")
 
 
+def render_anomaly_caption(version, selected_chain, y_col):
+    """Render the anomaly count under an ecosystem metric chart, with the flagged days in an expander"""
+    anomalies = ecosystem_anomalies(version, selected_chain, y_col)
+    if anomalies.empty:
+        st.caption("No anomalies flagged.")
+        return
+    counts = anomalies["kind"].value_counts()
+    with st.expander(f"Anomalies: ▲ spikes {counts.get('spike', 0)} · ▼ drops {counts.get('drop', 0)} "
+                     f"(robust z ≥ {THRESHOLD} against the chain's previous {WINDOW} days)"):
+        st.dataframe(
+            anomalies.sort_values("day", ascending=False)[["day", "chain", "kind", "value", "expected", "robust_z", "ewma_z"]],
+            use_container_width=True,
+            hide_index=True
+        )
+
+
+@st.fragment
+@timed("chart.ecosystem_basic_metrics")
 def render_ecosystem_basic_metrics():
-    """Render Ecosystem Basic Metrics charts"""
+    """Render Ecosystem Basic Metrics charts (fragment: the chain selector reruns only this block)"""
     try:
         st.subheader("🌍 Ecosystem Basic Metrics")
         
-        # Load ecosystem metrics
-        eco_df = pd.read_csv("governace_app/data/polkadot_ecosystem_metrics_raw_data.csv")
-        
-        # Clean & prepare
-        eco_df["block_time"] = pd.to_datetime(eco_df["block_time"])
-        eco_df = eco_df.sort_values("block_time")
-        
-        # Handle missing chain column gracefully
-        if "chain" not in eco_df.columns:
-            eco_df["chain"] = "Polkadot"
+        # Chains come from the store's partition names; figures read only the selected chain
+        version = ecosystem_version()
         
         # --- Chain selection dropdown ---
-        available_chains = sorted(eco_df["chain"].dropna().unique().tolist())
+        available_chains = ecosystem_chains(version)
         default_chain = "Polkadot" if "Polkadot" in available_chains else available_chains[0]
         chain_options = ["All Chains"] + available_chains
         
@@ -102,9 +577,7 @@ def render_ecosystem_basic_metrics():
             key="ecosystem_chain_selector"
         )
         
-        # Filter data by chain (unless "All Chains" is selected)
-        if selected_chain != "All Chains":
-            eco_df = eco_df[eco_df["chain"] == selected_chain]
+        with_data = ecosystem_metrics_with_data(version, selected_chain)
         
         # Tabs for metrics
         tab1, tab2, tab3, tab4 = st.tabs([
@@ -114,86 +587,67 @@ def render_ecosystem_basic_metrics():
             "🧩 Extrinsics"
         ])
         
-        # --- Helper function for stacked column chart ---
-        def plot_metric(df, y_col, title, y_label, color_palette):
-            fig = px.bar(
-                df,
-                x="block_time",
-                y=y_col,
-                color="chain",
-                barmode="stack",
-                title=title,
-                text_auto=True,
-                color_discrete_sequence=color_palette
-            )
-            fig.update_layout(
-                xaxis_title="Date",
-                yaxis_title=y_label,
-                legend_title="Chain",
-                bargap=0.2,
-                template="plotly_white",
-                hovermode="x unified"
-            )
-            fig.update_traces(textfont_size=10)
-            return fig
-        
         # --- Tab 1: Daily Transfers ---
         with tab1:
-            if "transfers_cnt" in eco_df.columns:
+            if "transfers_cnt" in with_data:
                 st.plotly_chart(
-                    plot_metric(
-                        eco_df, "transfers_cnt",
+                    ecosystem_metric_figure(
+                        version, selected_chain, "transfers_cnt",
                         f"Daily Transfers ({selected_chain})",
                         "Number of Transfers",
-                        px.colors.qualitative.Safe
+                        "Safe"
                     ),
                     use_container_width=True
                 )
+                render_anomaly_caption(version, selected_chain, "transfers_cnt")
             else:
                 st.info("No transfer data available.")
         
         # --- Tab 2: Active Accounts ---
         with tab2:
-            if "active_cnt" in eco_df.columns:
+            if "active_cnt" in with_data:
                 st.plotly_chart(
-                    plot_metric(
-                        eco_df, "active_cnt",
+                    ecosystem_metric_figure(
+                        version, selected_chain, "active_cnt",
                         f"Daily Active Accounts ({selected_chain})",
                         "Active Accounts",
-                        px.colors.qualitative.Bold
+                        "Bold"
                     ),
                     use_container_width=True
                 )
+                render_anomaly_caption(version, selected_chain, "active_cnt")
             else:
                 st.info("No active accounts data available.")
         
         # --- Tab 3: Events ---
         with tab3:
-            if "events_cnt" in eco_df.columns:
+            if "events_cnt" in with_data:
                 st.plotly_chart(
-                    plot_metric(
-                        eco_df, "events_cnt",
+                    ecosystem_metric_figure(
+                        version, selected_chain, "events_cnt",
                         f"Daily Events ({selected_chain})",
                         "Number of Events",
-                        px.colors.qualitative.Pastel
+                        "Pastel"
                     ),
                     use_container_width=True
                 )
+                render_anomaly_caption(version, selected_chain, "events_cnt")
             else:
                 st.info("No events data available.")
         
         # --- Tab 4: Extrinsics ---
         with tab4:
-            if "extrinsics_cnt" in eco_df.columns:
+            if "extrinsics_cnt" in with_data:
                 st.plotly_chart(
-                    plot_metric(
-                        eco_df, "extrinsics_cnt",
+                    ecosystem_metric_figure(
+                        version, selected_chain, "extrinsics_cnt",
                         f"Daily Extrinsics ({selected_chain})",
                         "Number of Extrinsics",
-                        px.colors.qualitative.Prism
+                        "Prism"
                     ),
                     use_container_width=True
                 )
+                render_anomaly_caption(version, selected_chain, "extrinsics_cnt")
             else:
                 st.info("No extrinsics data available.")
     
@@ -201,17 +655,15 @@ def render_ecosystem_basic_metrics():
         st.error(f"Error loading ecosystem metrics: {e}")
 
 
+@timed("chart.treasury_flow")
 def render_treasury_flow():
     """Render Polkadot Treasury Flow chart"""
+    import plotly.graph_objects as go
     try:
         st.subheader("💰 Polkadot Treasury Flow")
         
-        # Load treasury flow data
-        df = pd.read_csv("governace_app/data/polkadot_treasury_flow.csv")
-        
-        # Clean and prepare data
-        df["block_time"] = pd.to_datetime(df["block_time"])
-        df = df.sort_values("block_time")
+        # Load treasury flow data (cleaned and sorted once per dataset version)
+        df = load_treasury_flow(dataset_version(TREASURY_FLOW_CSV))
         
         # Columns to stack (excluding net_flow)
         stack_cols = ["bounties", "burnt", "inflation", "proposal", "txn_fees", "txn_tips"]
@@ -262,3 +714,256 @@ def render_treasury_flow():
     
     except Exception as e:
         st.error(f"Error loading treasury flow chart: {e}")
+
+
+@st.fragment
+@timed("chart.treasury_analytics")
+def render_treasury_analytics():
+    """Render rolling treasury flows, spend shares and runway for a selectable window (fragment)"""
+    import plotly.express as px
+    try:
+        st.subheader("📊 Treasury Analytics")
+        analytics = treasury_analytics(dataset_version(TREASURY_FLOW_CSV))
+        if not len(analytics):
+            st.info("No treasury flow data available.")
+            return
+        
+        labels = [m.strftime("%b %Y") for m in analytics.months]
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            start_label, end_label = st.select_slider(
+                "Window", options=labels, value=(labels[max(len(labels) - 12, 0)], labels[-1]),
+                key="treasury_window"
+            )
+        with col2:
+            opening_balance = st.number_input(
+                "Balance before the first month (DOT)", min_value=0.0, value=0.0, step=1_000_000.0,
+                key="treasury_opening_balance"
+            )
+        start, end = analytics.months[labels.index(start_label)], analytics.months[labels.index(end_label)]
+        window = analytics.window(start, end)
+        
+        metric_col1, metric_col2, metric_col3 = st.columns(3)
+        with metric_col1:
+            st.metric(f"Inflow ({window['months']} months)", f"{window['inflow']:,.0f} DOT")
+        with metric_col2:
+            st.metric("Outflow", f"{window['outflow']:,.0f} DOT")
+        with metric_col3:
+            st.metric("Net", f"{window['net']:,.0f} DOT")
+        
+        tab1, tab2, tab3 = st.tabs(["📈 Balance & Runway", "🔁 Rolling Flows", "🧾 Categories"])
+        with tab1:
+            st.plotly_chart(treasury_balance_figure(analytics, opening_balance, end), use_container_width=True)
+            balance, _, runway = analytics.runway(opening_balance, end)
+            if opening_balance > 0:
+                st.dataframe(runway, use_container_width=True, hide_index=True)
+            st.caption(f"Balance at {end_label}: {balance:,.0f} DOT. The dataset holds flows only, so the balance "
+                       "is the net change since the first month plus the balance entered above; "
+                       "enter it to project runway (inf = the balance does not run out).")
+        with tab2:
+            months = st.radio("Rolling window", list(ROLLING_MONTHS), horizontal=True,
+                              format_func=lambda n: f"{n} months", key="treasury_rolling")
+            st.plotly_chart(treasury_rolling_figure(analytics.monthly, months), use_container_width=True)
+        with tab3:
+            categories = window["categories"]
+            outflows = categories[categories["side"] == "outflow"]
+            if outflows["amount"].sum() > 0:
+                fig = px.pie(outflows, names="category", values="amount", title=f"Spend by Category ({start_label} – {end_label})")
+                fig.update_traces(textposition="inside", textinfo="percent+label")
+                st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(categories, use_container_width=True, hide_index=True)
+    
+    except Exception as e:
+        st.error(f"Error computing treasury analytics: {e}")
+
+
+@timed("chart.balance_history")
+def render_balance_history(snapshot_version, transfers_df, extrinsics_df, address, native_symbol, decimals):
+    """Render the balance history reconstructed from the loaded transfers"""
+    try:
+        daily = balance_history_daily(snapshot_version, transfers_df, extrinsics_df, address, native_symbol, decimals)
+        if daily.empty:
+            st.info("No transfers to reconstruct a balance history from.")
+            return
+        
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            grain = st.radio("Grain", list(GRAINS), horizontal=True, key="balance_history_grain")
+        with col2:
+            assets = list(daily.columns)
+            default = [native_symbol] if native_symbol in assets else assets[:1]
+            selected = st.multiselect("Assets", assets, default=default, key="balance_history_assets")
+        
+        if selected:
+            fig = balance_history_figure(
+                snapshot_version, transfers_df, extrinsics_df, address, native_symbol, decimals,
+                grain, tuple(selected)
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption("Received minus sent per asset, less fees of the fetched extrinsics; "
+                       "rewards and other credits without a transfer are not included.")
+        else:
+            st.info("Select at least one asset.")
+    
+    except Exception as e:
+        st.error(f"Error building balance history: {e}")
+
+
+@timed("chart.staking")
+def render_staking_analytics(snapshot_version, chain_key, address, staking_df, decimals, bonded, symbol):
+    """Render reward/slash totals, realized APY and missed eras of the loaded staking history"""
+    try:
+        table = staking_era_table(snapshot_version, chain_key, address, decimals, staking_df)
+        if table.empty:
+            st.info("No staking rewards to analyse.")
+            return
+        
+        summary = summarize(table, bonded, chain_key)
+        metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+        with metric_col1:
+            st.metric("Net Rewards", f"{summary['net']:,.4f} {symbol}")
+        with metric_col2:
+            st.metric("Slashed", f"{summary['slashes']:,.4f} {symbol}")
+        with metric_col3:
+            apy = summary["apy_pct"]
+            st.metric("Realized APY", "N/A" if np.isnan(apy) else f"{apy:.2f}%")
+        with metric_col4:
+            st.metric("Missed Eras", f"{summary['missed']:,} / {summary['eras']:,}")
+        
+        grain = st.radio("Grain", ["Month", "Era"], horizontal=True, key="staking_rewards_grain")
+        if grain == "Month":
+            months = aggregate_months(table, bonded, chain_key)
+            st.plotly_chart(staking_figure(months, "month", symbol, "Staking Rewards per Month"), use_container_width=True)
+            st.dataframe(months, use_container_width=True, hide_index=True)
+        else:
+            st.plotly_chart(staking_figure(table, "era", symbol, "Staking Rewards per Era"), use_container_width=True)
+        
+        gaps = missed_eras(table)
+        if not gaps.empty:
+            with st.expander(f"Missed eras ({len(gaps):,} gaps)"):
+                st.dataframe(gaps, use_container_width=True, hide_index=True)
+        st.caption("APY compounds each era's net reward on the current bonded balance; eras without "
+                   "a reward between the first and last paid era count as missed.")
+    
+    except Exception as e:
+        st.error(f"Error analysing staking rewards: {e}")
+
+
+@timed("chart.counterparty_graph")
+def render_counterparty_graph(histories, address, native_symbol):
+    """Render top counterparties, largest flows and the k-hop transfer graph of the loaded histories"""
+    try:
+        histories = [(version, df) for version, df in histories if not df.empty]
+        if not histories:
+            st.info("No transfers to analyse.")
+            return
+        
+        graph = counterparty_graph(tuple(v for v, _ in histories), [df for _, df in histories])
+        if len(histories) > 1:
+            st.caption(f"Built from {len(histories)} fetched transfer histories on this chain "
+                       f"({graph.n_nodes:,} addresses, {len(graph):,} transfers).")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            assets = [a for a in graph.assets if a != "?"] or list(graph.assets)
+            asset = st.selectbox(
+                "Asset", assets,
+                index=assets.index(native_symbol) if native_symbol in assets else 0,
+                key="counterparty_asset"
+            )
+        with col2:
+            hops = st.slider("Hops", 1, 3, 1, key="counterparty_hops")
+        with col3:
+            max_nodes = st.slider("Max nodes", 10, 200, 50, step=10, key="counterparty_max_nodes")
+        
+        top = graph.top_counterparties(address, asset)
+        if top.empty:
+            st.info(f"No {asset} counterparties found.")
+            return
+        
+        nodes, edges = graph.subgraph(address, asset, hops=hops, max_nodes=max_nodes)
+        st.plotly_chart(counterparty_figure(nodes, edges, asset), use_container_width=True)
+        st.caption(f"Showing {len(nodes):,} addresses within {hops} hop(s), nearest and largest first.")
+        
+        tab1, tab2 = st.columns(2)
+        with tab1:
+            st.markdown("#### Top Counterparties")
+            st.dataframe(top, use_container_width=True, hide_index=True)
+        with tab2:
+            st.markdown("#### Largest Flows")
+            st.dataframe(graph.flows(asset), use_container_width=True, hide_index=True)
+    
+    except Exception as e:
+        st.error(f"Error building counterparty graph: {e}")
+
+
+@timed("chart.vote_control")
+def render_vote_control(graph):
+    """Render who controls the effective vote per track after resolving delegation chains"""
+    try:
+        st.subheader("🧭 Who Really Controls the Vote")
+        
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            track = st.selectbox("Track", graph.tracks(), key="vote_control_track")
+        with col2:
+            top_n = st.slider("Show top", 5, 50, 15, step=5, key="vote_control_top")
+        
+        control = graph.resolve()
+        control = control[control["track"] == track]
+        if control.empty:
+            st.info("No voting power data available.")
+            return
+        
+        metric_col1, metric_col2, metric_col3 = st.columns(3)
+        with metric_col1:
+            st.metric("Accounts for a majority", f"{graph.majority_size(track):,}")
+        with metric_col2:
+            st.metric("Top 10 share", f"{control['share_pct'].head(10).sum():.1f}%")
+        with metric_col3:
+            st.metric("Delegated share", f"{control['delegated_votes'].sum() / control['effective_votes'].sum() * 100:.1f}%")
+        
+        st.plotly_chart(vote_control_figure(control, top_n), use_container_width=True)
+        st.dataframe(
+            control.head(top_n)[[
+                "name", "controller", "effective_votes", "direct_votes", "delegated_votes",
+                "direct_delegators", "share_pct", "in_cycle"
+            ]],
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption("Delegations from the voters dataset count 1x on every track (the dataset has no "
+                   "tracks or convictions); the loaded account's own delegations use their exact "
+                   "amount, conviction and track. Votes follow delegation chains to the final delegate.")
+    
+    except Exception as e:
+        st.error(f"Error resolving delegations: {e}")
+
+
+@timed("chart.similar_voters")
+def render_similar_voters(chain_key, address, voter_names):
+    """Render the voters whose referendum votes are most like this address's"""
+    try:
+        index = vote_neighbor_index(chain_key, dataset_version(index_path(chain_key)))
+        st.markdown("#### 👥 Voters Most Like This Address")
+        if index is None:
+            st.caption(f"No vote similarity index for {chain_key} yet. Build one with "
+                       f"`python vote_matrix.py ingest --chain {chain_key} --to <last referendum>` "
+                       f"and `python vote_matrix.py build --chain {chain_key}`.")
+            return
+        
+        metric = st.radio(
+            "Similarity", ["cosine", "jaccard"], horizontal=True, key="similar_voters_metric",
+            format_func=lambda m: {"cosine": "Cosine (weighted tokens)", "jaccard": "Jaccard (same-direction votes)"}[m]
+        )
+        similar = index.similar(address, metric)
+        if similar.empty:
+            st.info("This address has no votes in the similarity index.")
+            return
+        
+        similar.insert(1, "name", similar["voter"].map(voter_names).fillna(""))
+        st.caption(f"Cluster {index.cluster_of(address)} · {len(index):,} voters indexed")
+        st.dataframe(similar, use_container_width=True, hide_index=True)
+    
+    except Exception as e:
+        st.error(f"Error loading similar voters: {e}")
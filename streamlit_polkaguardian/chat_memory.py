@@ -0,0 +1,105 @@
+# chat_memory.py
+"""
+Bounded conversation memory for the AI assistant.
+
+The most recent turns are sent to the model verbatim; older turns are folded
+into a short running summary. Stored history is capped and only the tail of
+it is rendered, so long sessions keep a constant prompt size and page payload.
+"""
+from instrumentation import span
+
+HISTORY_WINDOW = 6          # messages always sent verbatim
+SUMMARY_BATCH = 6           # fold into the summary once this many extra messages pile up
+MAX_STORED_MESSAGES = 100   # hard cap on st.session_state.chat_messages
+VISIBLE_MESSAGES = 20       # messages rendered in the chat panel
+SUMMARY_MAX_CHARS = 2000
+
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_INSTRUCTIONS = (
+    "Condense the conversation below into a brief memory for a blockchain analytics assistant. "
+    "Keep addresses, chains, referendum IDs, amounts and the user's goals; drop pleasantries. "
+    f"Answer in under {SUMMARY_MAX_CHARS // 5} words."
+)
+
+
+def build_model_messages(system_prompt, history, summary, user_prompt, summarized_upto=0):
+    """
+    Messages for a chat completion: system prompt, running summary of older
+    turns, the unsummarized recent turns, then the current user prompt.
+    `history` must not include the current user turn.
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    if summary:
+        messages.append({
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{summary}"
+        })
+    for msg in history[summarized_upto:]:
+        messages.append({"role": msg["role"], "content": msg["content"]})
+    messages.append({"role": "user", "content": user_prompt})
+    return messages
+
+
+def _transcript(messages):
+    return "\n".join(f"{m['role'].title()}: {m['content']}" for m in messages)
+
+
+def _fallback_summary(summary, messages):
+    """
+    Extractive summary used when the model can't be reached.
+    """
+    lines = [summary] if summary else []
+    for m in messages:
+        lines.append(f"{m['role'].title()}: {m['content'][:200]}")
+    text = "\n".join(lines)
+    return text[-SUMMARY_MAX_CHARS:]
+
+
+def update_summary(client, summary, messages, summarized_upto):
+    """
+    Fold turns that slid out of the verbatim window into the running summary.
+    Returns (summary, summarized_upto); a no-op until SUMMARY_BATCH turns are pending.
+    """
+    fold_until = len(messages) - HISTORY_WINDOW
+    if fold_until - summarized_upto < SUMMARY_BATCH:
+        return summary, summarized_upto
+
+    to_fold = messages[summarized_upto:fold_until]
+    prompt = _transcript(to_fold)
+    if summary:
+        prompt = f"Existing memory:\n{summary}\n\nNew turns:\n{prompt}"
+    try:
+        with span("llm.chat_summary", model=SUMMARY_MODEL):
+            response = client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.0,
+                max_tokens=400
+            )
+        new_summary = response.choices[0].message.content.strip()[:SUMMARY_MAX_CHARS]
+    except Exception as e:
+        print(f"Chat summary failed, using extractive fallback: {e}")
+        new_summary = _fallback_summary(summary, to_fold)
+    return new_summary, fold_until
+
+
+def trim_history(messages, summarized_upto):
+    """
+    Drop the oldest messages beyond MAX_STORED_MESSAGES.
+    Only already-summarized messages are dropped, so nothing is forgotten.
+    """
+    excess = min(len(messages) - MAX_STORED_MESSAGES, summarized_upto)
+    if excess <= 0:
+        return messages, summarized_upto
+    return messages[excess:], summarized_upto - excess
+
+
+def visible_tail(messages, limit=VISIBLE_MESSAGES):
+    """
+    Return (hidden_count, tail) for rendering only the latest messages.
+    """
+    hidden = max(len(messages) - limit, 0)
+    return hidden, messages[hidden:]
@@ -0,0 +1,214 @@
+# counterparty_graph.py
+"""
+Counterparty analytics over one or more fetched transfer histories.
+
+Addresses are interned into int32 ids, so the graph is a compact edge list
+(src, dst, amount, asset) plus one array of address strings. Flow volumes
+and transfer counts are scipy sparse matrices built per asset, and top
+counterparties, flows and k-hop neighborhoods are all matrix slices or
+sparse products rather than Python loops over transfers.
+
+    graph = CounterpartyGraph.from_frames([transfers_df])
+    top = graph.top_counterparties(address, "DOT")
+    nodes, edges = graph.subgraph(address, "DOT", hops=2, max_nodes=50)
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from scipy import sparse
+
+from instrumentation import span
+
+TRANSFER_KEY = ["hash", "event_idx"]
+
+
+def _categorical(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.array
+    return pd.Categorical(series)
+
+
+class CounterpartyGraph:
+    """
+    Integer-encoded transfer edge list. Read-only once built; sparse
+    matrices are derived lazily per asset.
+    """
+
+    def __init__(self, src, dst, amount, asset, addresses, assets):
+        self.src = src
+        self.dst = dst
+        self.amount = amount
+        self.asset = asset
+        self.addresses = addresses
+        self.assets = assets
+        self._ids = None
+        self._matrices = {}
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Build from transfer frames; transfers present in several histories
+        (both sides fetched) are counted once.
+        """
+        frames = [f for f in frames if not f.empty and {"from", "to", "amount"} <= set(f.columns)]
+        if not frames:
+            empty = np.empty(0, dtype=np.int32)
+            return cls(empty, empty, np.empty(0), empty, np.empty(0, dtype=object), np.empty(0, dtype=object))
+
+        with span("transform.counterparty_graph", rows=sum(len(f) for f in frames)):
+            df = frames[0]
+            if len(frames) > 1:
+                df = pd.concat(frames, ignore_index=True)
+                key = [c for c in TRANSFER_KEY if c in df.columns]
+                if key:
+                    df = df.drop_duplicates(subset=key)
+
+            # One code space for both ends of every edge
+            both = union_categoricals([_categorical(df["from"]), _categorical(df["to"])])
+            codes = both.codes.astype(np.int32)
+            n = len(df)
+            src, dst = codes[:n], codes[n:]
+            # Unknown asset symbols share a trailing "?" entry
+            if "asset_symbol" in df.columns:
+                asset = _categorical(df["asset_symbol"])
+                asset_codes = asset.codes.astype(np.int32)
+                assets = np.append(np.asarray(asset.categories, dtype=object), "?")
+            else:
+                asset_codes, assets = np.zeros(n, dtype=np.int32), np.array(["?"], dtype=object)
+            asset_codes[asset_codes < 0] = len(assets) - 1
+
+            amount = pd.to_numeric(df["amount"], errors="coerce").fillna(0).to_numpy(dtype=float)
+            keep = (src >= 0) & (dst >= 0)  # rows missing an address
+            return cls(
+                src[keep], dst[keep], amount[keep], asset_codes[keep],
+                np.asarray(both.categories, dtype=object), assets
+            )
+
+    def __len__(self):
+        return len(self.src)
+
+    @property
+    def n_nodes(self):
+        return len(self.addresses)
+
+    def index_of(self, address):
+        if self._ids is None:
+            self._ids = pd.Index(self.addresses)
+        try:
+            return int(self._ids.get_loc(address))
+        except KeyError:
+            return None
+
+    def matrices(self, asset=None):
+        """
+        (volume, count) CSR matrices, row = sender, column = receiver,
+        for one asset symbol (or all assets when None).
+        """
+        if asset not in self._matrices:
+            if asset is None:
+                keep = slice(None)
+            else:
+                code = np.flatnonzero(self.assets == asset)
+                keep = self.asset == (code[0] if len(code) else -1)
+            src, dst = self.src[keep], self.dst[keep]
+            shape = (self.n_nodes, self.n_nodes)
+            # Duplicate (src, dst) pairs are summed on conversion
+            volume = sparse.coo_matrix((self.amount[keep], (src, dst)), shape=shape).tocsr()
+            count = sparse.coo_matrix((np.ones(len(src), dtype=np.int32), (src, dst)), shape=shape).tocsr()
+            self._matrices[asset] = (volume, count)
+        return self._matrices[asset]
+
+    def top_counterparties(self, address, asset=None, n=20):
+        """
+        Counterparties of `address` ranked by total volume exchanged.
+        """
+        columns = ["counterparty", "sent", "received", "net", "transfers"]
+        i = self.index_of(address)
+        if i is None:
+            return pd.DataFrame(columns=columns)
+
+        volume, count = self.matrices(asset)
+        sent = volume.getrow(i).toarray().ravel()
+        received = volume.getcol(i).toarray().ravel()
+        transfers = count.getrow(i).toarray().ravel() + count.getcol(i).toarray().ravel()
+        sent[i] = received[i] = transfers[i] = 0  # self-transfers are not counterparties
+
+        total = sent + received
+        ranked = np.flatnonzero(transfers)
+        ranked = ranked[np.argsort(-total[ranked], kind="stable")][:n]
+        return pd.DataFrame({
+            "counterparty": self.addresses[ranked],
+            "sent": sent[ranked],
+            "received": received[ranked],
+            "net": received[ranked] - sent[ranked],
+            "transfers": transfers[ranked],
+        }, columns=columns)
+
+    def flows(self, asset=None, n=20):
+        """
+        Largest sender -> receiver flows by volume.
+        """
+        volume, count = self.matrices(asset)
+        coo = volume.tocoo()
+        top = np.argsort(-coo.data, kind="stable")[:n]
+        rows, cols = coo.row[top], coo.col[top]
+        return pd.DataFrame({
+            "from": self.addresses[rows],
+            "to": self.addresses[cols],
+            "volume": coo.data[top],
+            "transfers": np.asarray(count[rows, cols]).ravel(),
+        })
+
+    def neighborhood(self, address, hops=1, asset=None):
+        """
+        Hop distance (0 for `address`, -1 when unreachable) of every node
+        within `hops` transfers in either direction.
+        """
+        distance = np.full(self.n_nodes, -1, dtype=np.int32)
+        i = self.index_of(address)
+        if i is None:
+            return distance
+
+        count = self.matrices(asset)[1]
+        adjacency = ((count + count.T) > 0).astype(np.int32)
+        distance[i] = 0
+        frontier = np.zeros(self.n_nodes, dtype=np.int32)
+        frontier[i] = 1
+        for hop in range(1, hops + 1):
+            reached = (adjacency @ frontier) > 0
+            new = reached & (distance < 0)
+            if not new.any():
+                break
+            distance[new] = hop
+            frontier = new.astype(np.int32)
+        return distance
+
+    def subgraph(self, address, asset=None, hops=1, max_nodes=50):
+        """
+        (nodes, edges) frames of the k-hop neighborhood, capped at
+        `max_nodes`: nearer hops first, then by volume within the neighborhood.
+        """
+        distance = self.neighborhood(address, hops, asset)
+        candidates = np.flatnonzero(distance >= 0)
+        if not len(candidates):
+            return pd.DataFrame(columns=["address", "hop", "volume"]), pd.DataFrame(columns=["source", "target", "volume", "transfers"])
+
+        volume, count = self.matrices(asset)
+        strength = np.asarray(volume.sum(axis=0)).ravel() + np.asarray(volume.sum(axis=1)).ravel()
+        order = np.lexsort((-strength[candidates], distance[candidates]))
+        keep = candidates[order][:max_nodes]
+
+        nodes = pd.DataFrame({
+            "address": self.addresses[keep],
+            "hop": distance[keep],
+            "volume": strength[keep],
+        })
+        sub_volume = volume[keep][:, keep].tocoo()
+        sub_count = count[keep][:, keep]
+        edges = pd.DataFrame({
+            "source": sub_volume.row,
+            "target": sub_volume.col,
+            "volume": sub_volume.data,
+            "transfers": np.asarray(sub_count[sub_volume.row, sub_volume.col]).ravel(),
+        })
+        return nodes, edges[edges["source"] != edges["target"]].reset_index(drop=True)
@@ -1,9 +1,8 @@
 # dashboard.py
 import streamlit as st
 import pandas as pd
-from openai import OpenAI
-import json
 import os
+import uuid
 from datetime import datetime
 from subscan import (
     get_token_metadata,
@@ -12,13 +11,39 @@ from subscan import (
     fetch_extrinsics,
     fetch_staking_history,
     fetch_referenda_votes,
-    flatten_json,
-    get_full_account_snapshot
+    get_full_account_snapshot,
+    partition_by_module
 )
 from chart_components import (
     render_monthly_voters_voting_power,
     render_ecosystem_basic_metrics,
-    render_treasury_flow
+    render_treasury_flow,
+    render_treasury_analytics,
+    render_balance_history,
+    render_staking_analytics,
+    render_counterparty_graph,
+    render_vote_control,
+    render_similar_voters,
+    delegation_graph,
+    shared_voters,
+    shared_proposals,
+    voter_lookup,
+    find_voter
+)
+from summary_cache import generate_proposal_summary, selectable_proposals
+from datasets import VOTERS_CSV, PROPOSALS_CSV, dataset_version
+from delegation import snapshot_delegations
+from json_codec import dumps_text
+from paged_table import TableIndex, render_paged_table
+from raw_view import render_raw_view
+from refresh_worker import record_access
+from request_scheduler import INTERACTIVE, request_context
+from instrumentation import span, timed, stage_summary, recent_spans, render_prometheus, start_metrics_server
+from chat_memory import (
+    build_model_messages,
+    update_summary,
+    trim_history,
+    visible_tail
 )
 
 # ============================================================================
@@ -317,7 +342,7 @@ st.set_page_config(
 )
 
 # ============================================================================
-# INITIALIZE OPENAI CLIENT
+# OPENAI CLIENT (created on first use)
 # ============================================================================
 api_key = os.environ.get("OPENAI_API_KEY")
 if not api_key:
@@ -326,7 +351,49 @@ if not api_key:
     except Exception:
         api_key = None
 
-client = OpenAI(api_key=api_key) if api_key else None
+@st.cache_resource(show_spinner=False)
+def openai_client(api_key):
+    """OpenAI client, created on first use and shared across sessions (the SDK is only imported here)"""
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
+
+# Serve /metrics when METRICS_PORT is set (once per process)
+start_metrics_server()
+
+# Subscan API key (shared by the fetch button and the wallet view)
+try:
+    API_KEY = st.secrets["SUBSCAN_API_KEY"]
+except:
+    API_KEY = None
+
+CHAIN_OPTIONS = {
+    "Polkadot": "polkadot",
+    "Kusama": "kusama",
+    "Acala": "acala",
+    "Astar": "astar",
+    "Moonbeam": "moonbeam",
+    "Phala": "phala",
+    "Bifrost": "bifrost",
+    "Centrifuge": "centrifuge",
+    "Parallel": "parallel",
+    "HydraDX": "hydradx",
+    "Litentry": "litentry",
+    "Crust": "crust",
+    "Darwinia": "darwinia",
+    "Edgeware": "edgeware",
+    "Karura": "karura",
+    "Statemine": "statemine",
+    "Statemint": "statemint",
+    "Ternoa": "ternoa",
+    "Unique": "unique",
+    "Zeitgeist": "zeitgeist"
+}
+
+# Transfer histories kept per session for the counterparty graph (most recent fetches)
+MAX_TRANSFER_HISTORIES = 5
+
+# Wallet Activity detail tabs
+WALLET_TABS = ["💸 Transfers", "📉 Balance History", "🕸️ Counterparties", "⚙️ Extrinsics", "🔗 Proxy", "🪙 Staking", "🏛️ Democracy", "🗳️ Votes"]
 
 # ============================================================================
 # SESSION STATE INITIALIZATION
@@ -335,14 +402,19 @@ session_defaults = {
     "data_section": None,
     "response_json": None,
     "transfers_df": pd.DataFrame(),
+    "transfers_index": None,
+    "snapshot_version": None,
+    "transfer_histories": {},
     "extrinsics_df": pd.DataFrame(),
+    "extrinsics_by_module": {},
     "staking_df": pd.DataFrame(),
     "votes_df": pd.DataFrame(),
     "account_data_snapshot": None,
+    "account_snapshot_text": "",
     "chat_messages": [],
+    "chat_summary": "",
+    "chat_summarized_upto": 0,
     "current_view": "Ecosystem Overview",
-    "governance_voters": None,
-    "governance_proposals": None,
     "wallet_address": "",
     "selected_chain": "Polkadot",
 }
@@ -351,969 +423,851 @@ for k, v in session_defaults.items():
     if k not in st.session_state:
         st.session_state[k] = v
 
+# Identifies this browser session to the Subscan request scheduler (fair sharing)
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# Longest an interactive Subscan call may queue before giving up (seconds)
+INTERACTIVE_MAX_WAIT = 30
+
 # ============================================================================
 # LOAD GOVERNANCE DATA
 # ============================================================================
-@st.cache_data
 def load_governance_data():
-    """Load governance CSV data"""
+    """Governance datasets, loaded once per process and shared read-only (sessions keep no copies)"""
     try:
-        voters = pd.read_csv("governace_app/data/polkadot_voters.csv")
-        proposals = pd.read_csv("governace_app/data/proposals.csv")
-        return voters, proposals
+        return shared_voters(dataset_version(VOTERS_CSV)), shared_proposals(dataset_version(PROPOSALS_CSV))
     except Exception as e:
         st.error(f"Error loading governance data: {e}")
         return pd.DataFrame(), pd.DataFrame()
 
 # ============================================================================
-# MAIN LAYOUT WITH SIDEBAR FOR CHAT
+# DELEGATIONS
 # ============================================================================
+def current_delegation_graph():
+    """Resolved delegation graph: voters dataset plus the loaded account's own delegations"""
+    data_section = st.session_state.data_section or {}
+    delegations = (data_section.get("delegate") or {}).get("conviction_delegate") or []
+    if not delegations or not API_KEY:
+        # Shared by every session without account-specific delegations
+        return delegation_graph(dataset_version(VOTERS_CSV))
+    chain_key = CHAIN_OPTIONS.get(st.session_state.selected_chain, "polkadot")
+    return delegation_graph(
+        dataset_version(VOTERS_CSV),
+        st.session_state.wallet_address,
+        get_token_metadata(chain_key, API_KEY)["decimals"],
+        dumps_text(delegations)
+    )
 
-# Create two-column layout: main content + chat sidebar
-main_col, chat_col = st.columns([2.5, 1])
+# ============================================================================
+# TRANSFER HISTORIES
+# ============================================================================
+def remember_transfer_history(chain_key, address):
+    """Keep the fetched transfers for the counterparty graph (most recent MAX_TRANSFER_HISTORIES)"""
+    histories = st.session_state.transfer_histories
+    histories.pop((chain_key, address), None)
+    histories[(chain_key, address)] = (st.session_state.snapshot_version, st.session_state.transfers_df)
+    while len(histories) > MAX_TRANSFER_HISTORIES:
+        histories.pop(next(iter(histories)))
 
-with main_col:
-    # ========================================================================
-    # HEADER
-    # ========================================================================
-    st.title("🌐 Polkadot Analytics Dashboard")
-    st.markdown("### Professional Multi-Chain Account & Governance Analytics")
-    
+# ============================================================================
+# VIEW REGIONS
+# Each region runs as a fragment: interacting with a widget inside it reruns
+# only that region, not the whole script (CSS, header, other views).
+# ============================================================================
+@st.fragment
+@timed("view.ecosystem")
+def render_ecosystem_view():
+    """Ecosystem Overview region"""
+    st.markdown("## 🌍 Polkadot Ecosystem Overview")
+    st.markdown("Explore comprehensive governance and ecosystem metrics across the Polkadot network.")
     st.divider()
     
-    # ========================================================================
-    # WALLET INPUT - Always Visible
-    # ========================================================================
-    col1, col2 = st.columns([3, 1])
-    with col1:
-        wallet_input = st.text_input(
-            "🔑 Enter Wallet Address:",
-            value=st.session_state.wallet_address if st.session_state.wallet_address else "15g4zgBFXtbPv2JMgf21DQZP851BeMJJqmAsE9R3MMaWea71",
-            help="Enter a valid Polkadot/Substrate address",
-            key="wallet_input_field"
-        )
-    with col2:
-        CHAIN_OPTIONS = {
-            "Polkadot": "polkadot",
-            "Kusama": "kusama",
-            "Acala": "acala",
-            "Astar": "astar",
-            "Moonbeam": "moonbeam",
-            "Phala": "phala",
-            "Bifrost": "bifrost",
-            "Centrifuge": "centrifuge",
-            "Parallel": "parallel",
-            "HydraDX": "hydradx",
-            "Litentry": "litentry",
-            "Crust": "crust",
-            "Darwinia": "darwinia",
-            "Edgeware": "edgeware",
-            "Karura": "karura",
-            "Statemine": "statemine",
-            "Statemint": "statemint",
-            "Ternoa": "ternoa",
-            "Unique": "unique",
-            "Zeitgeist": "zeitgeist"
-        }
-        chain_selector = st.selectbox(
-            "🔗 Select Network:",
-            options=list(CHAIN_OPTIONS.keys()),
-            index=list(CHAIN_OPTIONS.keys()).index(st.session_state.selected_chain) if st.session_state.selected_chain in CHAIN_OPTIONS else 0,
-            key="chain_selector_field"
-        )
-    
-    # Fetch button
-    try:
-        API_KEY = st.secrets["SUBSCAN_API_KEY"]
-    except:
-        API_KEY = None
-    
-    if st.button("🔍 Fetch Account Data", use_container_width=False):
-        if API_KEY and wallet_input:
-            chain_key = CHAIN_OPTIONS[chain_selector]
-            with st.spinner(f"Fetching data from {chain_selector}..."):
-                try:
-                    # Fetch wallet activity data
-                    response_json = fetch_account_data(chain_key, wallet_input, API_KEY)
-                    st.session_state.response_json = response_json
-                    st.session_state.data_section = response_json.get("data", {}).get("account", {})
-                    
-                    # Fetch all related data
-                    st.session_state.transfers_df = fetch_all_transfers(chain_key, wallet_input, API_KEY)
-                    st.session_state.extrinsics_df = fetch_extrinsics(chain_key, wallet_input, API_KEY)
-                    st.session_state.staking_df = fetch_staking_history(chain_key, wallet_input, API_KEY)
-                    st.session_state.votes_df = fetch_referenda_votes(chain_key, wallet_input, API_KEY)
-                    st.session_state.account_data_snapshot = get_full_account_snapshot(chain_key, wallet_input, API_KEY)
-                    
-                    # Store wallet address and chain
-                    st.session_state.wallet_address = wallet_input
-                    st.session_state.selected_chain = chain_selector
-                    
-                    # Load governance data
-                    if st.session_state.governance_voters is None or st.session_state.governance_proposals is None:
-                        voters, proposals = load_governance_data()
-                        st.session_state.governance_voters = voters
-                        st.session_state.governance_proposals = proposals
-                    
-                    st.success("✅ All data fetched successfully!")
-                    st.session_state.current_view = "Wallet Activity"
-                except Exception as e:
-                    st.error(f"❌ Error fetching data: {e}")
-        elif not API_KEY:
-            st.error("⚠️ Subscan API key not found in secrets")
-        else:
-            st.warning("Please enter a wallet address")
+    # Render ecosystem basic metrics
+    render_ecosystem_basic_metrics()
     
     st.divider()
     
-    # ========================================================================
-    # NAVIGATION - Main View Selector
-    # ========================================================================
-    view_option = st.radio(
-        "📊 Select Dashboard View:",
-        ["Ecosystem Overview", "Wallet Activity", "Governance Monitor"],
-        index=["Ecosystem Overview", "Wallet Activity", "Governance Monitor"].index(st.session_state.current_view),
-        horizontal=True,
-        key="main_view_selector"
-    )
-    st.session_state.current_view = view_option
+    # Render treasury flow
+    render_treasury_flow()
+    render_treasury_analytics()
     
-    st.divider()
+    if not st.session_state.wallet_address:
+        st.info("💡 Enter a wallet address above and click 'Fetch Account Data' to explore wallet-specific analytics.")
+
+
+@st.fragment
+@timed("view.wallet")
+def render_wallet_view():
+    """Wallet Activity region for the account loaded with 'Fetch Account Data'"""
+    # Check if data has been loaded
+    data_section = st.session_state.data_section
     
-    # ========================================================================
-    # ECOSYSTEM OVERVIEW
-    # ========================================================================
-    if view_option == "Ecosystem Overview":
-        st.markdown("## 🌍 Polkadot Ecosystem Overview")
-        st.markdown("Explore comprehensive governance and ecosystem metrics across the Polkadot network.")
+    if not st.session_state.wallet_address or not data_section:
+        st.warning("⚠️ No wallet data loaded. Please enter a wallet address and click 'Fetch Account Data'.")
+    elif data_section and API_KEY:
+        selected_chain = st.session_state.selected_chain
+        chain_key = CHAIN_OPTIONS.get(selected_chain, "polkadot")
+        token_meta = get_token_metadata(chain_key, API_KEY)
+        symbol = token_meta["symbol"]
+        decimals = token_meta["decimals"]
+        price_usd = token_meta["price"]
+        
         st.divider()
         
-        # Render ecosystem basic metrics
-        render_ecosystem_basic_metrics()
+        # Account Overview Section
+        st.markdown("## 👤 Account Overview")
+        
+        overview_col1, overview_col2, overview_col3, overview_col4 = st.columns(4)
+        with overview_col1:
+            st.metric("Network", selected_chain)
+        with overview_col2:
+            st.metric("Transactions", data_section.get("nonce", "N/A"))
+        with overview_col3:
+            st.metric("Role", data_section.get("role", "N/A"))
+        with overview_col4:
+            st.metric("Display Name", data_section.get("display", "N/A") if data_section.get("display") else "—")
+        
+        st.markdown(f"**Address:** `{data_section.get('address', 'N/A')}`")
         
         st.divider()
         
-        # Render treasury flow
-        render_treasury_flow()
+        # Financial Metrics
+        st.markdown("## 💰 Balance Overview")
         
-        if not st.session_state.wallet_address:
-            st.info("💡 Enter a wallet address above and click 'Fetch Account Data' to explore wallet-specific analytics.")
-    
-    # ========================================================================
-    # WALLET ACTIVITY VIEW
-    # ========================================================================
-    elif view_option == "Wallet Activity":
-        # Check if data has been loaded
-        data_section = st.session_state.data_section
+        balance = float(data_section.get("balance", 0))
+        balance_usd = balance * price_usd
+        lock = float(data_section.get("lock", 0))
+        lock_usd = lock * price_usd
         
-        if not st.session_state.wallet_address or not data_section:
-            st.warning("⚠️ No wallet data loaded. Please enter a wallet address and click 'Fetch Account Data'.")
-        elif data_section and API_KEY:
-            # Use stored chain and wallet information
-            CHAIN_OPTIONS = {
-                "Polkadot": "polkadot",
-                "Kusama": "kusama",
-                "Acala": "acala",
-                "Astar": "astar",
-                "Moonbeam": "moonbeam",
-                "Phala": "phala",
-                "Bifrost": "bifrost",
-                "Centrifuge": "centrifuge",
-                "Parallel": "parallel",
-                "HydraDX": "hydradx",
-                "Litentry": "litentry",
-                "Crust": "crust",
-                "Darwinia": "darwinia",
-                "Edgeware": "edgeware",
-                "Karura": "karura",
-                "Statemine": "statemine",
-                "Statemint": "statemint",
-                "Ternoa": "ternoa",
-                "Unique": "unique",
-                "Zeitgeist": "zeitgeist"
-            }
-            selected_chain = st.session_state.selected_chain
-            chain_key = CHAIN_OPTIONS.get(selected_chain, "polkadot")
-            token_meta = get_token_metadata(chain_key, API_KEY)
-            symbol = token_meta["symbol"]
-            decimals = token_meta["decimals"]
-            price_usd = token_meta["price"]
-            
-            st.divider()
-            
-            # Account Overview Section
-            st.markdown("## 👤 Account Overview")
-            
-            overview_col1, overview_col2, overview_col3, overview_col4 = st.columns(4)
-            with overview_col1:
-                st.metric("Network", selected_chain)
-            with overview_col2:
-                st.metric("Transactions", data_section.get("nonce", "N/A"))
-            with overview_col3:
-                st.metric("Role", data_section.get("role", "N/A"))
-            with overview_col4:
-                st.metric("Display Name", data_section.get("display", "N/A") if data_section.get("display") else "—")
-            
-            st.markdown(f"**Address:** `{data_section.get('address', 'N/A')}`")
-            
-            st.divider()
-            
-            # Financial Metrics
-            st.markdown("## 💰 Balance Overview")
-            
-            balance = float(data_section.get("balance", 0))
-            balance_usd = balance * price_usd
-            lock = float(data_section.get("lock", 0))
-            lock_usd = lock * price_usd
-            
-            # Calculate transferrable with safety check to prevent negative values
-            transferrable = balance - lock
-            # If balance is zero OR transferrable is negative, set to zero
-            if balance == 0 or transferrable < 0:
-                transferrable = 0
-            
-            transferrable_usd = transferrable * price_usd
-            reserved = float(data_section.get("reserved", 0)) / 10**10
-            reserved_usd = reserved * price_usd
-            
-            balance_col1, balance_col2, balance_col3, balance_col4 = st.columns(4)
-            
-            with balance_col1:
-                st.metric("Total Balance", f"{balance:,.2f} {symbol}")
-                st.metric("USD Value", f"${balance_usd:,.2f}")
-            with balance_col2:
-                st.metric("Transferable", f"{transferrable:,.2f} {symbol}")
-                st.metric("USD Value", f"${transferrable_usd:,.2f}")
-            with balance_col3:
-                st.metric("Locked", f"{lock:,.2f} {symbol}")
-                st.metric("USD Value", f"${lock_usd:,.2f}")
-            with balance_col4:
-                st.metric("Reserved", f"{reserved:,.2f} {symbol}")
-                st.metric("Token Price", f"${price_usd:,.4f}")
-            
-            st.divider()
-            
-            # Additional Metrics
-            st.markdown("## 📊 Additional Metrics")
-            metric_col1, metric_col2, metric_col3 = st.columns(3)
-            with metric_col1:
-                st.metric("Bonded", f"{float(data_section.get('bonded', 0)):,.2f}")
-            with metric_col2:
-                st.metric("Democracy Lock", f"{float(data_section.get('democracy_lock', 0)):,.2f}")
-            with metric_col3:
-                st.metric("Conviction Lock", f"{float(data_section.get('conviction_lock', 0)):,.2f}")
-            
-            st.divider()
-            
-            # Detailed Data Tabs
-            st.markdown("## 📈 Detailed Activity")
-            
-            tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-                "💸 Transfers",
-                "⚙️ Extrinsics",
-                "🔗 Proxy",
-                "🪙 Staking",
-                "🏛️ Democracy",
-                "🗳️ Votes"
-            ])
-            
-            with tab1:
-                st.subheader("Token Transfer History")
-                transfers_df = st.session_state.transfers_df
-                if not transfers_df.empty:
-                    display_cols = ["from", "to", "amount", "asset_symbol", "block_num", "datetime"]
-                    display_cols = [c for c in display_cols if c in transfers_df.columns]
-                    st.dataframe(transfers_df[display_cols], use_container_width=True, hide_index=True)
-                else:
-                    st.info("No transfer history available.")
-            
-            with tab2:
-                st.subheader("Extrinsics History")
-                extrinsics_df = st.session_state.extrinsics_df
-                if not extrinsics_df.empty:
-                    display_cols = [
-                        "block_num", "extrinsic_index", "call_module", "call_module_function",
-                        "nonce", "success", "fee", "tip", "extrinsic_hash", "datetime"
-                    ]
-                    display_cols = [c for c in display_cols if c in extrinsics_df.columns]
-                    st.success(f"✅ {len(extrinsics_df)} extrinsics found")
-                    st.dataframe(extrinsics_df[display_cols], use_container_width=True, hide_index=True)
-                else:
-                    st.info("No extrinsics found.")
-            
-            with tab3:
-                st.subheader("Proxy Extrinsics")
-                extrinsics_df = st.session_state.extrinsics_df
-                if not extrinsics_df.empty:
-                    proxy_df = extrinsics_df[extrinsics_df["call_module"] == "proxy"]
-                    if not proxy_df.empty:
-                        st.dataframe(proxy_df, use_container_width=True, hide_index=True)
-                    else:
-                        st.info("No proxy extrinsics found.")
-                else:
-                    st.info("No data available.")
-            
-            with tab4:
-                st.subheader("Staking Information")
-                staking_info = data_section.get("staking_info", {})
-                if staking_info:
-                    st.write(f"**Controller:** {staking_info.get('controller', 'N/A')}")
-                    st.write(f"**Reward Account:** {staking_info.get('reward_account', 'N/A')}")
-                    st.write(f"**Stash:** {data_section.get('stash', 'N/A')}")
-                else:
-                    st.info("No staking information found.")
-                
-                st.markdown("#### Delegations")
-                delegate_data = data_section.get("delegate", {}).get("conviction_delegate", [])
-                if delegate_data:
-                    table_data = []
-                    for d in delegate_data:
-                        delegate = d.get("delegate_account", {})
-                        table_data.append({
-                            "Delegate Display": delegate.get("people", {}).get("display", "N/A"),
-                            "Delegate Address": delegate.get("address", "N/A"),
-                            "Conviction": d.get("conviction", "N/A"),
-                            "Amount": int(d.get("amount", 0)) / 1e10,
-                            "Votes": int(d.get("votes", 0)) / 1e10,
-                        })
-                    st.dataframe(pd.DataFrame(table_data), use_container_width=True)
-                else:
-                    st.info("No delegation data.")
-                
-                st.markdown("#### Staking Rewards & Slashes")
-                staking_df = st.session_state.staking_df
-                if not staking_df.empty:
-                    staking_df['amount'] = pd.to_numeric(staking_df['amount'], errors='coerce')
-                    staking_df['datetime'] = pd.to_datetime(staking_df['block_timestamp'], unit='s')
-                    st.dataframe(
-                        staking_df[['block_num', 'datetime', 'event_id', 'amount']],
-                        use_container_width=True,
-                        hide_index=True
-                    )
+        # Calculate transferrable with safety check to prevent negative values
+        transferrable = balance - lock
+        # If balance is zero OR transferrable is negative, set to zero
+        if balance == 0 or transferrable < 0:
+            transferrable = 0
+        
+        transferrable_usd = transferrable * price_usd
+        reserved = float(data_section.get("reserved", 0)) / 10**10
+        reserved_usd = reserved * price_usd
+        
+        balance_col1, balance_col2, balance_col3, balance_col4 = st.columns(4)
+        
+        with balance_col1:
+            st.metric("Total Balance", f"{balance:,.2f} {symbol}")
+            st.metric("USD Value", f"${balance_usd:,.2f}")
+        with balance_col2:
+            st.metric("Transferable", f"{transferrable:,.2f} {symbol}")
+            st.metric("USD Value", f"${transferrable_usd:,.2f}")
+        with balance_col3:
+            st.metric("Locked", f"{lock:,.2f} {symbol}")
+            st.metric("USD Value", f"${lock_usd:,.2f}")
+        with balance_col4:
+            st.metric("Reserved", f"{reserved:,.2f} {symbol}")
+            st.metric("Token Price", f"${price_usd:,.4f}")
+        
+        st.divider()
+        
+        # Additional Metrics
+        st.markdown("## 📊 Additional Metrics")
+        metric_col1, metric_col2, metric_col3 = st.columns(3)
+        with metric_col1:
+            st.metric("Bonded", f"{float(data_section.get('bonded', 0)):,.2f}")
+        with metric_col2:
+            st.metric("Democracy Lock", f"{float(data_section.get('democracy_lock', 0)):,.2f}")
+        with metric_col3:
+            st.metric("Conviction Lock", f"{float(data_section.get('conviction_lock', 0)):,.2f}")
+        
+        st.divider()
+        
+        # Detailed Data Tabs
+        st.markdown("## 📈 Detailed Activity")
+        
+        # Only the selected tab is computed and sent to the browser
+        # (st.tabs would build and ship all six on every rerun)
+        active_tab = st.radio(
+            "Activity",
+            WALLET_TABS,
+            horizontal=True,
+            label_visibility="collapsed",
+            key="wallet_activity_tab"
+        )
+        
+        if active_tab == "💸 Transfers":
+            st.subheader("Token Transfer History")
+            transfers_index = st.session_state.transfers_index
+            if transfers_index is not None and len(transfers_index):
+                # Only the visible page is sent to the browser; sort/filter run server-side
+                render_paged_table(
+                    transfers_index,
+                    ["from", "to", "amount", "asset_symbol", "block_num", "datetime"],
+                    key="transfers_table",
+                    sort_options=["datetime", "amount", "block_num", "asset_symbol"],
+                    default_sort="datetime"
+                )
+            else:
+                st.info("No transfer history available.")
+        
+        elif active_tab == "📉 Balance History":
+            st.subheader("Balance History")
+            render_balance_history(
+                st.session_state.snapshot_version,
+                st.session_state.transfers_df,
+                st.session_state.extrinsics_df,
+                st.session_state.wallet_address,
+                symbol,
+                decimals
+            )
+        
+        elif active_tab == "🕸️ Counterparties":
+            st.subheader("Counterparty Graph")
+            render_counterparty_graph(
+                [
+                    (version, df)
+                    for (history_chain, _), (version, df) in st.session_state.transfer_histories.items()
+                    if history_chain == chain_key
+                ],
+                st.session_state.wallet_address,
+                symbol
+            )
+        
+        elif active_tab == "⚙️ Extrinsics":
+            st.subheader("Extrinsics History")
+            extrinsics_df = st.session_state.extrinsics_df
+            if not extrinsics_df.empty:
+                display_cols = [
+                    "block_num", "extrinsic_index", "call_module", "call_module_function",
+                    "nonce", "success", "fee", "tip", "extrinsic_hash", "datetime"
+                ]
+                display_cols = [c for c in display_cols if c in extrinsics_df.columns]
+                st.success(f"✅ {len(extrinsics_df)} extrinsics found")
+                st.dataframe(extrinsics_df[display_cols], use_container_width=True, hide_index=True)
+            else:
+                st.info("No extrinsics found.")
+        
+        elif active_tab == "🔗 Proxy":
+            st.subheader("Proxy Extrinsics")
+            if not st.session_state.extrinsics_df.empty:
+                proxy_df = st.session_state.extrinsics_by_module.get("proxy")
+                if proxy_df is not None:
+                    st.dataframe(proxy_df, use_container_width=True, hide_index=True)
                 else:
-                    st.info("No staking history.")
+                    st.info("No proxy extrinsics found.")
+            else:
+                st.info("No data available.")
+        
+        elif active_tab == "🪙 Staking":
+            st.subheader("Staking Information")
+            staking_info = data_section.get("staking_info", {})
+            if staking_info:
+                st.write(f"**Controller:** {staking_info.get('controller', 'N/A')}")
+                st.write(f"**Reward Account:** {staking_info.get('reward_account', 'N/A')}")
+                st.write(f"**Stash:** {data_section.get('stash', 'N/A')}")
+            else:
+                st.info("No staking information found.")
             
-            with tab5:
-                st.subheader("Democracy Extrinsics")
-                extrinsics_df = st.session_state.extrinsics_df
-                if not extrinsics_df.empty:
-                    demo_df = extrinsics_df[extrinsics_df["call_module"] == "democracy"]
-                    if not demo_df.empty:
-                        st.dataframe(demo_df, use_container_width=True, hide_index=True)
-                    else:
-                        st.info("No democracy extrinsics.")
-                else:
-                    st.info("No data available.")
+            st.markdown("#### Delegations")
+            delegations = snapshot_delegations(st.session_state.wallet_address, data_section, decimals)
+            if not delegations.empty:
+                st.dataframe(
+                    delegations.rename(columns={
+                        "delegate_display": "Delegate Display",
+                        "delegate": "Delegate Address",
+                        "track": "Track",
+                        "conviction": "Conviction",
+                        "amount": "Amount",
+                        "votes": "Votes",
+                    })[["Delegate Display", "Delegate Address", "Track", "Conviction", "Amount", "Votes"]],
+                    use_container_width=True
+                )
+            else:
+                st.info("No delegation data.")
             
-            with tab6:
-                st.subheader("Referenda Votes")
-                votes_df = st.session_state.votes_df
-                if not votes_df.empty:
-                    votes_df['amount'] = pd.to_numeric(votes_df['amount'], errors='coerce')
-                    votes_df['datetime'] = pd.to_datetime(votes_df['block_timestamp'], unit='s')
+            st.markdown("#### Staking Rewards & Slashes")
+            staking_df = st.session_state.staking_df
+            if not staking_df.empty:
+                render_staking_analytics(
+                    st.session_state.snapshot_version, chain_key, st.session_state.wallet_address,
+                    staking_df, decimals, float(data_section.get("bonded") or 0), symbol
+                )
+                with st.expander(f"All reward/slash events ({len(staking_df):,})"):
                     st.dataframe(
-                        votes_df[['referendum_index', 'datetime', 'status', 'amount', 'conviction']],
+                        staking_df[[c for c in ['era', 'block_num', 'datetime', 'event_id', 'amount'] if c in staking_df.columns]],
                         use_container_width=True,
                         hide_index=True
                     )
+            else:
+                st.info("No staking history.")
+        
+        elif active_tab == "🏛️ Democracy":
+            st.subheader("Democracy Extrinsics")
+            if not st.session_state.extrinsics_df.empty:
+                demo_df = st.session_state.extrinsics_by_module.get("democracy")
+                if demo_df is not None:
+                    st.dataframe(demo_df, use_container_width=True, hide_index=True)
                 else:
-                    st.info("No referenda votes.")
-            
-            # Developer view
-            with st.expander("🧩 Developer View - Raw Data"):
-                flat_data = flatten_json(data_section)
-                flat_df = pd.DataFrame(list(flat_data.items()), columns=["Field", "Value"])
-                st.dataframe(flat_df, use_container_width=True)
-                st.json(st.session_state.response_json)
-    
-    # ========================================================================
-    # GOVERNANCE MONITOR VIEW
-    # ========================================================================
-    elif view_option == "Governance Monitor":
-        st.markdown("## 🌀 Polkadot & Kusama Governance Monitor")
+                    st.info("No democracy extrinsics.")
+            else:
+                st.info("No data available.")
         
-        # Load governance data
-        if st.session_state.governance_voters is None or st.session_state.governance_proposals is None:
-            voters, proposals = load_governance_data()
-            st.session_state.governance_voters = voters
-            st.session_state.governance_proposals = proposals
-        else:
-            voters = st.session_state.governance_voters
-            proposals = st.session_state.governance_proposals
+        elif active_tab == "🗳️ Votes":
+            st.subheader("Referenda Votes")
+            votes_df = st.session_state.votes_df
+            if not votes_df.empty:
+                st.dataframe(
+                    votes_df[['referendum_index', 'datetime', 'status', 'amount', 'conviction']],
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                st.info("No referenda votes.")
         
-        if voters.empty or proposals.empty:
-            st.warning("⚠️ Governance data not available. Please check data files in governace_app/data/")
-        else:
-            st.divider()
-            
-            # Voter Lookup Section
-            st.markdown("### 🔍 Voter Lookup")
-            default_wallet = st.session_state.wallet_address if st.session_state.wallet_address else ""
-            wallet_address = st.text_input(
-                "Enter Wallet Address:",
-                value=default_wallet,
-                help="Check governance participation for a specific address",
-                key="governance_voter_lookup"
+        # Developer view: nothing is flattened or serialized until it is switched on
+        if st.toggle("🧩 Developer View - Raw Data", key="developer_view"):
+            render_raw_view(
+                st.session_state.snapshot_version,
+                data_section,
+                st.session_state.response_json,
+                key="raw_account"
             )
+
+
+@st.fragment
+@timed("view.governance")
+def render_governance_view():
+    """Governance Monitor region"""
+    st.markdown("## 🌀 Polkadot & Kusama Governance Monitor")
+    
+    voters, proposals = load_governance_data()
+    
+    if voters.empty or proposals.empty:
+        st.warning("⚠️ Governance data not available. Please check data files in governace_app/data/")
+    else:
+        st.divider()
+        
+        # Voter Lookup Section
+        st.markdown("### 🔍 Voter Lookup")
+        default_wallet = st.session_state.wallet_address if st.session_state.wallet_address else ""
+        wallet_address = st.text_input(
+            "Enter Wallet Address:",
+            value=default_wallet,
+            help="Check governance participation for a specific address",
+            key="governance_voter_lookup"
+        )
+        
+        if wallet_address:
+            # Indexed lookup on the shared dataset (no per-session copy)
+            voter_info = find_voter(dataset_version(VOTERS_CSV), wallet_address)
             
-            if wallet_address:
-                # Prepare address column
-                if "address" not in voters.columns and "voter" in voters.columns:
-                    voters = voters.copy()
-                    voters["address"] = voters["voter"].astype(str).str.strip()
+            if not voter_info.empty:
+                st.success("✅ Voter found!")
                 
-                if "address" in voters.columns:
-                    voter_info = voters[voters["address"].astype(str).str.lower() == wallet_address.lower()]
-                else:
-                    voter_info = pd.DataFrame()
+                # Extract voter data
+                voter_row = voter_info.iloc[0]
+                voter_address = str(voter_row.get("voter", wallet_address))
+                voter_name = str(voter_row.get("voter_name", "")) if pd.notna(voter_row.get("voter_name")) else ""
+                voter_type = str(voter_row.get("voter_type", "Unknown"))
+                is_active = voter_row.get("is_active", False)
+                last_vote = str(voter_row.get("last_vote_time", "N/A"))
+                total_votes = int(voter_row.get("total_votes", 0)) if pd.notna(voter_row.get("total_votes")) else 0
+                total_tokens = float(voter_row.get("total_tokens_cast", 0)) if pd.notna(voter_row.get("total_tokens_cast")) else 0
+                aye_tokens = float(voter_row.get("aye_tokens", 0)) if pd.notna(voter_row.get("aye_tokens")) else 0
+                nay_tokens = float(voter_row.get("nay_tokens", 0)) if pd.notna(voter_row.get("nay_tokens")) else 0
+                abstain_tokens = float(voter_row.get("abstain_tokens", 0)) if pd.notna(voter_row.get("abstain_tokens")) else 0
+                support_ratio = float(voter_row.get("support_ratio_pct", 0)) if pd.notna(voter_row.get("support_ratio_pct")) else 0
+                delegates = str(voter_row.get("delegates", "")) if pd.notna(voter_row.get("delegates")) else ""
                 
-                if not voter_info.empty:
-                    st.success("✅ Voter found!")
-                    
-                    # Extract voter data
-                    voter_row = voter_info.iloc[0]
-                    voter_address = str(voter_row.get("voter", wallet_address))
-                    voter_name = str(voter_row.get("voter_name", "")) if pd.notna(voter_row.get("voter_name")) else ""
-                    voter_type = str(voter_row.get("voter_type", "Unknown"))
-                    is_active = voter_row.get("is_active", False)
-                    last_vote = str(voter_row.get("last_vote_time", "N/A"))
-                    total_votes = int(voter_row.get("total_votes", 0)) if pd.notna(voter_row.get("total_votes")) else 0
-                    total_tokens = float(voter_row.get("total_tokens_cast", 0)) if pd.notna(voter_row.get("total_tokens_cast")) else 0
-                    aye_tokens = float(voter_row.get("aye_tokens", 0)) if pd.notna(voter_row.get("aye_tokens")) else 0
-                    nay_tokens = float(voter_row.get("nay_tokens", 0)) if pd.notna(voter_row.get("nay_tokens")) else 0
-                    abstain_tokens = float(voter_row.get("abstain_tokens", 0)) if pd.notna(voter_row.get("abstain_tokens")) else 0
-                    support_ratio = float(voter_row.get("support_ratio_pct", 0)) if pd.notna(voter_row.get("support_ratio_pct")) else 0
-                    delegates = str(voter_row.get("delegates", "")) if pd.notna(voter_row.get("delegates")) else ""
-                    
-                    # ===== 1. VOTER PROFILE CARD =====
-                    st.markdown("""
-                    <style>
-                        .voter-profile-card {
-                            background: linear-gradient(135deg, rgba(102, 126, 234, 0.15) 0%, rgba(118, 75, 162, 0.15) 100%);
-                            border: 2px solid rgba(102, 126, 234, 0.3);
-                            border-radius: 20px;
-                            padding: 2rem;
-                            margin: 1.5rem 0;
-                            backdrop-filter: blur(10px);
-                        }
-                        .voter-profile-header {
-                            display: flex;
-                            align-items: center;
-                            margin-bottom: 1.5rem;
-                        }
-                        .voter-avatar {
-                            width: 80px;
-                            height: 80px;
-                            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                            border-radius: 50%;
-                            display: flex;
-                            align-items: center;
-                            justify-content: center;
-                            font-size: 2.5rem;
-                            margin-right: 1.5rem;
-                            box-shadow: 0 8px 24px rgba(102, 126, 234, 0.4);
-                        }
-                        .voter-info {
-                            flex: 1;
-                        }
-                        .voter-name {
-                            font-size: 1.8rem;
-                            font-weight: 700;
-                            color: #ffffff;
-                            margin-bottom: 0.5rem;
-                        }
-                        .voter-address {
-                            font-family: 'JetBrains Mono', monospace;
-                            font-size: 0.9rem;
-                            color: #a8b2d1;
-                            background: rgba(255, 255, 255, 0.08);
-                            padding: 0.5rem 1rem;
-                            border-radius: 8px;
-                            display: inline-block;
-                            margin-bottom: 0.5rem;
-                        }
-                        .voter-badges {
-                            display: flex;
-                            gap: 0.75rem;
-                            flex-wrap: wrap;
-                            margin-top: 1rem;
-                        }
-                        .voter-badge {
-                            padding: 0.5rem 1rem;
-                            border-radius: 20px;
-                            font-size: 0.85rem;
-                            font-weight: 600;
-                            display: inline-flex;
-                            align-items: center;
-                            gap: 0.5rem;
-                        }
-                        .badge-active {
-                            background: rgba(16, 185, 129, 0.2);
-                            color: #10B981;
-                            border: 1px solid rgba(16, 185, 129, 0.5);
-                        }
-                        .badge-inactive {
-                            background: rgba(107, 114, 128, 0.2);
-                            color: #9CA3AF;
-                            border: 1px solid rgba(107, 114, 128, 0.5);
-                        }
-                        .badge-type {
-                            background: rgba(102, 126, 234, 0.2);
-                            color: #667eea;
-                            border: 1px solid rgba(102, 126, 234, 0.5);
-                        }
-                        .vote-stats-grid {
-                            display: grid;
-                            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                            gap: 1rem;
-                            margin: 1.5rem 0;
-                        }
-                        .vote-stat-card {
-                            background: rgba(255, 255, 255, 0.05);
-                            border: 1px solid rgba(255, 255, 255, 0.1);
-                            border-radius: 12px;
-                            padding: 1.5rem;
-                            text-align: center;
-                            transition: all 0.3s ease;
-                        }
-                        .vote-stat-card:hover {
-                            transform: translateY(-4px);
-                            box-shadow: 0 8px 24px rgba(102, 126, 234, 0.3);
-                            border-color: rgba(102, 126, 234, 0.4);
-                        }
-                        .vote-stat-value {
-                            font-size: 2rem;
-                            font-weight: 700;
-                            margin-bottom: 0.5rem;
-                        }
-                        .vote-stat-label {
-                            font-size: 0.875rem;
-                            color: #8892b0;
-                            text-transform: uppercase;
-                            letter-spacing: 0.5px;
-                            font-weight: 500;
-                        }
-                        .distribution-bar {
-                            width: 100%;
-                            height: 40px;
-                            background: rgba(0, 0, 0, 0.3);
-                            border-radius: 20px;
-                            overflow: hidden;
-                            display: flex;
-                            margin: 1rem 0;
-                        }
-                        .bar-segment {
-                            height: 100%;
-                            display: flex;
-                            align-items: center;
-                            justify-content: center;
-                            font-size: 0.875rem;
-                            font-weight: 600;
-                            transition: all 0.3s ease;
-                        }
-                        .bar-segment:hover {
-                            filter: brightness(1.2);
-                        }
-                        .bar-aye {
-                            background: linear-gradient(90deg, #10B981 0%, #059669 100%);
-                        }
-                        .bar-nay {
-                            background: linear-gradient(90deg, #EF4444 0%, #DC2626 100%);
-                        }
-                        .bar-abstain {
-                            background: linear-gradient(90deg, #6B7280 0%, #4B5563 100%);
-                        }
-                        .legend-item {
-                            display: flex;
-                            align-items: center;
-                            gap: 0.5rem;
-                            margin: 0.5rem 0;
-                        }
-                        .legend-color {
-                            width: 20px;
-                            height: 20px;
-                            border-radius: 4px;
-                        }
-                        .progress-circle {
-                            width: 120px;
-                            height: 120px;
-                            border-radius: 50%;
-                            background: conic-gradient(
-                                #667eea 0deg,
-                                #667eea calc(var(--progress) * 3.6deg),
-                                rgba(255, 255, 255, 0.1) calc(var(--progress) * 3.6deg),
-                                rgba(255, 255, 255, 0.1) 360deg
-                            );
-                            display: flex;
-                            align-items: center;
-                            justify-content: center;
-                            margin: 1rem auto;
-                            position: relative;
-                        }
-                        .progress-circle::before {
-                            content: '';
-                            width: 90px;
-                            height: 90px;
-                            background: #1a1a2e;
-                            border-radius: 50%;
-                            position: absolute;
-                        }
-                        .progress-value {
-                            position: relative;
-                            z-index: 1;
-                            font-size: 1.5rem;
-                            font-weight: 700;
-                            color: #667eea;
-                        }
-                    </style>
+                # ===== 1. VOTER PROFILE CARD =====
+                st.markdown("""
+                <style>
+                    .voter-profile-card {
+                        background: linear-gradient(135deg, rgba(102, 126, 234, 0.15) 0%, rgba(118, 75, 162, 0.15) 100%);
+                        border: 2px solid rgba(102, 126, 234, 0.3);
+                        border-radius: 20px;
+                        padding: 2rem;
+                        margin: 1.5rem 0;
+                        backdrop-filter: blur(10px);
+                    }
+                    .voter-profile-header {
+                        display: flex;
+                        align-items: center;
+                        margin-bottom: 1.5rem;
+                    }
+                    .voter-avatar {
+                        width: 80px;
+                        height: 80px;
+                        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                        border-radius: 50%;
+                        display: flex;
+                        align-items: center;
+                        justify-content: center;
+                        font-size: 2.5rem;
+                        margin-right: 1.5rem;
+                        box-shadow: 0 8px 24px rgba(102, 126, 234, 0.4);
+                    }
+                    .voter-info {
+                        flex: 1;
+                    }
+                    .voter-name {
+                        font-size: 1.8rem;
+                        font-weight: 700;
+                        color: #ffffff;
+                        margin-bottom: 0.5rem;
+                    }
+                    .voter-address {
+                        font-family: 'JetBrains Mono', monospace;
+                        font-size: 0.9rem;
+                        color: #a8b2d1;
+                        background: rgba(255, 255, 255, 0.08);
+                        padding: 0.5rem 1rem;
+                        border-radius: 8px;
+                        display: inline-block;
+                        margin-bottom: 0.5rem;
+                    }
+                    .voter-badges {
+                        display: flex;
+                        gap: 0.75rem;
+                        flex-wrap: wrap;
+                        margin-top: 1rem;
+                    }
+                    .voter-badge {
+                        padding: 0.5rem 1rem;
+                        border-radius: 20px;
+                        font-size: 0.85rem;
+                        font-weight: 600;
+                        display: inline-flex;
+                        align-items: center;
+                        gap: 0.5rem;
+                    }
+                    .badge-active {
+                        background: rgba(16, 185, 129, 0.2);
+                        color: #10B981;
+                        border: 1px solid rgba(16, 185, 129, 0.5);
+                    }
+                    .badge-inactive {
+                        background: rgba(107, 114, 128, 0.2);
+                        color: #9CA3AF;
+                        border: 1px solid rgba(107, 114, 128, 0.5);
+                    }
+                    .badge-type {
+                        background: rgba(102, 126, 234, 0.2);
+                        color: #667eea;
+                        border: 1px solid rgba(102, 126, 234, 0.5);
+                    }
+                    .vote-stats-grid {
+                        display: grid;
+                        grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+                        gap: 1rem;
+                        margin: 1.5rem 0;
+                    }
+                    .vote-stat-card {
+                        background: rgba(255, 255, 255, 0.05);
+                        border: 1px solid rgba(255, 255, 255, 0.1);
+                        border-radius: 12px;
+                        padding: 1.5rem;
+                        text-align: center;
+                        transition: all 0.3s ease;
+                    }
+                    .vote-stat-card:hover {
+                        transform: translateY(-4px);
+                        box-shadow: 0 8px 24px rgba(102, 126, 234, 0.3);
+                        border-color: rgba(102, 126, 234, 0.4);
+                    }
+                    .vote-stat-value {
+                        font-size: 2rem;
+                        font-weight: 700;
+                        margin-bottom: 0.5rem;
+                    }
+                    .vote-stat-label {
+                        font-size: 0.875rem;
+                        color: #8892b0;
+                        text-transform: uppercase;
+                        letter-spacing: 0.5px;
+                        font-weight: 500;
+                    }
+                    .distribution-bar {
+                        width: 100%;
+                        height: 40px;
+                        background: rgba(0, 0, 0, 0.3);
+                        border-radius: 20px;
+                        overflow: hidden;
+                        display: flex;
+                        margin: 1rem 0;
+                    }
+                    .bar-segment {
+                        height: 100%;
+                        display: flex;
+                        align-items: center;
+                        justify-content: center;
+                        font-size: 0.875rem;
+                        font-weight: 600;
+                        transition: all 0.3s ease;
+                    }
+                    .bar-segment:hover {
+                        filter: brightness(1.2);
+                    }
+                    .bar-aye {
+                        background: linear-gradient(90deg, #10B981 0%, #059669 100%);
+                    }
+                    .bar-nay {
+                        background: linear-gradient(90deg, #EF4444 0%, #DC2626 100%);
+                    }
+                    .bar-abstain {
+                        background: linear-gradient(90deg, #6B7280 0%, #4B5563 100%);
+                    }
+                    .legend-item {
+                        display: flex;
+                        align-items: center;
+                        gap: 0.5rem;
+                        margin: 0.5rem 0;
+                    }
+                    .legend-color {
+                        width: 20px;
+                        height: 20px;
+                        border-radius: 4px;
+                    }
+                    .progress-circle {
+                        width: 120px;
+                        height: 120px;
+                        border-radius: 50%;
+                        background: conic-gradient(
+                            #667eea 0deg,
+                            #667eea calc(var(--progress) * 3.6deg),
+                            rgba(255, 255, 255, 0.1) calc(var(--progress) * 3.6deg),
+                            rgba(255, 255, 255, 0.1) 360deg
+                        );
+                        display: flex;
+                        align-items: center;
+                        justify-content: center;
+                        margin: 1rem auto;
+                        position: relative;
+                    }
+                    .progress-circle::before {
+                        content: '';
+                        width: 90px;
+                        height: 90px;
+                        background: #1a1a2e;
+                        border-radius: 50%;
+                        position: absolute;
+                    }
+                    .progress-value {
+                        position: relative;
+                        z-index: 1;
+                        font-size: 1.5rem;
+                        font-weight: 700;
+                        color: #667eea;
+                    }
+                </style>
+                """, unsafe_allow_html=True)
+                
+                # Voter Profile Card HTML
+                activity_status = "Active" if is_active else "Inactive"
+                activity_badge_class = "badge-active" if is_active else "badge-inactive"
+                activity_icon = "🟢" if is_active else "⚫"
+                
+                display_name = voter_name if voter_name else "Anonymous Voter"
+                avatar_emoji = voter_name[:2] if voter_name and len(voter_name) >= 2 else "👤"
+                
+                st.markdown(f"""
+                <div class="voter-profile-card">
+                    <div class="voter-profile-header">
+                        <div class="voter-avatar">{avatar_emoji}</div>
+                        <div class="voter-info">
+                            <div class="voter-name">{display_name}</div>
+                            <div class="voter-address">{voter_address[:20]}...{voter_address[-10:]}</div>
+                        </div>
+                    </div>
+                    <div class="voter-badges">
+                        <span class="voter-badge {activity_badge_class}">{activity_icon} {activity_status}</span>
+                        <span class="voter-badge badge-type">📝 {voter_type}</span>
+                        <span class="voter-badge badge-type">🕐 Last Vote: {last_vote[:10] if last_vote != 'N/A' else 'N/A'}</span>
+                    </div>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                # Add copy button for address
+                st.code(voter_address, language=None)
+                
+                st.markdown("---")
+                
+                # ===== 2. VOTING STATISTICS PANEL =====
+                st.markdown("## 📊 Voting Statistics")
+                
+                # Key metrics in cards
+                metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+                
+                with metric_col1:
+                    st.markdown(f"""
+                    <div class="vote-stat-card">
+                        <div class="vote-stat-value" style="color: #64ffda;">🗳️ {total_votes:,}</div>
+                        <div class="vote-stat-label">Total Votes Cast</div>
+                    </div>
                     """, unsafe_allow_html=True)
-                    
-                    # Voter Profile Card HTML
-                    activity_status = "Active" if is_active else "Inactive"
-                    activity_badge_class = "badge-active" if is_active else "badge-inactive"
-                    activity_icon = "🟢" if is_active else "⚫"
-                    
-                    display_name = voter_name if voter_name else "Anonymous Voter"
-                    avatar_emoji = voter_name[:2] if voter_name and len(voter_name) >= 2 else "👤"
-                    
+                
+                with metric_col2:
                     st.markdown(f"""
-                    <div class="voter-profile-card">
-                        <div class="voter-profile-header">
-                            <div class="voter-avatar">{avatar_emoji}</div>
-                            <div class="voter-info">
-                                <div class="voter-name">{display_name}</div>
-                                <div class="voter-address">{voter_address[:20]}...{voter_address[-10:]}</div>
-                            </div>
-                        </div>
-                        <div class="voter-badges">
-                            <span class="voter-badge {activity_badge_class}">{activity_icon} {activity_status}</span>
-                            <span class="voter-badge badge-type">📝 {voter_type}</span>
-                            <span class="voter-badge badge-type">🕐 Last Vote: {last_vote[:10] if last_vote != 'N/A' else 'N/A'}</span>
-                        </div>
+                    <div class="vote-stat-card">
+                        <div class="vote-stat-value" style="color: #667eea;">💎 {total_tokens:,.0f}</div>
+                        <div class="vote-stat-label">Total Tokens</div>
                     </div>
                     """, unsafe_allow_html=True)
-                    
-                    # Add copy button for address
-                    st.code(voter_address, language=None)
-                    
-                    st.markdown("---")
-                    
-                    # ===== 2. VOTING STATISTICS PANEL =====
-                    st.markdown("## 📊 Voting Statistics")
-                    
-                    # Key metrics in cards
-                    metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
-                    
-                    with metric_col1:
-                        st.markdown(f"""
-                        <div class="vote-stat-card">
-                            <div class="vote-stat-value" style="color: #64ffda;">🗳️ {total_votes:,}</div>
-                            <div class="vote-stat-label">Total Votes Cast</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with metric_col2:
+                
+                with metric_col3:
+                    st.markdown(f"""
+                    <div class="vote-stat-card">
+                        <div class="vote-stat-value" style="color: #10B981;">✅ {support_ratio:.1f}%</div>
+                        <div class="vote-stat-label">Support Ratio</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                
+                with metric_col4:
+                    if delegates:
+                        delegate_display = delegates[:20] + "..." if len(delegates) > 20 else delegates
                         st.markdown(f"""
                         <div class="vote-stat-card">
-                            <div class="vote-stat-value" style="color: #667eea;">💎 {total_tokens:,.0f}</div>
-                            <div class="vote-stat-label">Total Tokens</div>
+                            <div class="vote-stat-value" style="color: #f59e0b; font-size: 1.2rem;">🔗 {delegate_display}</div>
+                            <div class="vote-stat-label">Delegates To</div>
                         </div>
                         """, unsafe_allow_html=True)
-                    
-                    with metric_col3:
+                    else:
                         st.markdown(f"""
                         <div class="vote-stat-card">
-                            <div class="vote-stat-value" style="color: #10B981;">✅ {support_ratio:.1f}%</div>
-                            <div class="vote-stat-label">Support Ratio</div>
+                            <div class="vote-stat-value" style="color: #8892b0;">—</div>
+                            <div class="vote-stat-label">No Delegation</div>
                         </div>
                         """, unsafe_allow_html=True)
-                    
-                    with metric_col4:
-                        if delegates:
-                            delegate_display = delegates[:20] + "..." if len(delegates) > 20 else delegates
-                            st.markdown(f"""
-                            <div class="vote-stat-card">
-                                <div class="vote-stat-value" style="color: #f59e0b; font-size: 1.2rem;">🔗 {delegate_display}</div>
-                                <div class="vote-stat-label">Delegates To</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                            st.markdown(f"""
-                            <div class="vote-stat-card">
-                                <div class="vote-stat-value" style="color: #8892b0;">—</div>
-                                <div class="vote-stat-label">No Delegation</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                    
-                    st.markdown("<br>", unsafe_allow_html=True)
-                    
-                    # ===== 3. VOTE DISTRIBUTION VISUALIZATION =====
-                    st.markdown("### 🎯 Vote Distribution")
-                    
-                    # Calculate percentages
-                    total_voting_tokens = aye_tokens + nay_tokens + abstain_tokens
-                    if total_voting_tokens > 0:
-                        aye_pct = (aye_tokens / total_voting_tokens) * 100
-                        nay_pct = (nay_tokens / total_voting_tokens) * 100
-                        abstain_pct = (abstain_tokens / total_voting_tokens) * 100
-                    else:
-                        aye_pct = nay_pct = abstain_pct = 0
-                    
-                    # Distribution bar
+                
+                st.markdown("<br>", unsafe_allow_html=True)
+                
+                # ===== 3. VOTE DISTRIBUTION VISUALIZATION =====
+                st.markdown("### 🎯 Vote Distribution")
+                
+                # Calculate percentages
+                total_voting_tokens = aye_tokens + nay_tokens + abstain_tokens
+                if total_voting_tokens > 0:
+                    aye_pct = (aye_tokens / total_voting_tokens) * 100
+                    nay_pct = (nay_tokens / total_voting_tokens) * 100
+                    abstain_pct = (abstain_tokens / total_voting_tokens) * 100
+                else:
+                    aye_pct = nay_pct = abstain_pct = 0
+                
+                # Distribution bar
+                st.markdown(f"""
+                <div class="distribution-bar">
+                    <div class="bar-segment bar-aye" style="width: {aye_pct}%;" title="Aye: {aye_pct:.1f}%">
+                        {f'{aye_pct:.0f}%' if aye_pct > 10 else ''}
+                    </div>
+                    <div class="bar-segment bar-nay" style="width: {nay_pct}%;" title="Nay: {nay_pct:.1f}%">
+                        {f'{nay_pct:.0f}%' if nay_pct > 10 else ''}
+                    </div>
+                    <div class="bar-segment bar-abstain" style="width: {abstain_pct}%;" title="Abstain: {abstain_pct:.1f}%">
+                        {f'{abstain_pct:.0f}%' if abstain_pct > 10 else ''}
+                    </div>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                # Legend with detailed breakdown
+                legend_col1, legend_col2, legend_col3 = st.columns(3)
+                
+                with legend_col1:
                     st.markdown(f"""
-                    <div class="distribution-bar">
-                        <div class="bar-segment bar-aye" style="width: {aye_pct}%;" title="Aye: {aye_pct:.1f}%">
-                            {f'{aye_pct:.0f}%' if aye_pct > 10 else ''}
-                        </div>
-                        <div class="bar-segment bar-nay" style="width: {nay_pct}%;" title="Nay: {nay_pct:.1f}%">
-                            {f'{nay_pct:.0f}%' if nay_pct > 10 else ''}
-                        </div>
-                        <div class="bar-segment bar-abstain" style="width: {abstain_pct}%;" title="Abstain: {abstain_pct:.1f}%">
-                            {f'{abstain_pct:.0f}%' if abstain_pct > 10 else ''}
-                        </div>
+                    <div style="text-align: center; padding: 1rem; background: rgba(16, 185, 129, 0.1); border-radius: 12px; border: 1px solid rgba(16, 185, 129, 0.3);">
+                        <div style="font-size: 1.5rem; font-weight: 700; color: #10B981; margin-bottom: 0.5rem;">✅ Aye</div>
+                        <div style="font-size: 1.2rem; color: #64ffda;">{aye_tokens:,.0f} tokens</div>
+                        <div style="font-size: 0.875rem; color: #8892b0;">{aye_pct:.1f}% of votes</div>
                     </div>
                     """, unsafe_allow_html=True)
-                    
-                    # Legend with detailed breakdown
-                    legend_col1, legend_col2, legend_col3 = st.columns(3)
-                    
-                    with legend_col1:
-                        st.markdown(f"""
-                        <div style="text-align: center; padding: 1rem; background: rgba(16, 185, 129, 0.1); border-radius: 12px; border: 1px solid rgba(16, 185, 129, 0.3);">
-                            <div style="font-size: 1.5rem; font-weight: 700; color: #10B981; margin-bottom: 0.5rem;">✅ Aye</div>
-                            <div style="font-size: 1.2rem; color: #64ffda;">{aye_tokens:,.0f} tokens</div>
-                            <div style="font-size: 0.875rem; color: #8892b0;">{aye_pct:.1f}% of votes</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with legend_col2:
-                        st.markdown(f"""
-                        <div style="text-align: center; padding: 1rem; background: rgba(239, 68, 68, 0.1); border-radius: 12px; border: 1px solid rgba(239, 68, 68, 0.3);">
-                            <div style="font-size: 1.5rem; font-weight: 700; color: #EF4444; margin-bottom: 0.5rem;">❌ Nay</div>
-                            <div style="font-size: 1.2rem; color: #64ffda;">{nay_tokens:,.0f} tokens</div>
-                            <div style="font-size: 0.875rem; color: #8892b0;">{nay_pct:.1f}% of votes</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with legend_col3:
-                        st.markdown(f"""
-                        <div style="text-align: center; padding: 1rem; background: rgba(107, 114, 128, 0.1); border-radius: 12px; border: 1px solid rgba(107, 114, 128, 0.3);">
-                            <div style="font-size: 1.5rem; font-weight: 700; color: #6B7280; margin-bottom: 0.5rem;">⚪ Abstain</div>
-                            <div style="font-size: 1.2rem; color: #64ffda;">{abstain_tokens:,.0f} tokens</div>
-                            <div style="font-size: 0.875rem; color: #8892b0;">{abstain_pct:.1f}% of votes</div>
+                
+                with legend_col2:
+                    st.markdown(f"""
+                    <div style="text-align: center; padding: 1rem; background: rgba(239, 68, 68, 0.1); border-radius: 12px; border: 1px solid rgba(239, 68, 68, 0.3);">
+                        <div style="font-size: 1.5rem; font-weight: 700; color: #EF4444; margin-bottom: 0.5rem;">❌ Nay</div>
+                        <div style="font-size: 1.2rem; color: #64ffda;">{nay_tokens:,.0f} tokens</div>
+                        <div style="font-size: 0.875rem; color: #8892b0;">{nay_pct:.1f}% of votes</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                
+                with legend_col3:
+                    st.markdown(f"""
+                    <div style="text-align: center; padding: 1rem; background: rgba(107, 114, 128, 0.1); border-radius: 12px; border: 1px solid rgba(107, 114, 128, 0.3);">
+                        <div style="font-size: 1.5rem; font-weight: 700; color: #6B7280; margin-bottom: 0.5rem;">⚪ Abstain</div>
+                        <div style="font-size: 1.2rem; color: #64ffda;">{abstain_tokens:,.0f} tokens</div>
+                        <div style="font-size: 0.875rem; color: #8892b0;">{abstain_pct:.1f}% of votes</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                
+                st.markdown("---")
+                
+                # ===== 4. PARTICIPATION INSIGHTS =====
+                st.markdown("### 📈 Participation Insights")
+                
+                insight_col1, insight_col2 = st.columns([1, 2])
+                
+                with insight_col1:
+                    # Circular progress for support ratio
+                    st.markdown(f"""
+                    <div style="text-align: center;">
+                        <div class="progress-circle" style="--progress: {support_ratio};">
+                            <span class="progress-value">{support_ratio:.0f}%</span>
                         </div>
-                        """, unsafe_allow_html=True)
-                    
-                    st.markdown("---")
-                    
-                    # ===== 4. PARTICIPATION INSIGHTS =====
-                    st.markdown("### 📈 Participation Insights")
-                    
-                    insight_col1, insight_col2 = st.columns([1, 2])
+                        <div style="color: #a8b2d1; font-size: 0.875rem; margin-top: 0.5rem;">Support Ratio</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                
+                with insight_col2:
+                    # Key insights text
+                    if aye_pct > nay_pct:
+                        voting_tendency = f"This voter tends to support proposals ({aye_pct:.0f}% Aye votes)"
+                        tendency_color = "#10B981"
+                        tendency_icon = "✅"
+                    elif nay_pct > aye_pct:
+                        voting_tendency = f"This voter tends to oppose proposals ({nay_pct:.0f}% Nay votes)"
+                        tendency_color = "#EF4444"
+                        tendency_icon = "❌"
+                    else:
+                        voting_tendency = "This voter has a balanced voting pattern"
+                        tendency_color = "#667eea"
+                        tendency_icon = "⚖️"
                     
-                    with insight_col1:
-                        # Circular progress for support ratio
-                        st.markdown(f"""
-                        <div style="text-align: center;">
-                            <div class="progress-circle" style="--progress: {support_ratio};">
-                                <span class="progress-value">{support_ratio:.0f}%</span>
-                            </div>
-                            <div style="color: #a8b2d1; font-size: 0.875rem; margin-top: 0.5rem;">Support Ratio</div>
-                        </div>
-                        """, unsafe_allow_html=True)
+                    avg_tokens_per_vote = total_tokens / total_votes if total_votes > 0 else 0
                     
-                    with insight_col2:
-                        # Key insights text
-                        if aye_pct > nay_pct:
-                            voting_tendency = f"This voter tends to support proposals ({aye_pct:.0f}% Aye votes)"
-                            tendency_color = "#10B981"
-                            tendency_icon = "✅"
-                        elif nay_pct > aye_pct:
-                            voting_tendency = f"This voter tends to oppose proposals ({nay_pct:.0f}% Nay votes)"
-                            tendency_color = "#EF4444"
-                            tendency_icon = "❌"
-                        else:
-                            voting_tendency = "This voter has a balanced voting pattern"
-                            tendency_color = "#667eea"
-                            tendency_icon = "⚖️"
-                        
-                        avg_tokens_per_vote = total_tokens / total_votes if total_votes > 0 else 0
-                        
-                        st.markdown(f"""
-                        <div style="background: rgba(255, 255, 255, 0.05); padding: 1.5rem; border-radius: 12px; border-left: 4px solid {tendency_color};">
-                            <h4 style="color: {tendency_color}; margin-bottom: 1rem;">{tendency_icon} Voting Pattern</h4>
-                            <p style="color: #ccd6f6; font-size: 1.1rem; margin-bottom: 1rem;">{voting_tendency}</p>
-                            <ul style="color: #a8b2d1; line-height: 1.8;">
-                                <li><strong>Average tokens per vote:</strong> {avg_tokens_per_vote:,.0f} tokens</li>
-                                <li><strong>Activity status:</strong> {"🟢 Active participant" if is_active else "⚫ Inactive"}</li>
-                                <li><strong>Voter type:</strong> {voter_type}</li>
-                                {"<li><strong>Delegation:</strong> Delegates to " + delegates + "</li>" if delegates else ""}
-                            </ul>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    # ===== 5. RAW DATA (EXPANDABLE) =====
-                    with st.expander("📋 View All Raw Voter Data"):
-                        st.dataframe(voter_info, use_container_width=True)
+                    st.markdown(f"""
+                    <div style="background: rgba(255, 255, 255, 0.05); padding: 1.5rem; border-radius: 12px; border-left: 4px solid {tendency_color};">
+                        <h4 style="color: {tendency_color}; margin-bottom: 1rem;">{tendency_icon} Voting Pattern</h4>
+                        <p style="color: #ccd6f6; font-size: 1.1rem; margin-bottom: 1rem;">{voting_tendency}</p>
+                        <ul style="color: #a8b2d1; line-height: 1.8;">
+                            <li><strong>Average tokens per vote:</strong> {avg_tokens_per_vote:,.0f} tokens</li>
+                            <li><strong>Activity status:</strong> {"🟢 Active participant" if is_active else "⚫ Inactive"}</li>
+                            <li><strong>Voter type:</strong> {voter_type}</li>
+                            {"<li><strong>Delegation:</strong> Delegates to " + delegates + "</li>" if delegates else ""}
+                        </ul>
+                    </div>
+                    """, unsafe_allow_html=True)
                 
-                else:
-                    st.warning("No governance data found for this address.")
-            
-            st.divider()
-            
-            # Monthly Voters & Voting Power Charts
-            render_monthly_voters_voting_power()
-            
-            st.divider()
-            
-            # Proposals Section
-            st.markdown("### 🏛️ Recent Proposals")
-            st.dataframe(proposals.head(10), use_container_width=True, hide_index=True)
-            
-            st.markdown("### 📋 Proposal Details")
-            
-            # Prepare proposals for selection
-            top_proposals = proposals.head(20).copy()
-            if "title" not in top_proposals.columns:
-                top_proposals["title"] = ""
-            top_proposals["title"] = top_proposals["title"].fillna("").astype(str).str.strip()
-            
-            def build_display_title(row: pd.Series) -> str:
-                if row.get("title"):
-                    return str(row["title"]).strip()
-                chain = str(row.get("chain", "")).strip()
-                origin = str(row.get("origin", "")).strip()
-                ref_id = str(row.get("referenda_id", "")).strip()
-                status = str(row.get("status", "")).strip()
-                parts = []
-                if chain:
-                    parts.append(chain)
-                if origin:
-                    parts.append(origin)
-                if ref_id:
-                    parts.append(f"ID {ref_id}")
-                if status:
-                    parts.append(status)
-                label = " · ".join(parts)
-                return label if label else "(untitled)"
+                # ===== 5. DELEGATION CHAIN =====
+                graph = current_delegation_graph()
+                chain = graph.chain(voter_address)
+                if len(chain) > 1:
+                    hops = [graph.names.get(a) if isinstance(graph.names.get(a), str) and graph.names.get(a) else a for a in chain]
+                    st.info(f"🔗 **Votes end with:** {hops[-1]}  \n*Chain:* {' → '.join(hops)}")
+                
+                # ===== 6. RAW DATA (EXPANDABLE) =====
+                with st.expander("📋 View All Raw Voter Data"):
+                    st.dataframe(voter_info, use_container_width=True)
             
-            top_proposals["display_title"] = top_proposals.apply(build_display_title, axis=1)
+            else:
+                st.warning("No governance data found for this address.")
             
-            selection_index = st.selectbox(
-                "Select a proposal to explore:",
-                options=list(top_proposals.index),
-                format_func=lambda idx: str(top_proposals.loc[idx, "display_title"]),
+            # Co-voting neighbors from the precomputed vote matrix index
+            render_similar_voters(
+                CHAIN_OPTIONS.get(st.session_state.selected_chain, "polkadot"),
+                wallet_address.strip(),
+                voter_lookup(dataset_version(VOTERS_CSV))[1]
             )
-            selected_row = top_proposals.loc[selection_index]
-            
-            # Display proposal details
-            detail_col1, detail_col2, detail_col3, detail_col4 = st.columns(4)
-            with detail_col1:
-                st.metric("Referendum ID", selected_row.get("referenda_id", "N/A"))
-            with detail_col2:
-                st.metric("Status", selected_row.get("status", "N/A"))
-            with detail_col3:
-                st.metric("Chain", selected_row.get("chain", "N/A"))
-            with detail_col4:
-                st.metric("Origin", selected_row.get("origin", "N/A"))
-            
-            st.markdown(f"**Proposer:** {selected_row.get('proposed_by_name', selected_row.get('proposed_by', 'N/A'))}")
-            
-            referenda_url = selected_row.get("referenda_url", "")
-            if isinstance(referenda_url, str) and referenda_url:
-                st.markdown(f"**Links:** {referenda_url}")
-            
-            st.divider()
-            
-            # AI Summary Section
-            st.markdown("### 🤖 AI-Powered Analysis")
-            
-            if st.button("📝 Generate AI Summary of This Proposal"):
-                if client is None:
-                    st.error("⚠️ OpenAI API key not configured. AI features are disabled.")
-                else:
-                    key_columns = [
-                        c for c in [
-                            "chain", "origin", "referenda_id", "status", "title",
-                            "proposed_by_name", "proposed_by", "start_time", "end_time"
-                        ] if c in proposals.columns
-                    ]
-                    proposals_context_df = proposals[key_columns].head(25) if key_columns else proposals.head(10)
-                    proposals_context = proposals_context_df.to_dict(orient="records")
-                    
-                    prompt = f"""
-                    You are an expert on Polkadot governance.
-                    Based on the following proposal data, provide a comprehensive analysis:
-                    
-                    Proposal Details:
-                    {selected_row.to_dict()}
-                    
-                    Recent Proposals Context:
-                    {proposals_context}
-                    
-                    Please provide:
-                    1. A clear summary of what this proposal is about
-                    2. Key insights and implications
-                    3. Arguments for voting YES
-                    4. Arguments for voting NO
-                    5. Overall recommendation for voters
-                    """
-                    
-                    with st.spinner("🤖 Generating AI analysis..."):
-                        response = client.chat.completions.create(
-                            model="gpt-4o-mini",
-                            messages=[
-                                {"role": "system", "content": "You are an expert Polkadot governance analyst."},
-                                {"role": "user", "content": prompt}
-                            ],
-                            temperature=0.3,
-                            max_tokens=1000
-                        )
-                        st.success("✅ AI Analysis Complete")
-                        st.markdown(response.choices[0].message.content)
+        
+        st.divider()
+        
+        # Effective voting power after resolving delegation chains
+        render_vote_control(current_delegation_graph())
+        
+        st.divider()
+        
+        # Monthly Voters & Voting Power Charts
+        render_monthly_voters_voting_power()
+        
+        st.divider()
+        
+        # Proposals Section
+        st.markdown("### 🏛️ Recent Proposals")
+        st.dataframe(proposals.head(10), use_container_width=True, hide_index=True)
+        
+        st.markdown("### 📋 Proposal Details")
+        
+        # Prepare proposals for selection: open referenda first, then the latest ones
+        top_proposals = selectable_proposals(proposals).copy()
+        if "title" not in top_proposals.columns:
+            top_proposals["title"] = ""
+        top_proposals["title"] = top_proposals["title"].fillna("").astype(str).str.strip()
+        
+        def build_display_title(row: pd.Series) -> str:
+            if row.get("title"):
+                return str(row["title"]).strip()
+            chain = str(row.get("chain", "")).strip()
+            origin = str(row.get("origin", "")).strip()
+            ref_id = str(row.get("referenda_id", "")).strip()
+            status = str(row.get("status", "")).strip()
+            parts = []
+            if chain:
+                parts.append(chain)
+            if origin:
+                parts.append(origin)
+            if ref_id:
+                parts.append(f"ID {ref_id}")
+            if status:
+                parts.append(status)
+            label = " · ".join(parts)
+            return label if label else "(untitled)"
+        
+        top_proposals["display_title"] = top_proposals.apply(build_display_title, axis=1)
+        
+        selection_index = st.selectbox(
+            "Select a proposal to explore:",
+            options=list(top_proposals.index),
+            format_func=lambda idx: str(top_proposals.loc[idx, "display_title"]),
+        )
+        selected_row = top_proposals.loc[selection_index]
+        
+        # Display proposal details
+        detail_col1, detail_col2, detail_col3, detail_col4 = st.columns(4)
+        with detail_col1:
+            st.metric("Referendum ID", selected_row.get("referenda_id", "N/A"))
+        with detail_col2:
+            st.metric("Status", selected_row.get("status", "N/A"))
+        with detail_col3:
+            st.metric("Chain", selected_row.get("chain", "N/A"))
+        with detail_col4:
+            st.metric("Origin", selected_row.get("origin", "N/A"))
+        
+        st.markdown(f"**Proposer:** {selected_row.get('proposed_by_name', selected_row.get('proposed_by', 'N/A'))}")
+        
+        referenda_url = selected_row.get("referenda_url", "")
+        if isinstance(referenda_url, str) and referenda_url:
+            st.markdown(f"**Links:** {referenda_url}")
+        
+        st.divider()
+        
+        # AI Summary Section
+        st.markdown("### 🤖 AI-Powered Analysis")
+        
+        if st.button("📝 Generate AI Summary of This Proposal"):
+            if not api_key:
+                st.error("⚠️ OpenAI API key not configured. AI features are disabled.")
+            else:
+                with st.spinner("🤖 Generating AI analysis..."):
+                    summary, from_cache = generate_proposal_summary(openai_client(api_key), selected_row, proposals)
+                st.success("✅ AI Analysis Complete")
+                if from_cache:
+                    st.caption("⚡ Served from the summary cache")
+                st.markdown(summary)
 
-# ============================================================================
-# CHAT SIDEBAR (RIGHT COLUMN)
-# ============================================================================
-with chat_col:
+
+@st.fragment
+@timed("view.chat")
+def render_chat_panel():
+    """AI assistant chat panel"""
     st.markdown("## 💬 AI Assistant")
     st.markdown("---")
     
-    if client is None:
+    if not api_key:
         st.warning("⚠️ OpenAI API key not configured")
         st.info("Add OPENAI_API_KEY to your secrets to enable the AI assistant.")
     else:
         # Chat interface
         st.markdown("**Ask questions about your data**")
         
-        # Chat history display container
+        # Chat history display container, filled in after the input is handled
+        # so a new turn shows up without rerunning the panel
         chat_container = st.container()
         
-        with chat_container:
-            # Display chat history
-            if st.session_state.chat_messages:
-                for msg in st.session_state.chat_messages:
-                    role = msg["role"]
-                    content = msg["content"]
-                    timestamp = msg.get("timestamp", "")
-                    
-                    if role == "user":
-                        st.markdown(f"""
-                        <div class="chat-message user-message">
-                            <div class="message-content"><strong>You:</strong><br>{content}</div>
-                            <div class="message-timestamp">{timestamp}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"""
-                        <div class="chat-message assistant-message">
-                            <div class="message-content"><strong>Assistant:</strong><br>{content}</div>
-                            <div class="message-timestamp">{timestamp}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-            else:
-                st.info("👋 Start a conversation! Ask me anything about your wallet or governance data.")
-        
         # Chat input section
         st.markdown("---")
         
@@ -1332,7 +1286,8 @@ with chat_col:
         with col2:
             if st.button("🗑️ Clear"):
                 st.session_state.chat_messages = []
-                st.rerun()
+                st.session_state.chat_summary = ""
+                st.session_state.chat_summarized_upto = 0
         
         # Process chat input
         if send_button and user_input.strip():
@@ -1351,11 +1306,8 @@ with chat_col:
                     if st.session_state.current_view == "Wallet Activity":
                         # Wallet-focused assistant
                         if st.session_state.account_data_snapshot:
-                            snapshot_text = json.dumps(
-                                st.session_state.account_data_snapshot,
-                                indent=2,
-                                default=str
-                            )
+                            # Serialized once per fetch, not on every message
+                            snapshot_text = st.session_state.account_snapshot_text
                             
                             prompt = f"""
                             You are a blockchain account analyst assistant.
@@ -1379,8 +1331,8 @@ with chat_col:
                     
                     else:  # Governance Monitor
                         # Governance-focused assistant
-                        proposals = st.session_state.governance_proposals
-                        if proposals is not None and not proposals.empty:
+                        _, proposals = load_governance_data()
+                        if not proposals.empty:
                             key_columns = [
                                 c for c in [
                                     "chain", "origin", "referenda_id", "status", "title",
@@ -1408,15 +1360,21 @@ with chat_col:
                             Provide general guidance about Polkadot/Kusama governance.
                             """
                     
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {"role": "system", "content": "You are a helpful blockchain analytics assistant. Provide clear, concise answers."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.3,
-                        max_tokens=800
+                    # Recent turns verbatim + summary of older ones (current turn excluded)
+                    model_messages = build_model_messages(
+                        "You are a helpful blockchain analytics assistant. Provide clear, concise answers.",
+                        st.session_state.chat_messages[:-1],
+                        st.session_state.chat_summary,
+                        prompt,
+                        summarized_upto=st.session_state.chat_summarized_upto
                     )
+                    with span("llm.chat", model="gpt-4o-mini"):
+                        response = openai_client(api_key).chat.completions.create(
+                            model="gpt-4o-mini",
+                            messages=model_messages,
+                            temperature=0.3,
+                            max_tokens=800
+                        )
                     
                     ai_response = response.choices[0].message.content
                     
@@ -1427,11 +1385,194 @@ with chat_col:
                         "timestamp": datetime.now().strftime("%H:%M:%S")
                     })
                     
+                    # Fold turns that left the window into the summary, then cap stored history
+                    summary, summarized_upto = update_summary(
+                        openai_client(api_key),
+                        st.session_state.chat_summary,
+                        st.session_state.chat_messages,
+                        st.session_state.chat_summarized_upto
+                    )
+                    st.session_state.chat_messages, st.session_state.chat_summarized_upto = trim_history(
+                        st.session_state.chat_messages, summarized_upto
+                    )
+                    st.session_state.chat_summary = summary
+                    
                 except Exception as e:
                     st.error(f"Error generating response: {e}")
+        
+        with chat_container:
+            # Display chat history (only the latest messages are rendered)
+            if st.session_state.chat_messages:
+                hidden_count, visible_messages = visible_tail(st.session_state.chat_messages)
+                if hidden_count:
+                    st.caption(f"🕘 {hidden_count} earlier messages hidden")
+                for msg in visible_messages:
+                    role = msg["role"]
+                    content = msg["content"]
+                    timestamp = msg.get("timestamp", "")
+                    
+                    if role == "user":
+                        st.markdown(f"""
+                        <div class="chat-message user-message">
+                            <div class="message-content"><strong>You:</strong><br>{content}</div>
+                            <div class="message-timestamp">{timestamp}</div>
+                        </div>
+                        """, unsafe_allow_html=True)
+                    else:
+                        st.markdown(f"""
+                        <div class="chat-message assistant-message">
+                            <div class="message-content"><strong>Assistant:</strong><br>{content}</div>
+                            <div class="message-timestamp">{timestamp}</div>
+                        </div>
+                        """, unsafe_allow_html=True)
+            else:
+                st.info("👋 Start a conversation! Ask me anything about your wallet or governance data.")
+
+
+# ============================================================================
+# MAIN LAYOUT WITH SIDEBAR FOR CHAT
+# ============================================================================
+
+# Create two-column layout: main content + chat sidebar
+main_col, chat_col = st.columns([2.5, 1])
+
+with main_col:
+    # ========================================================================
+    # HEADER
+    # ========================================================================
+    st.title("🌐 Polkadot Analytics Dashboard")
+    st.markdown("### Professional Multi-Chain Account & Governance Analytics")
+    
+    st.divider()
+    
+    # ========================================================================
+    # WALLET INPUT - Always Visible
+    # ========================================================================
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        wallet_input = st.text_input(
+            "🔑 Enter Wallet Address:",
+            value=st.session_state.wallet_address if st.session_state.wallet_address else "15g4zgBFXtbPv2JMgf21DQZP851BeMJJqmAsE9R3MMaWea71",
+            help="Enter a valid Polkadot/Substrate address",
+            key="wallet_input_field"
+        )
+    with col2:
+        chain_selector = st.selectbox(
+            "🔗 Select Network:",
+            options=list(CHAIN_OPTIONS.keys()),
+            index=list(CHAIN_OPTIONS.keys()).index(st.session_state.selected_chain) if st.session_state.selected_chain in CHAIN_OPTIONS else 0,
+            key="chain_selector_field"
+        )
+    
+    # Fetch button
+    if st.button("🔍 Fetch Account Data", use_container_width=False):
+        if API_KEY and wallet_input:
+            chain_key = CHAIN_OPTIONS[chain_selector]
+            with st.spinner(f"Fetching data from {chain_selector}..."), \
+                    request_context(INTERACTIVE, user=st.session_state.session_id, max_wait=INTERACTIVE_MAX_WAIT):
+                try:
+                    # Fetch wallet activity data
+                    response_json = fetch_account_data(chain_key, wallet_input, API_KEY)
+                    st.session_state.response_json = response_json
+                    st.session_state.data_section = response_json.get("data", {}).get("account", {})
+                    
+                    # Fetch all related data
+                    st.session_state.transfers_df = fetch_all_transfers(chain_key, wallet_input, API_KEY)
+                    st.session_state.transfers_index = TableIndex(st.session_state.transfers_df)
+                    # Table filters/page and chart selections belong to the previous account
+                    for widget_key in [k for k in st.session_state if str(k).startswith(("transfers_table_", "balance_history_", "counterparty_", "staking_rewards_"))]:
+                        del st.session_state[widget_key]
+                    st.session_state.extrinsics_df = fetch_extrinsics(chain_key, wallet_input, API_KEY)
+                    st.session_state.extrinsics_by_module = partition_by_module(st.session_state.extrinsics_df)
+                    st.session_state.staking_df = fetch_staking_history(chain_key, wallet_input, API_KEY)
+                    st.session_state.votes_df = fetch_referenda_votes(chain_key, wallet_input, API_KEY)
+                    st.session_state.account_data_snapshot = get_full_account_snapshot(chain_key, wallet_input, API_KEY)
+                    st.session_state.account_snapshot_text = dumps_text(st.session_state.account_data_snapshot)
+                    # Cache key for everything derived from this fetch
+                    st.session_state.snapshot_version = uuid.uuid4().hex
+                    remember_transfer_history(chain_key, wallet_input)
+                    
+                    # Store wallet address and chain
+                    st.session_state.wallet_address = wallet_input
+                    st.session_state.selected_chain = chain_selector
+                    # Let the background refresh worker keep this account warm
+                    record_access(chain_key, wallet_input)
+                    
+                    st.success("✅ All data fetched successfully!")
+                    st.session_state.current_view = "Wallet Activity"
+                except Exception as e:
+                    st.error(f"❌ Error fetching data: {e}")
+        elif not API_KEY:
+            st.error("⚠️ Subscan API key not found in secrets")
+        else:
+            st.warning("Please enter a wallet address")
+    
+    st.divider()
+    
+    # ========================================================================
+    # NAVIGATION - Main View Selector
+    # ========================================================================
+    view_options = ["Ecosystem Overview", "Wallet Activity", "Governance Monitor"]
+    # Hidden timing view: open the app with ?diagnostics=1 or run with DEBUG=True
+    if st.query_params.get("diagnostics") == "1" or os.environ.get("DEBUG", "").lower() == "true":
+        view_options.append("Diagnostics")
+    view_option = st.radio(
+        "📊 Select Dashboard View:",
+        view_options,
+        index=view_options.index(st.session_state.current_view) if st.session_state.current_view in view_options else 0,
+        horizontal=True,
+        key="main_view_selector"
+    )
+    st.session_state.current_view = view_option
+    
+    st.divider()
+    
+    # ========================================================================
+    # VIEWS (fragments defined above)
+    # ========================================================================
+    if view_option == "Ecosystem Overview":
+        render_ecosystem_view()
+    
+    elif view_option == "Wallet Activity":
+        render_wallet_view()
+    
+    elif view_option == "Governance Monitor":
+        render_governance_view()
+
+    # ========================================================================
+    # DIAGNOSTICS VIEW (hidden)
+    # ========================================================================
+    elif view_option == "Diagnostics":
+        st.markdown("## 🩺 Diagnostics")
+        st.caption("Timings of Subscan requests, DataFrame transforms, chart builds and LLM calls in this server process.")
+        
+        summary = stage_summary()
+        if summary:
+            st.markdown("### ⏱️ Latency by Stage")
+            st.dataframe(
+                pd.DataFrame(summary).round(1),
+                use_container_width=True,
+                hide_index=True
+            )
             
-            # Rerun to update chat display
-            st.rerun()
+            st.markdown("### 🧾 Recent Spans")
+            spans_df = pd.DataFrame(recent_spans()[-200:][::-1])
+            spans_df["at"] = pd.to_datetime(spans_df["at"], unit="s")
+            spans_df["ms"] = (spans_df.pop("seconds") * 1000).round(1)
+            st.dataframe(spans_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("No timings recorded yet. Use the other views, then come back.")
+        
+        metrics_text = render_prometheus()
+        st.download_button("⬇️ Download Prometheus metrics", metrics_text, file_name="metrics.prom")
+        with st.expander("Prometheus exposition"):
+            st.code(metrics_text, language=None)
+
+# ============================================================================
+# CHAT SIDEBAR (RIGHT COLUMN)
+# ============================================================================
+with chat_col:
+    render_chat_panel()
 
 # ============================================================================
 # FOOTER
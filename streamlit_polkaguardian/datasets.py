@@ -0,0 +1,45 @@
+# datasets.py
+"""
+Locations and version fingerprints for the local governance datasets.
+Anything that caches results derived from these files should key on
+dataset_version() so a refreshed CSV invalidates stale entries.
+"""
+import hashlib
+import os
+
+DATA_DIR = os.path.join("governace_app", "data")
+
+VOTERS_CSV = os.path.join(DATA_DIR, "polkadot_voters.csv")
+PROPOSALS_CSV = os.path.join(DATA_DIR, "proposals.csv")
+MONTHLY_VOTERS_CSV = os.path.join(DATA_DIR, "monthly_voters_voting_power_by_type.csv")
+REFERENDA_OUTCOME_CSV = os.path.join(DATA_DIR, "polkadot_number_of_referenda_by_outcome_opengov.csv")
+ECOSYSTEM_METRICS_CSV = os.path.join(DATA_DIR, "polkadot_ecosystem_metrics_raw_data.csv")
+TREASURY_FLOW_CSV = os.path.join(DATA_DIR, "polkadot_treasury_flow.csv")
+# Chain/month-partitioned Parquet copy of the ecosystem metrics (see ecosystem_store.py)
+ECOSYSTEM_METRICS_DIR = os.environ.get("ECOSYSTEM_METRICS_DIR", os.path.join(DATA_DIR, "ecosystem_metrics"))
+
+# Persistent caches shared by every session/worker on this host
+CACHE_DIR = os.environ.get("POLKAGUARDIAN_CACHE_DIR", ".cache")
+
+
+def cache_path(name):
+    """
+    Path inside CACHE_DIR, creating the directory on first use.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, name)
+
+
+def dataset_version(*paths):
+    """
+    Cheap fingerprint of one or more data files (size + mtime).
+    Missing files hash as absent, so the version changes once they appear.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except OSError:
+            digest.update(f"{path}:missing;".encode())
+    return digest.hexdigest()[:16]
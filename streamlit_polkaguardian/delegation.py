@@ -0,0 +1,265 @@
+# delegation.py
+"""
+Transitive resolution of OpenGov delegations into effective voting power.
+
+Delegations come from two places:
+  - the voters dataset, whose free-text `delegates` column names each
+    delegator's delegates (identity names or shortened addresses such as
+    "13z9...rwhT"). The dataset has no tracks or convictions, so these count
+    as 1x on every track and the delegator's tokens are split evenly
+  - account snapshots (`delegate.conviction_delegate`), which carry the
+    exact amount, conviction and track
+
+Votes follow delegation chains (A -> B -> C ends with C) as sparse matrix
+products, one hop per step. Delegation cycles are found up front with
+strongly connected components; votes that enter a cycle stay with the cycle
+member they reached, so resolution always terminates.
+
+    graph = DelegationGraph.from_voters(voters_df)
+    graph.add_snapshot(address, data_section, decimals)
+    control = graph.resolve()   # one row per (track, controller)
+"""
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from instrumentation import span
+
+ALL_TRACKS = "All tracks"
+
+# Vote multiplier per conviction (lock periods 0-6)
+CONVICTION_MULTIPLIERS = {
+    "none": 0.1,
+    "locked1x": 1, "locked2x": 2, "locked3x": 3,
+    "locked4x": 4, "locked5x": 5, "locked6x": 6,
+}
+
+_SHORT_ADDRESS = re.compile(r"^\w{4}\.\.\.\w{4}$")
+
+EDGE_COLUMNS = ["delegator", "delegate", "track", "amount", "conviction", "votes"]
+
+
+def conviction_multiplier(conviction):
+    """
+    Multiplier for "Locked3x" / "None" / "3" / "0.1" style convictions
+    (0 is the None conviction). Unknown values count as 1x.
+    """
+    if conviction is None:
+        return 1.0
+    text = str(conviction).strip().lower()
+    if text in CONVICTION_MULTIPLIERS:
+        return float(CONVICTION_MULTIPLIERS[text])
+    try:
+        value = float(text)
+    except ValueError:
+        return 1.0
+    return 0.1 if value == 0 else value
+
+
+def short_address(address):
+    """
+    Shortened form used by the voters dataset ("13z9...rwhT").
+    """
+    return f"{address[:4]}...{address[-4:]}"
+
+
+def snapshot_delegations(address, data_section, decimals):
+    """
+    Delegation edges of one account from its Subscan account data
+    (`delegate.conviction_delegate`), amounts scaled by the token decimals.
+    """
+    entries = ((data_section or {}).get("delegate") or {}).get("conviction_delegate") or []
+    rows = []
+    for entry in entries:
+        delegate = entry.get("delegate_account") or {}
+        amount = int(entry.get("amount") or 0) / 10**decimals
+        multiplier = conviction_multiplier(entry.get("conviction"))
+        votes = entry.get("votes")
+        rows.append({
+            "delegator": address,
+            "delegate": delegate.get("address", "N/A"),
+            "delegate_display": (delegate.get("people") or {}).get("display", "N/A"),
+            "track": str(entry.get("origins") or entry.get("track") or ALL_TRACKS),
+            "amount": amount,
+            "conviction": entry.get("conviction", "N/A"),
+            "votes": int(votes) / 10**decimals if votes is not None else amount * multiplier,
+        })
+    return pd.DataFrame(rows, columns=EDGE_COLUMNS + ["delegate_display"])
+
+
+class DelegationGraph:
+    """
+    Delegation edges plus each account's direct voting power and name.
+    """
+
+    def __init__(self, edges, direct, names):
+        self.edges = edges
+        self.direct = direct
+        self.names = names
+        self._control = None
+
+    @classmethod
+    def from_voters(cls, voters):
+        """
+        Parse the voters dataset. Delegate references are matched to voter
+        names first, then to shortened addresses; unmatched references stay
+        as their own (name-only) nodes.
+        """
+        if voters.empty or "voter" not in voters.columns:
+            return cls(pd.DataFrame(columns=EDGE_COLUMNS), pd.Series(dtype=float), {})
+
+        voters = voters.dropna(subset=["voter"])
+        tokens = pd.to_numeric(voters.get("total_tokens_cast"), errors="coerce").fillna(0)
+        addresses = voters["voter"].astype(str)
+        names = dict(zip(addresses, voters.get("voter_name", pd.Series(index=voters.index, dtype=object))))
+
+        # Reference -> address lookups; the largest voter wins duplicate names
+        by_size = voters.assign(_tokens=tokens).sort_values("_tokens", ascending=False)
+        by_name = {}
+        for address, name in zip(by_size["voter"].astype(str), by_size.get("voter_name", [])):
+            if isinstance(name, str) and name.strip():
+                by_name.setdefault(name.strip(), address)
+        shorts = addresses.map(short_address)
+        unique_shorts = shorts[~shorts.duplicated(keep=False)]
+        by_short = dict(zip(unique_shorts, addresses[unique_shorts.index]))
+
+        def resolve(reference):
+            reference = reference.strip()
+            if reference in by_name:
+                return by_name[reference]
+            if _SHORT_ADDRESS.match(reference):
+                return by_short.get(reference, reference)
+            return reference
+
+        delegates = voters["delegates"] if "delegates" in voters.columns else pd.Series(index=voters.index, dtype=object)
+        has_delegates = delegates.notna() & (delegates.astype(str).str.strip() != "")
+
+        rows = []
+        for address, text, amount in zip(addresses[has_delegates], delegates[has_delegates].astype(str), tokens[has_delegates]):
+            # Names may contain ", " themselves: try the whole string first
+            references = [text] if text.strip() in by_name else [r for r in text.split(", ") if r.strip()]
+            share = amount / len(references)
+            for reference in references:
+                rows.append((address, resolve(reference), ALL_TRACKS, share, "N/A", share))
+
+        edges = pd.DataFrame(rows, columns=EDGE_COLUMNS)
+        direct = pd.Series(np.where(has_delegates, 0.0, tokens), index=addresses).groupby(level=0).sum()
+        return cls(edges, direct, names)
+
+    def add_snapshot(self, address, data_section, decimals):
+        """
+        Replace the dataset's delegations of `address` with the exact ones
+        from its account snapshot.
+        """
+        snapshot = snapshot_delegations(address, data_section, decimals)
+        if snapshot.empty:
+            return self
+        edges = self.edges[self.edges["delegator"] != address]
+        self.edges = pd.concat([edges, snapshot[EDGE_COLUMNS]], ignore_index=True)
+        for delegate, display in zip(snapshot["delegate"], snapshot["delegate_display"]):
+            self.names.setdefault(delegate, display)
+        self._control = None
+        return self
+
+    def tracks(self):
+        return [ALL_TRACKS] + sorted(t for t in self.edges["track"].unique() if t != ALL_TRACKS)
+
+    def _track_edges(self, track):
+        # Dataset delegations have no track, so they apply to every track
+        return self.edges[self.edges["track"].isin({ALL_TRACKS, track})]
+
+    def resolve_track(self, track=ALL_TRACKS):
+        """
+        One row per account that ends up voting with delegated power on
+        `track`: direct votes, delegated votes reaching it through any chain,
+        and its share of all effective votes.
+        """
+        edges = self._track_edges(track)
+        nodes = pd.Index(pd.unique(np.concatenate([
+            self.direct.index.to_numpy(dtype=object),
+            edges["delegator"].to_numpy(dtype=object),
+            edges["delegate"].to_numpy(dtype=object),
+        ])))
+        n = len(nodes)
+        src = nodes.get_indexer(edges["delegator"])
+        dst = nodes.get_indexer(edges["delegate"])
+        votes = edges["votes"].to_numpy(dtype=float)
+
+        direct = np.zeros(n)
+        direct[nodes.get_indexer(self.direct.index)] = self.direct.to_numpy(dtype=float)
+        # Listing yourself as a delegate is just voting directly
+        loops = src == dst
+        np.add.at(direct, src[loops], votes[loops])
+        src, dst, votes = src[~loops], dst[~loops], votes[~loops]
+
+        flow_matrix = sparse.csr_matrix((votes, (src, dst)), shape=(n, n))
+        # Votes entering a delegation cycle stay where they entered it
+        n_components, component = connected_components(flow_matrix, directed=True, connection="strong")
+        in_cycle = np.bincount(component, minlength=n_components)[component] > 1
+
+        out_votes = np.asarray(flow_matrix.sum(axis=1)).ravel()
+        passes_on = (out_votes > 0) & ~in_cycle
+        # Share of what a delegate receives that it passes to each of its own delegates
+        shares = sparse.diags(np.divide(1.0, out_votes, out=np.zeros(n), where=passes_on)) @ flow_matrix
+
+        delegated = np.zeros(n)
+        flow = np.asarray(flow_matrix.sum(axis=0)).ravel()  # first hop
+        for _ in range(n):
+            delegated += np.where(passes_on, 0.0, flow)
+            flow = shares.T @ np.where(passes_on, flow, 0.0)
+            if flow.sum() <= 1e-9:
+                break
+
+        direct_delegators = np.bincount(dst, minlength=n)
+        effective = direct + delegated
+        keep = (delegated > 0) | (direct > 0)
+        total = effective[keep].sum() or 1.0
+        result = pd.DataFrame({
+            "track": track,
+            "controller": nodes[keep],
+            "name": [self.names.get(a) if isinstance(self.names.get(a), str) else "" for a in nodes[keep]],
+            "direct_votes": direct[keep],
+            "delegated_votes": delegated[keep],
+            "effective_votes": effective[keep],
+            "direct_delegators": direct_delegators[keep],
+            "share_pct": effective[keep] / total * 100,
+            "in_cycle": in_cycle[keep],
+        })
+        return result.sort_values("effective_votes", ascending=False).reset_index(drop=True)
+
+    def resolve(self):
+        """
+        resolve_track() for every track, concatenated. Computed once and
+        reused until the edges change.
+        """
+        if self._control is None:
+            with span("transform.delegation_resolve", rows=len(self.edges)):
+                self._control = pd.concat([self.resolve_track(t) for t in self.tracks()], ignore_index=True)
+        return self._control
+
+    def majority_size(self, track=ALL_TRACKS):
+        """
+        Fewest controllers whose effective votes together exceed half.
+        """
+        shares = self.resolve().query("track == @track")["share_pct"].to_numpy()
+        return int(np.searchsorted(np.cumsum(shares), 50.0, side="right") + 1) if len(shares) else 0
+
+    def chain(self, address, track=ALL_TRACKS, max_hops=32):
+        """
+        Delegation chain from `address`, following the largest delegation
+        at each hop and stopping at the first repeated account.
+        """
+        edges = self._track_edges(track)
+        largest = edges.sort_values("votes", ascending=False).drop_duplicates("delegator")
+        next_hop = dict(zip(largest["delegator"], largest["delegate"]))
+        path = [address]
+        while path[-1] in next_hop and len(path) <= max_hops:
+            following = next_hop[path[-1]]
+            if following in path:
+                path.append(following)  # cycle: show where it closes
+                break
+            path.append(following)
+        return path
@@ -0,0 +1,233 @@
+# ecosystem_store.py
+"""
+Ecosystem metrics stored as Parquet partitioned by chain and month:
+
+    <root>/chain=Astar/month=2025-07/<first day>_<last day>.parquet
+
+Each file holds one row per (chain, day) with the metric columns. Reads go
+through a pyarrow dataset with the chain, month and day range pushed down,
+so one chain or a date range only opens the matching partitions (and row
+groups), however long the history or many the parachains. Appending days
+writes one small file per chain and month they touch; `compact` merges a
+partition's files into one. Where files overlap, the later file (by name,
+compacted files sort first) wins.
+
+The flat CSV export (one row per chain, day and metric) is imported once;
+the dashboard does this on first use when the store is missing.
+
+    python ecosystem_store.py import
+    python ecosystem_store.py append new_days.csv
+    python ecosystem_store.py compact
+    python ecosystem_store.py query --chain Astar --from 2025-06-01 --to 2025-07-01
+"""
+import argparse
+import glob
+import os
+import time
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from datasets import ECOSYSTEM_METRICS_CSV, ECOSYSTEM_METRICS_DIR
+from instrumentation import span
+
+METRIC_COLUMNS = ["active_cnt", "events_cnt", "extrinsics_cnt", "transfers_cnt", "union_cnt"]
+PARTITIONING = ds.partitioning(pa.schema([("chain", pa.string()), ("month", pa.string())]), flavor="hive")
+FILE_SCHEMA = pa.schema(
+    [("block_time", pa.timestamp("ns", tz="UTC"))] + [(c, pa.float64()) for c in METRIC_COLUMNS]
+)
+COMPACTED = "0-compacted.parquet"
+VERSION_FILE = "_version"
+
+
+def has_store(root=ECOSYSTEM_METRICS_DIR):
+    return os.path.exists(os.path.join(root, VERSION_FILE))
+
+
+def version_path(root=ECOSYSTEM_METRICS_DIR):
+    """
+    File touched on every write, so dataset_version() of it changes
+    whenever the store does (the directory's own mtime does not).
+    """
+    return os.path.join(root, VERSION_FILE)
+
+
+def _touch(root):
+    with open(version_path(root), "w") as f:
+        f.write(str(time.time_ns()))
+
+
+def daily_rows(df):
+    """
+    One row per (chain, day) with every metric column: the raw export has
+    a separate row per metric, so rows collapse to each metric's first
+    non-null value.
+    """
+    df = df.copy()
+    df["block_time"] = pd.to_datetime(df["block_time"], utc=True)
+    if "chain" not in df.columns:
+        df["chain"] = "Polkadot"
+    for col in METRIC_COLUMNS:
+        if col not in df.columns:
+            df[col] = float("nan")
+    daily = df.groupby(["chain", "block_time"], sort=True)[METRIC_COLUMNS].first().reset_index()
+    daily[METRIC_COLUMNS] = daily[METRIC_COLUMNS].astype(float)
+    return daily
+
+
+def _partition_dir(root, chain, month):
+    return os.path.join(root, f"chain={quote(chain, safe='')}", f"month={month}")
+
+
+def _write(path, rows):
+    # Dot-prefixed temp name: dataset discovery skips it until it is swapped in
+    tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    table = pa.Table.from_pandas(rows[FILE_SCHEMA.names], schema=FILE_SCHEMA, preserve_index=False)
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+
+
+def append(df, root=ECOSYSTEM_METRICS_DIR):
+    """
+    Add the days in `df` (raw export or daily rows): one file per chain
+    and month touched, named by its day range. Returns the files written.
+    """
+    daily = daily_rows(df)
+    months = daily["block_time"].dt.strftime("%Y-%m")
+    written = []
+    with span("transform.ecosystem_store_append", rows=len(daily)):
+        for (chain, month), rows in daily.groupby([daily["chain"], months], sort=False):
+            directory = _partition_dir(root, chain, month)
+            os.makedirs(directory, exist_ok=True)
+            days = rows["block_time"].dt.strftime("%Y-%m-%d")
+            name = days.iloc[0] if days.nunique() == 1 else f"{days.min()}_{days.max()}"
+            path = os.path.join(directory, f"{name}.parquet")
+            _write(path, rows.sort_values("block_time"))
+            written.append(path)
+    if written:
+        _touch(root)
+    return written
+
+
+def import_csv(csv_path=ECOSYSTEM_METRICS_CSV, root=ECOSYSTEM_METRICS_DIR):
+    """
+    (Re)build the store from the flat CSV export, one compacted file per
+    chain and month.
+    """
+    daily = daily_rows(pd.read_csv(csv_path))
+    months = daily["block_time"].dt.strftime("%Y-%m")
+    for (chain, month), rows in daily.groupby([daily["chain"], months], sort=False):
+        directory = _partition_dir(root, chain, month)
+        os.makedirs(directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(directory, "*.parquet")):
+            os.remove(stale)
+        _write(os.path.join(directory, COMPACTED), rows)
+    _touch(root)
+    return len(daily)
+
+
+def compact(root=ECOSYSTEM_METRICS_DIR):
+    """
+    Merge each partition with several files into one. Returns the number
+    of partitions compacted.
+    """
+    compacted = 0
+    for directory in sorted(glob.glob(os.path.join(root, "chain=*", "month=*"))):
+        files = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+        if len(files) < 2:
+            continue
+        rows = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+        rows = rows.drop_duplicates("block_time", keep="last").sort_values("block_time")
+        _write(os.path.join(directory, COMPACTED), rows)
+        for f in files:
+            if os.path.basename(f) != COMPACTED:
+                os.remove(f)
+        compacted += 1
+    if compacted:
+        _touch(root)
+    return compacted
+
+
+def chains(root=ECOSYSTEM_METRICS_DIR):
+    """
+    Chains in the store, from the partition directory names (no data read).
+    """
+    names = (os.path.basename(p).split("=", 1)[1] for p in glob.glob(os.path.join(root, "chain=*")))
+    return sorted(unquote(name) for name in names)
+
+
+def _utc(value):
+    value = pd.Timestamp(value)
+    return value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")
+
+
+def read(chains=None, start=None, end=None, columns=None, root=ECOSYSTEM_METRICS_DIR):
+    """
+    Daily rows of `chains` (all when None) with block_time in [start, end),
+    sorted by day. Only partitions of those chains and months are opened.
+    """
+    start = _utc(start) if start is not None else None
+    end = _utc(end) if end is not None else None
+    # Partition pruning happens while listing: only the chains' and months' directories are visited
+    chain_dirs = ["chain=*"] if chains is None else [f"chain={glob.escape(quote(str(c), safe=''))}" for c in chains]
+    files = []
+    for chain_dir in chain_dirs:
+        for month_dir in glob.glob(os.path.join(root, chain_dir, "month=*")):
+            month = os.path.basename(month_dir).split("=", 1)[1]
+            if (start is None or month >= start.strftime("%Y-%m")) and (end is None or month <= end.strftime("%Y-%m")):
+                files.extend(glob.glob(os.path.join(month_dir, "*.parquet")))
+    if not files:
+        return pd.DataFrame(columns=["chain", "block_time"] + METRIC_COLUMNS)
+
+    # Day bounds are pushed down to the row groups
+    condition = None
+    if start is not None:
+        condition = ds.field("block_time") >= pa.scalar(start.to_pydatetime(), pa.timestamp("ns", tz="UTC"))
+    if end is not None:
+        upper = ds.field("block_time") < pa.scalar(end.to_pydatetime(), pa.timestamp("ns", tz="UTC"))
+        condition = upper if condition is None else condition & upper
+    # Sorted paths: within a partition, later appends come last
+    dataset = ds.dataset(sorted(files), format="parquet", partitioning=PARTITIONING, partition_base_dir=root)
+
+    names = ["chain", "block_time"] + [c for c in (columns or METRIC_COLUMNS) if c in METRIC_COLUMNS]
+    with span("transform.ecosystem_store_read", chains=len(chains) if chains is not None else "all"):
+        df = dataset.to_table(columns=names, filter=condition).to_pandas()
+        df = df.drop_duplicates(["chain", "block_time"], keep="last")
+    return df.sort_values(["block_time", "chain"], kind="stable", ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned ecosystem metrics store.")
+    parser.add_argument("--root", default=ECOSYSTEM_METRICS_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    import_cmd = sub.add_parser("import", help="Rebuild the store from the flat CSV export")
+    import_cmd.add_argument("--csv", default=ECOSYSTEM_METRICS_CSV)
+    append_cmd = sub.add_parser("append", help="Add days from a CSV in the export's columns")
+    append_cmd.add_argument("csv")
+    sub.add_parser("compact", help="Merge each partition's files into one")
+    query_cmd = sub.add_parser("query", help="Read a chain and/or date range")
+    query_cmd.add_argument("--chain", action="append", help="Repeat for several chains (default: all)")
+    query_cmd.add_argument("--from", dest="start")
+    query_cmd.add_argument("--to", dest="end", help="Exclusive")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        rows = import_csv(args.csv, args.root)
+        print(f"Imported {rows:,} chain-days from {args.csv} into {args.root}")
+    elif args.command == "append":
+        written = append(pd.read_csv(args.csv), args.root)
+        print(f"Wrote {len(written)} file(s): {', '.join(written)}")
+    elif args.command == "compact":
+        print(f"Compacted {compact(args.root)} partition(s)")
+    else:
+        start = time.perf_counter()
+        df = read(args.chain, args.start, args.end, root=args.root)
+        print(df.to_string(index=False, max_rows=40))
+        print(f"({len(df):,} rows in {(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
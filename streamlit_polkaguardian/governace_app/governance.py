@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-from openai import OpenAI
 import os
 
 # ------------- SETUP ----------------
@@ -15,15 +14,25 @@ if not api_key:
     except Exception:
         api_key = None
 
-client = OpenAI(api_key=api_key) if api_key else None
-if client is None:
+@st.cache_resource(show_spinner=False)
+def openai_client(api_key):
+    # Created on first use and shared across sessions; the SDK is only imported here
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
+
+if not api_key:
     st.warning("OPENAI_API_KEY is not set. Add it to your environment or to .streamlit/secrets.toml as OPENAI_API_KEY to enable AI features.")
 
 # ------------- LOAD DATA ----------------
-@st.cache_data
+# Loaded once per process and shared by every session (st.cache_data would
+# hand each session its own copy), so never modify these frames in place
+@st.cache_resource
 def load_data():
     voters = pd.read_csv("data/polkadot_voters.csv")
     proposals = pd.read_csv("data/proposals.csv")
+    # Lookup key: the 'voter' column, trimmed and lowercased
+    if "voter" in voters.columns:
+        voters["address"] = voters["voter"].astype(str).str.strip().str.lower()
     return voters, proposals
 
 voters, proposals = load_data()
@@ -32,14 +41,9 @@ voters, proposals = load_data()
 wallet_address = st.text_input("🔍 Enter Wallet Address to check details:")
 
 if wallet_address:
-    # Ensure we have an address column (alias for the 'voter' column in the CSV)
-    if "address" not in voters.columns and "voter" in voters.columns:
-        voters = voters.copy()
-        voters["address"] = voters["voter"].astype(str).str.strip()
-
     # Only attempt lookup if address column exists
     if "address" in voters.columns:
-        voter_info = voters[voters["address"].astype(str).str.lower() == wallet_address.lower()]
+        voter_info = voters[voters["address"] == wallet_address.strip().lower()]
     else:
         voter_info = pd.DataFrame()
 
@@ -383,7 +387,7 @@ else:
 st.subheader("🤖 AI Summary & Suggestions")
 
 if st.button("Generate AI Summary"):
-    if client is None:
+    if not api_key:
         st.error("AI is disabled because OPENAI_API_KEY is not set.")
     else:
         # Build a compact proposals context for the model
@@ -410,7 +414,7 @@ if st.button("Generate AI Summary"):
         Provide a short summary, insights, and potential reasoning for or against voting YES or NO.
         """
         with st.spinner("Generating summary..."):
-            response = client.chat.completions.create(
+            response = openai_client(api_key).chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}]
             )
@@ -422,7 +426,7 @@ st.subheader("💬 Ask the Governance Assistant")
 user_query = st.text_area("Ask me anything about Polkadot or Kusama governance:")
 
 if st.button("Ask"):
-    if client is None:
+    if not api_key:
         st.error("AI is disabled because OPENAI_API_KEY is not set.")
     else:
         # Build compact proposals context for the chatbot
@@ -436,7 +440,7 @@ if st.button("Ask"):
         proposals_context = proposals_context_df.to_dict(orient="records")
 
         with st.spinner("Thinking..."):
-            chat_response = client.chat.completions.create(
+            chat_response = openai_client(api_key).chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a Polkadot governance assistant helping users understand referenda, proposals, and voting."},
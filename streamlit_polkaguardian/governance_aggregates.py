@@ -0,0 +1,290 @@
+# governance_aggregates.py
+"""
+Derived governance aggregates computed from raw referendum and vote
+records, in the shape of the governance CSVs in `governace_app/data/`:
+  - monthly direct vs delegated voters, votes, tokens and voting power
+    (`monthly_voters_voting_power_by_type.csv`)
+  - referenda per outcome (`polkadot_number_of_referenda_by_outcome_opengov.csv`)
+  - per-voter totals: aye/nay/abstain tokens, ballots, support ratio,
+    delegates and activity (`polkadot_voters.csv`)
+
+Votes hold one row per ballot (voter x referendum) with the unweighted
+aye/nay/abstain tokens and the conviction multiplier; referenda hold one
+row per referendum in the `proposals.csv` columns. Every aggregate is a
+single groupby over the rows, for any chain whose records are in the
+governance store, and takes an optional time window [start, end) on the
+vote time (the submission time for referenda). Monthly aggregates can
+also be restricted to a set of months, and voter totals to a set of
+voters, so an incremental refresh only recomputes what it touched.
+
+    monthly = monthly_voting_power(votes, start="2024-01-01", end="2025-01-01")
+    counts = outcome_counts(monthly_outcomes(referenda))
+    voters = voter_totals(votes, names)
+
+    python governance_aggregates.py --chain kusama --from 2024-01-01 --to 2025-01-01 --out kusama_2024/
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from delegation import conviction_multiplier, short_address
+from instrumentation import span
+
+DIRECTIONS = ("aye", "nay", "abstain")
+VOTE_COLUMNS = ["referendum", "voter", "delegate", "conviction", *DIRECTIONS, "block_timestamp"]
+
+# Final referendum statuses, in the order of the outcome CSV
+OUTCOMES = ["Timed Out", "Rejected", "Cancelled", "Killed", "Confirmed"]
+
+# Voters whose last vote is this recent (before the window end) count as active
+ACTIVE_DAYS = 90
+
+MONTHLY_COLUMNS = [
+    "delegated_tokens", "delegated_voters", "delegated_votes", "delegated_voting_power",
+    "direct_tokens", "direct_voters", "direct_votes", "direct_voting_power",
+    "month", "referenda",
+]
+OUTCOME_COLUMNS = ["month", "status", "count"]
+CSV_TIME_FORMAT = "%Y-%m-%d %H:%M:%S.000 UTC"
+VOTER_COLUMNS = [
+    "abstain_tokens", "aye_tokens", "delegates", "is_active", "last_vote_time", "nay_tokens",
+    "support_ratio_pct", "total_tokens_cast", "total_votes", "voter", "voter_name", "voter_type",
+]
+
+
+def account_address(account):
+    """
+    Address of a Subscan account field (an {"address": ...} dict or the bare address).
+    """
+    return account.get("address") if isinstance(account, dict) else account
+
+
+def ballot(record, referendum, decimals):
+    """
+    One Subscan vote record as a votes row (a dict of VOTE_COLUMNS), or None
+    without a voter: unweighted aye/nay/abstain tokens (split votes use their
+    per-direction amounts), the conviction multiplier, and the delegate the
+    vote was cast through ("" for direct votes). Decoded records hold None
+    for a missing referendum_index; those belong to `referendum`, the one
+    the votes were fetched for.
+    """
+    voter = account_address(record.get("account"))
+    if not voter:
+        return None
+    index = record.get("referendum_index")
+    status = str(record.get("status") or "").lower()
+    amounts = dict.fromkeys(DIRECTIONS, 0.0)
+    if status in DIRECTIONS:
+        amounts[status] = float(record.get("amount") or 0) / 10**decimals
+    else:  # Split / SplitAbstain
+        for direction in DIRECTIONS:
+            amounts[direction] = float(record.get(f"{direction}_amount") or 0) / 10**decimals
+    return {
+        "referendum": int(referendum if index is None else index),
+        "voter": voter,
+        "delegate": account_address(record.get("delegate_account")) or "",
+        "conviction": conviction_multiplier(record.get("conviction")),
+        **amounts,
+        "block_timestamp": int(record.get("block_timestamp") or 0),
+    }
+
+
+def month_start(values):
+    """
+    UTC start of the calendar month of datetimes or unix-second timestamps.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        seconds = np.asarray(values, dtype=np.int64).astype("datetime64[s]")
+    else:
+        seconds = pd.to_datetime(values, utc=True).dt.tz_localize(None).to_numpy(dtype="datetime64[s]")
+    months = pd.DatetimeIndex(seconds.astype("datetime64[M]").astype("datetime64[ns]")).tz_localize("UTC")
+    return pd.Series(months, index=values.index)
+
+
+def csv_time(values):
+    """
+    Datetimes in the governance CSVs' "2025-03-01 00:00:00.000 UTC" format.
+    """
+    return pd.to_datetime(values, utc=True).dt.strftime(CSV_TIME_FORMAT)
+
+
+def _utc(value):
+    value = pd.Timestamp(value)
+    return value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")
+
+
+def in_window(times, start=None, end=None):
+    """
+    Mask of `times` (datetimes or unix seconds) within [start, end);
+    either bound may be None.
+    """
+    keep = np.ones(len(times), dtype=bool)
+    if start is None and end is None:
+        return keep
+    if pd.api.types.is_numeric_dtype(times):
+        seconds = times.to_numpy(dtype=np.int64)
+        if start is not None:
+            keep &= seconds >= _utc(start).timestamp()
+        if end is not None:
+            keep &= seconds < _utc(end).timestamp()
+        return keep
+    times = pd.to_datetime(times, utc=True)
+    if start is not None:
+        keep &= (times >= _utc(start)).to_numpy()
+    if end is not None:
+        keep &= (times < _utc(end)).to_numpy()
+    return keep
+
+
+def _in_months(month, months):
+    if months is None:
+        return np.ones(len(month), dtype=bool)
+    return month.isin(pd.DatetimeIndex(list(months))).to_numpy()
+
+
+def monthly_voting_power(votes, months=None, start=None, end=None):
+    """
+    Per month of the vote: distinct voters, ballots, tokens and
+    conviction-weighted voting power of direct and of delegated votes,
+    plus the number of referenda voted on. Only `months` (month starts)
+    and votes in [start, end) are counted when given.
+    """
+    if votes.empty:
+        return pd.DataFrame(columns=MONTHLY_COLUMNS)
+
+    with span("transform.governance_monthly", rows=len(votes)):
+        votes = votes[in_window(votes["block_timestamp"], start, end)]
+        month = month_start(votes["block_timestamp"])
+        keep = _in_months(month, months)
+        votes, month = votes[keep], month[keep]
+        if votes.empty:
+            return pd.DataFrame(columns=MONTHLY_COLUMNS)
+        tokens = votes[list(DIRECTIONS)].sum(axis=1)
+        ballots = pd.DataFrame({
+            "month": month,
+            "kind": np.where(votes["delegate"].fillna("").astype(bool), "delegated", "direct"),
+            "voter": votes["voter"],
+            "tokens": tokens,
+            "voting_power": tokens * votes["conviction"],
+        })
+        by_kind = ballots.groupby(["month", "kind"]).agg(
+            tokens=("tokens", "sum"),
+            voters=("voter", "nunique"),
+            votes=("voter", "size"),
+            voting_power=("voting_power", "sum"),
+        ).unstack("kind", fill_value=0)
+        by_kind = by_kind.reindex(
+            columns=pd.MultiIndex.from_product([by_kind.columns.levels[0], ["delegated", "direct"]]), fill_value=0
+        )
+        by_kind.columns = [f"{kind}_{name}" for name, kind in by_kind.columns]
+        by_kind["referenda"] = votes.groupby(month)["referendum"].nunique()
+    return by_kind.rename_axis("month").reset_index()[MONTHLY_COLUMNS]
+
+
+def monthly_outcomes(referenda, months=None, start=None, end=None):
+    """
+    Referenda with a final outcome per (month submitted, status). Only
+    `months` and referenda submitted in [start, end) are counted when given.
+    """
+    if referenda.empty:
+        return pd.DataFrame(columns=OUTCOME_COLUMNS)
+
+    month = month_start(referenda["start_time"])
+    final = (
+        referenda["status"].isin(OUTCOMES).to_numpy()
+        & _in_months(month, months)
+        & in_window(referenda["start_time"], start, end)
+    )
+    counts = pd.DataFrame({"month": month[final], "status": referenda["status"][final]})
+    return counts.groupby(["month", "status"]).size().rename("count").reset_index()[OUTCOME_COLUMNS]
+
+
+def outcome_counts(outcomes):
+    """
+    Referenda per outcome over all months of `monthly_outcomes`, in the
+    outcome CSV's status/count layout (statuses never reached are left out).
+    """
+    counts = outcomes.groupby("status")["count"].sum().reindex(OUTCOMES).dropna()
+    return counts.astype(np.int64).rename_axis("status").reset_index()
+
+
+def voter_totals(votes, names=None, voters=None, start=None, end=None, active_days=ACTIVE_DAYS):
+    """
+    One row per voter in the polkadot_voters.csv columns: tokens per
+    direction and in total, ballots, support ratio (aye share of the
+    tokens cast, %), the delegates its votes went through, last vote time
+    and whether that is within `active_days` of the window end (or of the
+    newest vote). `names` maps addresses to identity names (shortened
+    addresses otherwise); `voters` restricts the rows to those addresses.
+    """
+    if votes.empty:
+        return pd.DataFrame(columns=VOTER_COLUMNS)
+
+    with span("transform.governance_voters", rows=len(votes)):
+        votes = votes[in_window(votes["block_timestamp"], start, end)]
+        if votes.empty:
+            return pd.DataFrame(columns=VOTER_COLUMNS)
+        as_of = _utc(end).timestamp() if end is not None else votes["block_timestamp"].max()
+        if voters is not None:
+            votes = votes[votes["voter"].isin(voters)]
+        totals = votes.groupby("voter").agg(
+            aye_tokens=("aye", "sum"),
+            nay_tokens=("nay", "sum"),
+            abstain_tokens=("abstain", "sum"),
+            total_votes=("referendum", "size"),
+            last_vote=("block_timestamp", "max"),
+        )
+        totals["total_tokens_cast"] = totals[["aye_tokens", "nay_tokens", "abstain_tokens"]].sum(axis=1)
+        totals["support_ratio_pct"] = (
+            totals["aye_tokens"] / totals["total_tokens_cast"].where(totals["total_tokens_cast"] > 0) * 100
+        ).round(2)
+
+        names = pd.Series(dtype=object) if names is None else names
+        delegated = votes[votes["delegate"].fillna("").astype(bool)].drop_duplicates(["voter", "delegate"])
+        delegate_names = delegated["delegate"].map(names).fillna(delegated["delegate"].map(short_address))
+        totals["delegates"] = delegate_names.groupby(delegated["voter"].to_numpy()).agg(", ".join)
+        totals["voter_type"] = np.where(totals["delegates"].notna(), "Delegator (or Mixed)", "Direct Voter")
+
+        totals["is_active"] = totals["last_vote"] >= as_of - active_days * 86400
+        totals["last_vote_time"] = pd.to_datetime(totals["last_vote"], unit="s", utc=True)
+        totals = totals.reset_index()
+        totals["voter_name"] = totals["voter"].map(names).fillna(totals["voter"].map(short_address))
+    return totals.sort_values("total_votes", ascending=False, kind="stable", ignore_index=True)[VOTER_COLUMNS]
+
+
+def main():
+    from governance_etl import CHAIN_DECIMALS, REFERENDUM_COLUMNS, load_table, store_path
+
+    parser = argparse.ArgumentParser(description="Recompute the governance aggregates from the local store.")
+    parser.add_argument("--chain", default="polkadot", choices=sorted(CHAIN_DECIMALS))
+    parser.add_argument("--from", dest="start", help="Window start (inclusive), e.g. 2024-01-01")
+    parser.add_argument("--to", dest="end", help="Window end (exclusive)")
+    parser.add_argument("--names", help="Voters CSV whose voter_name column names addresses")
+    parser.add_argument("--out", required=True, help="Directory for the aggregate CSVs")
+    args = parser.parse_args()
+
+    if not os.path.exists(store_path(args.chain, "votes")):
+        parser.error(f"No {args.chain} governance store; run governance_etl.py refresh --chain {args.chain} first")
+    votes = load_table(args.chain, "votes", VOTE_COLUMNS)
+    referenda = load_table(args.chain, "referenda", REFERENDUM_COLUMNS)
+    names = None
+    if args.names:
+        named = pd.read_csv(args.names, usecols=["voter", "voter_name"])
+        names = named.drop_duplicates("voter").set_index("voter")["voter_name"]
+
+    os.makedirs(args.out, exist_ok=True)
+    monthly = monthly_voting_power(votes, start=args.start, end=args.end)
+    monthly["month"] = csv_time(monthly["month"])
+    monthly.to_csv(os.path.join(args.out, "monthly_voters_voting_power_by_type.csv"), index=False)
+    outcomes = outcome_counts(monthly_outcomes(referenda, start=args.start, end=args.end))
+    outcomes.to_csv(os.path.join(args.out, f"{args.chain}_number_of_referenda_by_outcome_opengov.csv"), index=False)
+    voters = voter_totals(votes, names, start=args.start, end=args.end)
+    voters["last_vote_time"] = csv_time(voters["last_vote_time"])
+    voters.to_csv(os.path.join(args.out, f"{args.chain}_voters.csv"), index=False)
+    print(f"{len(monthly)} months, {int(outcomes['count'].sum())} decided referenda, {len(voters):,} voters -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+# governance_etl.py
+"""
+Incremental refresh of the governance datasets (proposals, votes, voter
+totals and the monthly aggregates) from Subscan, replacing the one-off CSV exports.
+
+A local store in CACHE_DIR holds, per chain, every referendum and every
+ballot cast on it (Parquet), the derived monthly aggregates, and the
+high-water marks of the last refresh: the highest referendum index and
+end block stored. A refresh:
+  1. pages referenda newest first, only down to the high-water mark (or
+     the oldest referendum still being decided, whose votes can change)
+  2. keeps the referenda that are new, still open, or ended past the
+     stored end block, and refetches only their votes
+  3. upserts both into the store (a referendum's votes are replaced)
+  4. recomputes the monthly aggregates and outcome counts only for the
+     months those referenda and votes fall in (and voter totals only for
+     the voters in them), see governance_aggregates.py
+  5. upserts the changed rows into the CSVs the dashboard reads (outcome
+     totals only once the store holds every referendum those CSVs list)
+Referenda are processed in index order and the run stops at the first
+failed vote fetch, so the high-water marks never skip a referendum.
+
+Responses can be recorded to a fixture directory and replayed offline:
+
+    SUBSCAN_API_KEY=... python governance_etl.py refresh --chain polkadot
+    SUBSCAN_API_KEY=... python governance_etl.py refresh --chain polkadot --record fixtures/governance/live
+    python governance_etl.py refresh --chain polkadot --fixtures fixtures/governance/snapshot-1
+    python governance_etl.py status --chain polkadot
+"""
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from datasets import (
+    DATA_DIR,
+    MONTHLY_VOTERS_CSV,
+    PROPOSALS_CSV,
+    REFERENDA_OUTCOME_CSV,
+    VOTERS_CSV,
+    cache_path,
+)
+from governance_aggregates import (
+    MONTHLY_COLUMNS,
+    OUTCOME_COLUMNS,
+    OUTCOMES,
+    VOTE_COLUMNS,
+    VOTER_COLUMNS,
+    account_address,
+    ballot,
+    csv_time,
+    month_start,
+    monthly_outcomes,
+    monthly_voting_power,
+    outcome_counts,
+    voter_totals,
+)
+from json_codec import dumps, loads
+
+CHAIN_DECIMALS = {"polkadot": 10, "kusama": 12}
+
+REFERENDUM_COLUMNS = [
+    "chain", "referenda_id", "start_block_number", "start_time", "end_block", "end_time",
+    "origin", "proposed_by", "proposed_by_name", "status", "title",
+]
+
+# Subscan referendum statuses in the proposals.csv vocabulary
+STATUS_NAMES = {
+    "Submitted": "Submitted",
+    "Decision": "Decision Started",
+    "Deciding": "Decision Started",
+    "Confirm": "Confirm Started",
+    "Confirming": "Confirm Started",
+    "Approved": "Confirmed",
+    "Executed": "Confirmed",
+    "Confirmed": "Confirmed",
+    "Rejected": "Rejected",
+    "Cancelled": "Cancelled",
+    "Killed": "Killed",
+    "TimedOut": "Timed Out",
+    "Timeout": "Timed Out",
+}
+
+def store_path(chain_key, table):
+    return cache_path(f"governance_{table}_{chain_key}.parquet")
+
+
+def state_path(chain_key):
+    return cache_path(f"governance_state_{chain_key}.json")
+
+
+# ---- Sources ----
+
+class SubscanSource:
+    """
+    Live Subscan responses, optionally recorded as fixtures.
+    """
+
+    def __init__(self, api_key, record_dir=None):
+        self.api_key = api_key
+        self.record_dir = record_dir
+
+    def referenda(self, chain_key, stop_at):
+        from subscan import fetch_referenda
+
+        records = fetch_referenda(chain_key, self.api_key, stop_at=stop_at)
+        if self.record_dir:
+            _record(os.path.join(self.record_dir, chain_key, "referenda.json"), records)
+        return records
+
+    def votes(self, chain_key, referendum):
+        from subscan import fetch_referendum_votes
+
+        records = fetch_referendum_votes(chain_key, referendum, self.api_key)
+        if self.record_dir:
+            _record(os.path.join(self.record_dir, chain_key, "votes", f"{referendum}.json"), records)
+        return records
+
+
+class FixtureSource:
+    """
+    Responses recorded by SubscanSource: `<dir>/<chain>/referenda.json`
+    and `<dir>/<chain>/votes/<referendum>.json`.
+    """
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+
+    def referenda(self, chain_key, stop_at):
+        path = os.path.join(self.fixture_dir, chain_key, "referenda.json")
+        with open(path, "rb") as f:
+            return loads(f.read())
+
+    def votes(self, chain_key, referendum):
+        path = os.path.join(self.fixture_dir, chain_key, "votes", f"{referendum}.json")
+        with open(path, "rb") as f:
+            return loads(f.read())
+
+
+def _record(path, records):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(dumps(records))
+
+
+# ---- Record frames ----
+
+def referenda_frame(chain_key, records):
+    """
+    One row per referendum in the proposals.csv columns. Only referenda
+    with a final outcome have an end block and time.
+    """
+    rows = []
+    for record in records:
+        account = record.get("account")
+        people = (account.get("people") or {}) if isinstance(account, dict) else {}
+        proposer = account_address(account)
+        status = STATUS_NAMES.get(record.get("status"), record.get("status"))
+        final = status in OUTCOMES
+        rows.append((
+            chain_key.title(),
+            int(record["referendum_index"]),
+            record.get("created_block"),
+            record.get("created_block_timestamp"),
+            record.get("latest_block_num") if final else None,
+            record.get("latest_block_timestamp") if final else None,
+            record.get("origins"),
+            proposer,
+            people.get("display") or proposer,
+            status,
+            record.get("title"),
+        ))
+    df = pd.DataFrame(rows, columns=REFERENDUM_COLUMNS)
+    for col in ["start_block_number", "end_block"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+    for col in ["start_time", "end_time"]:
+        df[col] = pd.to_datetime(pd.to_numeric(df[col], errors="coerce"), unit="s", utc=True)
+    return df
+
+
+def votes_frame(records, referendum, decimals):
+    """
+    One row per ballot of the votes fetched for `referendum` (see ballot).
+    """
+    rows = [row for row in (ballot(record, referendum, decimals) for record in records) if row]
+    return pd.DataFrame(rows, columns=VOTE_COLUMNS)
+
+
+# ---- Store ----
+
+def load_table(chain_key, table, columns):
+    path = store_path(chain_key, table)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=columns)
+    return pd.read_parquet(path)
+
+
+def save_table(chain_key, table, df):
+    path = store_path(chain_key, table)
+    tmp = f"{path}.tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def load_state(chain_key):
+    """
+    High-water marks of the last refresh (-1 before the first one).
+    """
+    try:
+        with open(state_path(chain_key), "rb") as f:
+            return loads(f.read())
+    except FileNotFoundError:
+        return {"referenda_id": -1, "end_block": -1}
+
+
+def save_state(chain_key, referenda):
+    state = {
+        "referenda_id": int(referenda["referenda_id"].max()) if len(referenda) else -1,
+        "end_block": int(referenda["end_block"].max()) if referenda["end_block"].notna().any() else -1,
+        "refreshed_at": pd.Timestamp.now(tz="UTC").isoformat(),
+    }
+    tmp = f"{state_path(chain_key)}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, state_path(chain_key))
+    return state
+
+
+def _upsert(existing, new, key, affected):
+    """
+    `existing` without its rows whose `key` is in `affected`, plus `new`.
+    """
+    kept = existing[~existing[key].isin(affected)]
+    if kept.empty:
+        return new.reset_index(drop=True)
+    return pd.concat([kept, new], ignore_index=True)
+
+
+# ---- Refresh ----
+
+def changed_referenda(fetched, referenda, state):
+    """
+    Fetched referenda that are new, were still open when stored, or ended
+    past the stored end block.
+    """
+    open_ids = referenda.loc[~referenda["status"].isin(OUTCOMES), "referenda_id"]
+    changed = (
+        (fetched["referenda_id"] > state["referenda_id"])
+        | fetched["referenda_id"].isin(open_ids)
+        | (fetched["end_block"].fillna(-1) > state["end_block"])
+    )
+    return fetched[changed].sort_values("referenda_id").reset_index(drop=True)
+
+
+def refresh(chain_key, source, decimals=None, data_dir=None):
+    """
+    Bring the chain's store up to date from `source` and, with
+    `data_dir`, upsert the changes into the dashboard CSVs there.
+    Returns a summary of what changed.
+    """
+    decimals = CHAIN_DECIMALS.get(chain_key, 10) if decimals is None else decimals
+    referenda = load_table(chain_key, "referenda", REFERENDUM_COLUMNS)
+    votes = load_table(chain_key, "votes", VOTE_COLUMNS)
+    state = load_state(chain_key)
+    previous_mark = state["referenda_id"]
+
+    # Page down to the high-water mark, or further for referenda still open
+    open_ids = referenda.loc[~referenda["status"].isin(OUTCOMES), "referenda_id"]
+    stop_at = min([state["referenda_id"], *open_ids.astype(int).tolist()])
+    fetched = referenda_frame(chain_key, source.referenda(chain_key, stop_at))
+    changed = changed_referenda(fetched, referenda, state)
+
+    new_votes = []
+    for i, referendum in enumerate(changed["referenda_id"]):
+        try:
+            records = source.votes(chain_key, int(referendum))
+        except Exception as e:
+            print(f"Referendum {referendum} votes fetch failed, stopping here: {e}")
+            changed = changed.iloc[:i]
+            break
+        new_votes.append(votes_frame(records, int(referendum), decimals))
+    new_votes = pd.concat(new_votes, ignore_index=True) if new_votes else pd.DataFrame(columns=VOTE_COLUMNS)
+
+    ids = changed["referenda_id"]
+    replaced_votes = votes[votes["referendum"].isin(ids)]
+    replaced_referenda = referenda[referenda["referenda_id"].isin(ids)]
+    vote_months = set(month_start(replaced_votes["block_timestamp"])) | set(month_start(new_votes["block_timestamp"]))
+    outcome_months = set(month_start(replaced_referenda["start_time"])) | set(month_start(changed["start_time"]))
+    touched_voters = set(replaced_votes["voter"]) | set(new_votes["voter"])
+
+    votes = _upsert(votes, new_votes, "referendum", ids)
+    referenda = _upsert(referenda, changed, "referenda_id", ids).sort_values("referenda_id", ignore_index=True)
+
+    # Recompute only the affected months
+    monthly = load_table(chain_key, "monthly", MONTHLY_COLUMNS)
+    monthly_changed = monthly_voting_power(votes, vote_months)
+    monthly = _upsert(monthly, monthly_changed, "month", list(vote_months)).sort_values("month", ignore_index=True)
+    outcomes = load_table(chain_key, "outcomes", OUTCOME_COLUMNS)
+    outcomes = _upsert(outcomes, monthly_outcomes(referenda, outcome_months), "month", list(outcome_months))
+
+    if len(changed):
+        save_table(chain_key, "votes", votes)
+        save_table(chain_key, "referenda", referenda)
+        save_table(chain_key, "monthly", monthly)
+        save_table(chain_key, "outcomes", outcomes)
+        # Last, so an interrupted run is redone from the previous marks
+        state = save_state(chain_key, referenda)
+        if data_dir:
+            publish(chain_key, changed, referenda, monthly_changed, vote_months, outcomes, votes, touched_voters, data_dir)
+
+    return {
+        "referenda_fetched": len(fetched),
+        "referenda_changed": len(changed),
+        "new_referenda": int((changed["referenda_id"] > previous_mark).sum()),
+        "votes": len(new_votes),
+        "months": sorted(m.strftime("%Y-%m") for m in vote_months | outcome_months),
+        "state": state,
+    }
+
+
+# ---- Publishing ----
+
+def proposal_rows(referenda):
+    """
+    Referenda in the proposals.csv layout (times and links formatted as
+    in the original export).
+    """
+    rows = referenda.copy()
+    chain = rows["chain"].str.lower()
+    ids = rows["referenda_id"].astype(str)
+    rows["start_time"] = csv_time(rows["start_time"])
+    rows["end_time"] = csv_time(rows["end_time"])
+    rows["end_hash"] = None
+    rows["proposed_by_url"] = (
+        "<a href='https://" + chain + ".subscan.io/account/" + rows["proposed_by"].fillna("")
+        + "' target='_blank'>" + rows["proposed_by_name"].fillna("") + "</a>"
+    )
+    rows["referenda_url"] = (
+        "<a href='https://dune.com/substrate/" + chain + "-referendum?referendum_id=" + ids
+        + "' target='_blank'>" + ids + "</a> (Link:<a href='https://" + chain
+        + ".polkassembly.io/referenda/" + ids + "' target='_blank'>Polkassembly</a>)"
+    )
+    return rows
+
+
+def _line_terminator(path):
+    """
+    Line ending of an existing CSV (the original exports use CRLF), LF for a new one.
+    """
+    if not os.path.exists(path):
+        return "\n"
+    with open(path, "rb") as f:
+        return "\r\n" if f.readline().endswith(b"\r\n") else "\n"
+
+
+def _write_csv(df, path):
+    tmp = f"{path}.tmp"
+    df.to_csv(tmp, index=False, lineterminator=_line_terminator(path))
+    os.replace(tmp, path)
+
+
+def covers_history(referenda, published):
+    """
+    Whether the store holds every referendum from the first up to the newest
+    in `published` (the chain's rows of proposals.csv), so totals over the
+    store can replace the published ones. A store filled from fixtures or
+    started mid-history can't.
+    """
+    ids = referenda["referenda_id"].astype(int)
+    if ids.empty:
+        return False
+    newest = max(ids.max(), published["referenda_id"].max() if len(published) else -1)
+    return ids.min() == 0 and ids.nunique() == newest + 1
+
+
+def _target(path, data_dir):
+    return os.path.join(data_dir, os.path.basename(path))
+
+
+def publish(chain_key, changed, referenda, monthly_changed, vote_months, outcomes, votes, touched_voters, data_dir):
+    """
+    Upsert the refreshed rows into the dashboard CSVs in `data_dir`:
+    the chain's changed proposals, and (for Polkadot, which the voters,
+    monthly and outcome CSVs describe) the totals of the voters who voted
+    on the changed referenda, the recomputed months and outcome totals.
+    Voters not touched keep their row, activity flag included. The outcome
+    CSV has no months to upsert, so it is only rewritten when the store
+    covers the whole history (see covers_history).
+    """
+    path = _target(PROPOSALS_CSV, data_dir)
+    proposals = pd.read_csv(path) if os.path.exists(path) else pd.DataFrame()
+    published = proposals[proposals["chain"] == chain_key.title()] if not proposals.empty else proposals
+    rows = proposal_rows(changed)
+    if not proposals.empty:
+        stale = (proposals["chain"] == chain_key.title()) & proposals["referenda_id"].isin(changed["referenda_id"])
+        rows = pd.concat([proposals[~stale], rows[proposals.columns]], ignore_index=True)
+    _write_csv(rows.sort_values(["chain", "referenda_id"], kind="stable"), path)
+    print(f"{len(changed)} proposals upserted into {path}")
+
+    if chain_key != "polkadot":
+        return
+    path = _target(MONTHLY_VOTERS_CSV, data_dir)
+    rows = monthly_changed.copy()
+    if os.path.exists(path):
+        existing = pd.read_csv(path)
+        existing = existing[~month_start(existing["month"]).isin(pd.DatetimeIndex(list(vote_months)))]
+        rows = pd.concat([existing, rows], ignore_index=True)
+    rows["month"] = month_start(rows["month"])
+    rows = rows.sort_values("month", ignore_index=True)
+    rows["month"] = csv_time(rows["month"])
+    _write_csv(rows[MONTHLY_COLUMNS], path)
+    print(f"{len(monthly_changed)} months recomputed in {path}")
+
+    path = _target(REFERENDA_OUTCOME_CSV, data_dir)
+    if covers_history(referenda, published):
+        _write_csv(outcome_counts(outcomes), path)
+        print(f"Outcome counts written to {path}")
+    else:
+        print(f"Outcome counts not written to {path}: the store holds {len(referenda):,} referenda, "
+              f"not the full history (a live refresh into an empty store fetches it)")
+
+    path = _target(VOTERS_CSV, data_dir)
+    existing = pd.read_csv(path) if os.path.exists(path) else pd.DataFrame(columns=VOTER_COLUMNS)
+    names = existing.drop_duplicates("voter").set_index("voter")["voter_name"]
+    rows = voter_totals(votes, names, voters=touched_voters)
+    rows["last_vote_time"] = csv_time(rows["last_vote_time"])
+    rows = pd.concat([existing[~existing["voter"].isin(rows["voter"])], rows], ignore_index=True)
+    _write_csv(rows.sort_values("total_votes", ascending=False, kind="stable")[VOTER_COLUMNS], path)
+    print(f"{len(touched_voters):,} voters updated in {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally refresh the governance datasets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    refresh_cmd = sub.add_parser("refresh", help="Fetch new/changed referenda and votes and update the aggregates")
+    refresh_cmd.add_argument("--chain", default="polkadot", choices=sorted(CHAIN_DECIMALS))
+    refresh_cmd.add_argument("--fixtures", help="Replay recorded responses from this directory (offline)")
+    refresh_cmd.add_argument("--record", help="Record the live responses into this fixture directory")
+    refresh_cmd.add_argument(
+        "--data-dir",
+        help=f"Directory of the dashboard CSVs to update (default: {DATA_DIR}; fixture runs only update the store unless given)",
+    )
+    refresh_cmd.add_argument("--no-publish", action="store_true", help="Only update the store in CACHE_DIR")
+    status_cmd = sub.add_parser("status", help="Show the stored high-water marks and row counts")
+    status_cmd.add_argument("--chain", default="polkadot", choices=sorted(CHAIN_DECIMALS))
+    args = parser.parse_args()
+
+    if args.command == "status":
+        state = load_state(args.chain)
+        print(json.dumps(state, indent=2))
+        for table in ["referenda", "votes", "monthly", "outcomes"]:
+            path = store_path(args.chain, table)
+            rows = pd.read_parquet(path).shape[0] if os.path.exists(path) else 0
+            print(f"{table:<10} {rows:>10,} rows  {path}")
+        return
+
+    if args.fixtures:
+        if not os.path.exists(os.path.join(args.fixtures, args.chain, "referenda.json")):
+            parser.error(f"No {args.chain} fixtures in {args.fixtures}")
+        source = FixtureSource(args.fixtures)
+        data_dir = args.data_dir
+    else:
+        api_key = os.environ.get("SUBSCAN_API_KEY")
+        if not api_key:
+            parser.error("SUBSCAN_API_KEY must be set (or replay --fixtures)")
+        source = SubscanSource(api_key, args.record)
+        data_dir = args.data_dir or DATA_DIR
+    if args.no_publish:
+        data_dir = None
+
+    from request_scheduler import BACKGROUND, request_context
+
+    with request_context(BACKGROUND, user="governance-etl"):
+        summary = refresh(args.chain, source, data_dir=data_dir)
+    print(
+        f"{summary['referenda_fetched']} referenda fetched, {summary['referenda_changed']} changed "
+        f"({summary['new_referenda']} new), {summary['votes']:,} votes; "
+        f"months recomputed: {', '.join(summary['months']) or 'none'}"
+    )
+    print(f"High-water marks: referendum {summary['state']['referenda_id']}, end block {summary['state']['end_block']}")
+
+
+if __name__ == "__main__":
+    main()
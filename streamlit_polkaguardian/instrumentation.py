@@ -0,0 +1,213 @@
+# instrumentation.py
+"""
+Lightweight timing spans and Prometheus-format metrics.
+
+Wrap a hot-path stage in `span()` (or decorate it with `timed()`); every span
+feeds a per-stage latency histogram and a ring buffer of recent spans used
+for p50/p95 in the dashboard's Diagnostics view:
+
+    with span("subscan.transfers", chain="polkadot", page=3) as s:
+        response = requests.post(...)
+        s["bytes"] = len(response.content)
+
+Metrics are process-wide. Set METRICS_PORT to also serve them at
+http://localhost:<port>/metrics for a Prometheus scraper.
+"""
+import bisect
+import contextlib
+import functools
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT_SPANS = 2000
+METRIC_PREFIX = "polkaguardian"
+
+_lock = threading.Lock()
+_histograms = {}      # (metric, labels) -> [bucket counts..., +Inf count, sum]
+_counters = {}        # (metric, labels) -> value
+_recent = deque(maxlen=RECENT_SPANS)
+
+
+def _labels_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def observe(metric, value, **labels):
+    """
+    Add one observation to a histogram.
+    """
+    key = (metric, _labels_key(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        hist[bisect.bisect_left(BUCKETS, value)] += 1
+        hist[-1] += value
+
+
+def inc(metric, amount=1, **labels):
+    """
+    Increase a counter.
+    """
+    key = (metric, _labels_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+@contextlib.contextmanager
+def span(stage, **fields):
+    """
+    Time a stage. The yielded dict can be used to attach fields
+    (bytes, rows, ...) that are kept with the span in the recent-span log.
+    Only `stage` and `chain` become metric labels to keep cardinality low.
+    """
+    record = dict(fields)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield record
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        chain = record.get("chain")
+        observe("stage_duration_seconds", elapsed, stage=stage, chain=chain)
+        if error:
+            inc("stage_errors_total", stage=stage, error=error)
+        record.update(stage=stage, seconds=elapsed, error=error, at=time.time())
+        with _lock:
+            _recent.append(record)
+
+
+def timed(stage):
+    """
+    Decorator form of span() for whole functions (e.g. chart renderers).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def recent_spans():
+    with _lock:
+        return list(_recent)
+
+
+def stage_summary():
+    """
+    Per-stage count / p50 / p95 / max in milliseconds from the recent spans.
+    Returns a list of dicts sorted by total time spent.
+    """
+    by_stage = {}
+    for record in recent_spans():
+        by_stage.setdefault(record["stage"], []).append(record["seconds"])
+    rows = []
+    for stage, values in by_stage.items():
+        arr = np.asarray(values) * 1000
+        rows.append({
+            "stage": stage,
+            "count": len(arr),
+            "p50_ms": float(np.percentile(arr, 50)),
+            "p95_ms": float(np.percentile(arr, 95)),
+            "max_ms": float(arr.max()),
+            "total_ms": float(arr.sum()),
+        })
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra) if extra else [])
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in items)
+    return "{" + body + "}"
+
+
+def render_prometheus():
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = []
+    seen = set()
+    for (metric, labels), hist in sorted(histograms.items()):
+        name = f"{METRIC_PREFIX}_{metric}"
+        if name not in seen:
+            lines.append(f"# TYPE {name} histogram")
+            seen.add(name)
+        cumulative = 0
+        for bound, count in zip(BUCKETS, hist):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        cumulative += hist[len(BUCKETS)]
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {hist[-1]}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    for (metric, labels), value in sorted(counters.items()):
+        name = f"{METRIC_PREFIX}_{metric}"
+        if name not in seen:
+            lines.append(f"# TYPE {name} counter")
+            seen.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _recent.clear()
+
+
+# ---- Optional /metrics endpoint ----
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port=None):
+    """
+    Serve /metrics on METRICS_PORT (once per process). No-op if unset.
+    """
+    global _server
+    port = port or os.environ.get("METRICS_PORT")
+    if not port:
+        return None
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            except OSError as e:
+                print(f"Metrics server not started: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
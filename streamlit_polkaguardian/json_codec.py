@@ -0,0 +1,147 @@
+# json_codec.py
+"""
+JSON decoding/encoding for Subscan payloads and cache entries.
+
+Uses msgspec and/or orjson when installed and falls back to the standard
+library otherwise. With msgspec, Subscan list responses are decoded straight
+into typed record structs; without it they are parsed generically and
+trimmed to the same fields, so callers see identical records either way.
+
+    code, message, transfers = decode_list(response.content, "transfers")
+"""
+import json
+from typing import Any, Optional
+
+try:
+    import msgspec
+except ImportError:  # optional
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+# Fields kept for each record kind, with the types Subscan returns them as.
+# Anything else in a record (nested account displays, ...) is dropped.
+RECORD_FIELDS = {
+    "transfers": {
+        "from": str, "to": str, "amount": str, "amount_v2": str, "usd_amount": str,
+        "asset_symbol": str, "asset_unique_id": str, "asset_type": str,
+        "block_num": int, "block_timestamp": int, "hash": str, "extrinsic_index": str,
+        "event_idx": int, "success": bool, "fee": str, "module": str, "nonce": int,
+        "is_lock": bool,
+    },
+    "extrinsics": {
+        "id": int, "block_num": int, "block_timestamp": int, "extrinsic_index": str,
+        "call_module": str, "call_module_function": str, "nonce": int,
+        "extrinsic_hash": str, "success": bool, "fee": str, "fee_used": str, "tip": str,
+        "finalized": bool,
+    },
+    "staking_history": {
+        "era": int, "stash": str, "validator_stash": str, "amount": Any, "event_id": str,
+        "event_index": str, "extrinsic_index": str, "module_id": str,
+        "block_num": int, "block_timestamp": int,
+    },
+    "referenda_votes": {
+        "referendum_index": int, "account": Any, "amount": Any, "status": str,
+        "conviction": Any, "extrinsic_index": str, "block_num": int, "block_timestamp": int,
+        "aye_amount": Any, "nay_amount": Any, "abstain_amount": Any, "delegate_account": Any,
+    },
+    "referenda": {
+        "referendum_index": int, "created_block": int, "created_block_timestamp": int,
+        "origins": str, "account": Any, "status": str, "latest_block_num": int,
+        "latest_block_timestamp": int, "title": str,
+    },
+}
+
+# Key of the record list inside a response's "data" object
+LIST_KEYS = {
+    "transfers": "transfers",
+    "extrinsics": "extrinsics",
+    "staking_history": "list",
+    "referenda_votes": "list",
+    "referenda": "list",
+}
+
+
+def loads(data):
+    """
+    Parse JSON bytes/str. msgspec keeps integers beyond 64 bits exact;
+    orjson (used when msgspec is missing) reads those as floats.
+    """
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj):
+    """
+    Serialize to compact JSON bytes; unknown types are written with str().
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits
+    return json.dumps(obj, default=str, separators=(",", ":")).encode()
+
+
+def dumps_text(obj):
+    """
+    Compact JSON as text, for prompts and downloads.
+    """
+    return dumps(obj).decode()
+
+
+# ---- Typed list decoding ----
+
+_envelopes = {}
+
+
+def _envelope_type(kind):
+    """
+    msgspec struct for a whole list response of `kind` (built once).
+    """
+    if kind not in _envelopes:
+        record = msgspec.defstruct(
+            f"{kind.title().replace('_', '')}Record",
+            [(name, Optional[tp], None) for name, tp in RECORD_FIELDS[kind].items()],
+        )
+        data = msgspec.defstruct(
+            f"{kind.title().replace('_', '')}Data",
+            [("count", Optional[int], None), (LIST_KEYS[kind], Optional[list[record]], None)],
+        )
+        _envelopes[kind] = msgspec.defstruct(
+            f"{kind.title().replace('_', '')}Response",
+            [("code", int, 0), ("message", Optional[str], None), ("data", Optional[data], None)],
+        )
+    return _envelopes[kind]
+
+
+def trim_records(records, kind):
+    """
+    Keep only the RECORD_FIELDS of each record (missing fields become None).
+    """
+    fields = tuple(RECORD_FIELDS[kind])
+    return [{f: r.get(f) for f in fields} for r in records]
+
+
+def decode_list(content, kind):
+    """
+    Decode a Subscan list response into (code, message, records).
+    Records are plain dicts holding the RECORD_FIELDS of `kind`.
+    """
+    if msgspec is not None:
+        try:
+            envelope = msgspec.json.decode(content, type=_envelope_type(kind))
+            records = getattr(envelope.data, LIST_KEYS[kind], None) if envelope.data else None
+            return envelope.code, envelope.message, msgspec.to_builtins(records or [])
+        except msgspec.ValidationError:
+            pass  # unexpected field types: fall back to the generic path
+
+    data = loads(content)
+    records = (data.get("data") or {}).get(LIST_KEYS[kind]) or []
+    return data.get("code"), data.get("message"), trim_records(records, kind)
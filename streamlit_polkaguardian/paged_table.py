@@ -0,0 +1,224 @@
+# paged_table.py
+"""
+Server-side paged, sortable and filterable view of a large history frame.
+
+Only the visible page is sliced out of the frame and sent to the browser, so
+the payload stays the same size whether an account has 100 or 500k
+transfers. Sort orders are argsorted once per column and reused; filters are
+boolean masks applied to the cached order, so a page request never copies or
+re-sorts the whole frame.
+
+    index = TableIndex(transfers_df)
+    page_df, total = index.page(TableFilters(asset=("DOT",)), "amount", False, page=0, page_size=50)
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from instrumentation import span
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+@dataclass(frozen=True)
+class TableFilters:
+    counterparty: str = ""
+    asset: tuple = ()
+    date_from: Optional[pd.Timestamp] = None
+    date_to: Optional[pd.Timestamp] = None  # inclusive (whole day)
+    amount_min: Optional[float] = None
+    amount_max: Optional[float] = None
+
+
+def _contains(column, needle):
+    """
+    Case-insensitive substring match; categoricals are matched once per
+    distinct value instead of once per row.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy()
+        matches = column.cat.categories.astype(str).str.contains(needle, case=False, regex=False)
+        return np.append(np.asarray(matches, dtype=bool), False)[codes]  # code -1 (missing) -> False
+    return column.astype(str).str.contains(needle, case=False, regex=False).to_numpy()
+
+
+class TableIndex:
+    """
+    Sort orders, numeric columns and the last filter mask of one history
+    frame. Built once per fetch; everything inside is computed lazily.
+    """
+
+    def __init__(self, df, counterparty_cols=("from", "to"), amount_col="amount",
+                 date_col="datetime", asset_col="asset_symbol"):
+        self.df = df
+        self.counterparty_cols = [c for c in counterparty_cols if c in df.columns]
+        self.amount_col = amount_col if amount_col in df.columns else None
+        self.date_col = date_col if date_col in df.columns else None
+        self.asset_col = asset_col if asset_col in df.columns else None
+        self._orders = {}
+        self._numeric = {}
+        self._filtered = (None, None)  # (filters, mask)
+
+    def __len__(self):
+        return len(self.df)
+
+    def assets(self):
+        if self.asset_col is None:
+            return []
+        return sorted(self.df[self.asset_col].dropna().astype(str).unique().tolist())
+
+    def date_bounds(self):
+        if self.date_col is None or self.df.empty:
+            return None, None
+        col = self.df[self.date_col]
+        return col.min(), col.max()
+
+    def _values(self, col):
+        """
+        Column as something argsort/compare can use (amounts arrive as strings).
+        """
+        if col == self.amount_col:
+            if col not in self._numeric:
+                self._numeric[col] = pd.to_numeric(self.df[col], errors="coerce").to_numpy(dtype=float)
+            return self._numeric[col]
+        return self.df[col].to_numpy()
+
+    def order(self, col, ascending=True):
+        """
+        Row positions sorted by `col`, missing values last in both directions.
+        The ascending order is cached per column; descending reverses only the
+        rows that have a value.
+        """
+        if col not in self._orders:
+            values = self._values(col)
+            missing = pd.isna(values)
+            present = np.flatnonzero(~missing)
+            values = values[present]
+            if values.dtype == object:
+                values = pd.Series(values).astype(str).to_numpy()
+            self._orders[col] = (present[np.argsort(values, kind="stable")], np.flatnonzero(missing))
+        order, missing = self._orders[col]
+        return np.concatenate([order if ascending else order[::-1], missing])
+
+    def mask(self, filters):
+        """
+        Boolean row mask for `filters`, or None when nothing is filtered.
+        """
+        if filters == TableFilters():
+            return None
+        if self._filtered[0] == filters:
+            return self._filtered[1]
+
+        df = self.df
+        mask = np.ones(len(df), dtype=bool)
+        if filters.counterparty and self.counterparty_cols:
+            needle = filters.counterparty.strip()
+            hit = np.zeros(len(df), dtype=bool)
+            for col in self.counterparty_cols:
+                hit |= _contains(df[col], needle)
+            mask &= hit
+        if filters.asset and self.asset_col:
+            mask &= df[self.asset_col].isin(filters.asset).to_numpy()
+        if self.date_col and filters.date_from is not None:
+            mask &= (df[self.date_col] >= filters.date_from).to_numpy()
+        if self.date_col and filters.date_to is not None:
+            mask &= (df[self.date_col] < filters.date_to + pd.Timedelta(days=1)).to_numpy()
+        if self.amount_col and filters.amount_min is not None:
+            mask &= self._values(self.amount_col) >= filters.amount_min
+        if self.amount_col and filters.amount_max is not None:
+            mask &= self._values(self.amount_col) <= filters.amount_max
+
+        self._filtered = (filters, mask)
+        return mask
+
+    def page(self, filters, sort_col, ascending, page, page_size):
+        """
+        (rows of the requested page, total matching rows).
+        """
+        with span("transform.table_page", rows=len(self.df)):
+            if sort_col in self.df.columns:
+                positions = self.order(sort_col, ascending)
+            else:
+                positions = np.arange(len(self.df))
+            mask = self.mask(filters)
+            if mask is not None:
+                positions = positions[mask[positions]]
+            start = page * page_size
+            return self.df.iloc[positions[start:start + page_size]], len(positions)
+
+
+def render_paged_table(index, columns, key, sort_options=None, default_sort=None):
+    """
+    Filter/sort/page controls plus the visible page of `index`.
+    Widget state lives under `key`, so several tables can coexist.
+    """
+    columns = [c for c in columns if c in index.df.columns]
+    sort_options = [c for c in (sort_options or columns) if c in index.df.columns]
+    default_sort = default_sort if default_sort in sort_options else sort_options[0]
+
+    with st.expander("🔎 Filter", expanded=False):
+        f_col1, f_col2 = st.columns(2)
+        with f_col1:
+            counterparty = st.text_input("Counterparty (address contains)", key=f"{key}_counterparty") \
+                if index.counterparty_cols else ""
+            assets = st.multiselect("Asset", index.assets(), key=f"{key}_asset") if index.asset_col else []
+        with f_col2:
+            date_from = date_to = None
+            first, last = index.date_bounds()
+            if first is not None:
+                dates = st.date_input(
+                    "Date range",
+                    value=(first.date(), last.date()),
+                    min_value=first.date(),
+                    max_value=last.date(),
+                    key=f"{key}_dates"
+                )
+                if isinstance(dates, (list, tuple)) and len(dates) == 2:
+                    if dates[0] > first.date():
+                        date_from = pd.Timestamp(dates[0])
+                    if dates[1] < last.date():
+                        date_to = pd.Timestamp(dates[1])
+            amount_min = amount_max = None
+            if index.amount_col:
+                a_col1, a_col2 = st.columns(2)
+                with a_col1:
+                    amount_min = st.number_input("Min amount", min_value=0.0, value=None, key=f"{key}_amount_min")
+                with a_col2:
+                    amount_max = st.number_input("Max amount", min_value=0.0, value=None, key=f"{key}_amount_max")
+
+    filters = TableFilters(
+        counterparty=(counterparty or "").strip(),
+        asset=tuple(assets),
+        date_from=date_from,
+        date_to=date_to,
+        amount_min=amount_min,
+        amount_max=amount_max,
+    )
+
+    s_col1, s_col2, s_col3 = st.columns([2, 1, 1])
+    with s_col1:
+        sort_col = st.selectbox("Sort by", sort_options, index=sort_options.index(default_sort), key=f"{key}_sort")
+    with s_col2:
+        direction = st.selectbox("Order", ["Descending", "Ascending"], key=f"{key}_direction")
+    with s_col3:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+
+    mask = index.mask(filters)
+    total = len(index) if mask is None else int(mask.sum())
+    pages = max(1, -(-total // page_size))
+    # Reset to the first page when the result set shrinks below the current page
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = 1
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+
+    page_df, total = index.page(filters, sort_col, direction == "Ascending", page - 1, page_size)
+    if total:
+        start = (page - 1) * page_size
+        st.caption(f"Rows {start + 1:,}–{start + len(page_df):,} of {total:,}"
+                   + (f" (filtered from {len(index):,})" if total != len(index) else ""))
+        st.dataframe(page_df[columns], use_container_width=True, hide_index=True)
+    else:
+        st.info("No rows match the current filters.")
@@ -0,0 +1,119 @@
+# raw_view.py
+"""
+Developer view of a raw Subscan response, built only when opened.
+
+The flattened Field/Value table is computed once per fetched response and
+cached. The raw payload is never serialized whole: its nested sections are
+listed once per response, and only the selected one is sent to the browser,
+a page of PAGE_SIZE items at a time for lists; nested sections of a dict
+show as placeholders that name their own entry in the list.
+
+    render_raw_view(snapshot_version, data_section, response_json, key="raw_account")
+"""
+import pandas as pd
+import streamlit as st
+
+from subscan import flatten_json
+
+PAGE_SIZE = 50
+
+# Sections listed at most this deep, and at most this many of them
+MAX_DEPTH = 8
+MAX_SECTIONS = 500
+
+
+def sections(payload, max_depth=MAX_DEPTH, max_sections=MAX_SECTIONS):
+    """
+    (path, kind, size) of the payload and every dict or list nested in its
+    dicts, in document order; paths are tuples of keys. List items are paged
+    rather than listed, so a 100k-item array is one section.
+    """
+    found = []
+    stack = [((), payload)]
+    while stack and len(found) < max_sections:
+        path, node = stack.pop()
+        if isinstance(node, dict):
+            found.append((path, "dict", len(node)))
+            if len(path) < max_depth:
+                children = [(path + (k,), v) for k, v in node.items() if isinstance(v, (dict, list))]
+                stack.extend(reversed(children))
+        elif isinstance(node, list):
+            found.append((path, "list", len(node)))
+    return found
+
+
+def resolve(payload, path):
+    node = payload
+    for key in path:
+        node = node[key]
+    return node
+
+
+def section_label(section):
+    path, kind, size = section
+    name = ".".join(str(k) for k in path) or "(response)"
+    return f"{name} ({size:,} {'keys' if kind == 'dict' else 'items'})"
+
+
+def shallow(node):
+    """
+    `node`'s own fields, with nested dicts and lists replaced by their size
+    (open them as their own section).
+    """
+    out = {}
+    for k, v in node.items():
+        if isinstance(v, dict):
+            out[k] = f"{{…}} {len(v):,} keys"
+        elif isinstance(v, list):
+            out[k] = f"[…] {len(v):,} items"
+        else:
+            out[k] = v
+    return out
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def flattened_fields(snapshot_version, _data_section):
+    """Field/Value table of the account data, flattened once per fetched response"""
+    flat = flatten_json(_data_section or {})
+    # One string column: a mix of numbers, strings and None can't be converted to Arrow as is
+    return pd.DataFrame({
+        "Field": list(flat),
+        "Value": ["" if v is None else str(v) for v in flat.values()],
+    })
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def response_sections(snapshot_version, _response):
+    return sections(_response)
+
+
+def render_raw_view(snapshot_version, data_section, response_json, key):
+    """
+    Flattened account fields plus a paged browser over the raw response.
+    Widget state lives under `key`.
+    """
+    st.dataframe(flattened_fields(snapshot_version, data_section), use_container_width=True, hide_index=True)
+    if not response_json:
+        return
+
+    found = response_sections(snapshot_version, response_json)
+    if len(found) >= MAX_SECTIONS:
+        st.caption(f"Showing the first {MAX_SECTIONS:,} sections")
+    choice = st.selectbox(
+        "Raw response section", range(len(found)), format_func=lambda i: section_label(found[i]), key=f"{key}_section"
+    )
+    path, kind, size = found[choice]
+    node = resolve(response_json, path)
+    if kind == "dict":
+        st.json(shallow(node))
+        return
+
+    pages = max(1, -(-size // PAGE_SIZE))
+    # Back to the first page when the newly selected list is shorter
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = 1
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    start = (page - 1) * PAGE_SIZE
+    if size:
+        st.caption(f"Items {start + 1:,}–{min(start + PAGE_SIZE, size):,} of {size:,}")
+    st.json(node[start:start + PAGE_SIZE], expanded=1)
@@ -0,0 +1,202 @@
+# refresh_worker.py
+"""
+Background worker that keeps watched accounts warm in the snapshot cache.
+
+Run it next to the Streamlit app (both must use the same shared cache
+backend, i.e. SNAPSHOT_CACHE_BACKEND=sqlite or redis). Subscan's 5 calls/s
+are per API key, so give both processes the worker's budget in
+WORKER_CALL_BUDGET: the dashboard then keeps to the remainder.
+
+    WORKER_CALL_BUDGET=2 SUBSCAN_API_KEY=... python refresh_worker.py --watchlist watchlist.json
+
+The watchlist is a JSON list of {"chain": "polkadot", "address": "..."}
+entries. Addresses the dashboard users looked at recently are added
+automatically (see --include-recent) and are refreshed more often.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+import subscan
+from datasets import cache_path
+from request_scheduler import BACKGROUND, request_context
+
+# Refresh interval by how recently a user accessed the account
+# (max seconds since last access, refresh interval in seconds)
+REFRESH_TIERS = [
+    (3600, 120),        # looked at in the last hour: every 2 minutes
+    (86400, 600),       # in the last day: every 10 minutes
+]
+IDLE_REFRESH_INTERVAL = 3600
+
+# Calls/second the worker may use, leaving the rest of Subscan's 5/s for interactive users
+DEFAULT_CALL_BUDGET = subscan.WORKER_CALL_BUDGET or 2
+
+
+# ---- Access log (written by the dashboard) ----
+
+class AccessLog:
+    """
+    Last time each (chain, address) was viewed in the dashboard.
+    Stored in SQLite next to the other caches so the worker process can read it.
+    """
+    def __init__(self, path=None):
+        self.path = path or cache_path("access_log.sqlite")
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS access (
+                    chain TEXT NOT NULL,
+                    address TEXT NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (chain, address)
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def record(self, chain_key, address):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO access VALUES (?, ?, ?)",
+                (chain_key, address, time.time())
+            )
+
+    def last_access(self):
+        """
+        Return {(chain, address): last_access_timestamp}.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT chain, address, last_access FROM access").fetchall()
+        return {(chain, address): ts for chain, address, ts in rows}
+
+
+def record_access(chain_key, address):
+    """
+    Note that a user looked at this account; never fails the caller.
+    """
+    try:
+        AccessLog().record(chain_key, address)
+    except Exception as e:
+        print(f"Could not record account access: {e}")
+
+
+# ---- Scheduling ----
+
+def load_watchlist(path):
+    """
+    Read [(chain, address), ...] from a JSON watchlist file.
+    """
+    if not path or not os.path.exists(path):
+        return []
+    with open(path) as f:
+        entries = json.load(f)
+    return [(e["chain"].lower(), e["address"].strip()) for e in entries if e.get("address")]
+
+
+def refresh_interval(last_access, now):
+    """
+    Seconds between refreshes for an account last accessed at `last_access`.
+    """
+    if last_access is None:
+        return IDLE_REFRESH_INTERVAL
+    idle = now - last_access
+    for max_idle, interval in REFRESH_TIERS:
+        if idle <= max_idle:
+            return interval
+    return IDLE_REFRESH_INTERVAL
+
+
+def due_accounts(watchlist, accesses, last_refreshed, now):
+    """
+    Accounts whose refresh interval has elapsed, most recently accessed first.
+    """
+    due = []
+    for account in watchlist:
+        accessed = accesses.get(account)
+        refreshed = last_refreshed.get(account, 0)
+        if now - refreshed >= refresh_interval(accessed, now):
+            due.append((-(accessed or 0), account))
+    return [account for _, account in sorted(due)]
+
+
+class RefreshWorker:
+    """
+    Refreshes due accounts into the snapshot cache, one at a time, under the
+    worker's call budget.
+    """
+    def __init__(self, api_key, watchlist_path=None, include_recent_hours=24, access_log=None):
+        self.api_key = api_key
+        self.watchlist_path = watchlist_path
+        self.include_recent = include_recent_hours * 3600
+        self.access_log = access_log or AccessLog()
+        self.last_refreshed = {}
+
+    def current_watchlist(self, accesses, now):
+        watchlist = load_watchlist(self.watchlist_path)
+        if self.include_recent:
+            recent = [acc for acc, ts in accesses.items() if now - ts <= self.include_recent]
+            watchlist += [acc for acc in recent if acc not in watchlist]
+        return watchlist
+
+    def run_once(self):
+        """
+        Refresh every account that is due. Returns the number refreshed.
+        """
+        now = time.time()
+        accesses = self.access_log.last_access()
+        due = due_accounts(self.current_watchlist(accesses, now), accesses, self.last_refreshed, now)
+        for chain_key, address in due:
+            started = time.time()
+            try:
+                with request_context(BACKGROUND, user="refresh-worker"):
+                    new_transfers = subscan.refresh_cached_account(chain_key, address, self.api_key)
+                print(f"Refreshed {chain_key}:{address} ({new_transfers} new transfers, {time.time() - started:.1f}s)")
+            except Exception as e:
+                print(f"Refresh failed for {chain_key}:{address}: {e}")
+            # Failed refreshes also wait a full interval so one bad address can't hog the budget
+            self.last_refreshed[(chain_key, address)] = time.time()
+        return len(due)
+
+    def run_forever(self, poll_seconds=15):
+        while True:
+            self.run_once()
+            time.sleep(poll_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep watched accounts warm in the Subscan snapshot cache.")
+    parser.add_argument("--watchlist", default=os.environ.get("WATCHLIST_PATH"), help="JSON file of {chain, address} entries")
+    parser.add_argument("--include-recent", type=float, default=24, help="Also refresh accounts viewed in the last N hours (0 disables)")
+    parser.add_argument("--budget", type=float, default=DEFAULT_CALL_BUDGET, help="Subscan calls per second the worker may use")
+    parser.add_argument("--poll", type=float, default=15, help="Seconds between scheduling passes")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    args = parser.parse_args()
+
+    api_key = os.environ.get("SUBSCAN_API_KEY")
+    if not api_key:
+        parser.error("SUBSCAN_API_KEY must be set")
+
+    # The worker is its own process, so cap it below the shared 5 calls/second;
+    # the dashboard only leaves room for it when told the same budget
+    if not 0 < args.budget <= subscan.SUBSCAN_CALLS_PER_SECOND - 1:
+        parser.error(f"--budget must be above 0 and leave the dashboard at least 1 of Subscan's "
+                     f"{subscan.SUBSCAN_CALLS_PER_SECOND} calls/second")
+    if args.budget != subscan.WORKER_CALL_BUDGET:
+        print(f"WORKER_CALL_BUDGET is not {args.budget:g}: set it for the dashboard too, "
+              f"or together they can exceed Subscan's {subscan.SUBSCAN_CALLS_PER_SECOND} calls/second")
+    subscan.set_call_budget(args.budget)
+
+    worker = RefreshWorker(api_key, args.watchlist, args.include_recent)
+    if args.once:
+        print(f"Refreshed {worker.run_once()} accounts")
+    else:
+        worker.run_forever(args.poll)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# request_scheduler.py
+"""
+Priority-aware scheduling of Subscan calls on top of the rate limiter.
+
+Every call asks the scheduler for a slot. When slots are scarce they are
+granted by priority class (interactive > paging > background), then fairly
+across users (the user with the fewest recently granted calls goes first),
+then in arrival order. A request that can't get a slot within its max wait raises
+DeadlineExceeded instead of queueing forever.
+
+Callers describe who they are with a context manager instead of threading
+arguments through every fetcher:
+
+    with request_context(INTERACTIVE, user=session_id, max_wait=30):
+        fetch_account_data(...)
+"""
+import contextlib
+import contextvars
+import itertools
+import threading
+import time
+
+INTERACTIVE = 0
+PAGING = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", PAGING: "paging", BACKGROUND: "background"}
+
+# Per-user grant counts are halved every DECAY_INTERVAL grants (users at 0
+# are dropped), so fairness follows recent use and finished sessions don't pile up
+DECAY_INTERVAL = 100
+
+# (priority, user, max_wait seconds or None) for calls made in this context
+_context = contextvars.ContextVar("subscan_request_context", default=(INTERACTIVE, None, None))
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request could not be scheduled within its max wait."""
+
+
+@contextlib.contextmanager
+def request_context(priority=INTERACTIVE, user=None, max_wait=None):
+    """
+    Scope the priority class, user and per-request max wait of Subscan calls.
+    """
+    token = _context.set((priority, user, max_wait))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_context():
+    return _context.get()
+
+
+class _Ticket:
+    __slots__ = ("priority", "user", "seq", "deadline")
+
+    def __init__(self, priority, user, seq, deadline):
+        self.priority = priority
+        self.user = user
+        self.seq = seq
+        self.deadline = deadline
+
+
+class RequestScheduler:
+    """
+    Grants rate-limiter slots to waiting requests in priority/fairness order.
+    `rate_limiter` must provide time_until_available() and record_call().
+    """
+    def __init__(self, rate_limiter):
+        self.rate_limiter = rate_limiter
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._served = {}
+        self._grants = 0
+        self._seq = itertools.count()
+
+    def _sort_key(self, ticket):
+        return (ticket.priority, self._served.get(ticket.user, 0), ticket.seq)
+
+    def acquire(self, min_priority=None):
+        """
+        Block until this request may call Subscan. The priority comes from the
+        active request_context, lowered to at least `min_priority` (e.g. PAGING
+        for follow-up pages of a crawl). Returns the seconds spent waiting.
+        """
+        priority, user, max_wait = _context.get()
+        if min_priority is not None:
+            priority = max(priority, min_priority)
+        start = time.time()
+        ticket = _Ticket(priority, user, next(self._seq), start + max_wait if max_wait is not None else None)
+
+        with self._cond:
+            self._waiting.append(ticket)
+            try:
+                while True:
+                    now = time.time()
+                    if ticket.deadline is not None and now >= ticket.deadline:
+                        raise DeadlineExceeded(
+                            f"{PRIORITY_NAMES.get(priority, priority)} request not scheduled within {max_wait:g}s"
+                        )
+                    head = min(self._waiting, key=self._sort_key)
+                    wait = self.rate_limiter.time_until_available(now)
+                    if head is ticket and wait <= 0:
+                        self.rate_limiter.record_call(now)
+                        self._record_grant(user)
+                        return now - start
+                    if head is not ticket:
+                        # Woken when the head is granted; the timeout bounds deadline checks
+                        wait = 1.0
+                    if ticket.deadline is not None:
+                        wait = min(wait, ticket.deadline - now)
+                    self._cond.wait(max(wait, 0.001))
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+
+    def _record_grant(self, user):
+        self._served[user] = self._served.get(user, 0) + 1
+        self._grants += 1
+        if self._grants % DECAY_INTERVAL == 0:
+            self._served = {u: n // 2 for u, n in self._served.items() if n // 2}
+
+    def queue_depth(self):
+        """
+        Number of waiting requests per priority class.
+        """
+        with self._cond:
+            depth = {}
+            for ticket in self._waiting:
+                depth[ticket.priority] = depth.get(ticket.priority, 0) + 1
+            return depth
@@ -0,0 +1,525 @@
+# snapshot_cache.py
+"""
+Shared cache for Subscan responses.
+
+Raw API payloads are cached per endpoint with their own TTL, in one of three
+pluggable backends:
+
+    memory  - in-process LRU (default when nothing else is configured)
+    sqlite  - on-disk LRU shared by every worker on the host
+    redis   - any server speaking the Redis protocol (RESP)
+
+Entries are served fresh for the endpoint TTL, then served stale for up to
+STALE_SECONDS while a background refresh runs (stale-while-revalidate).
+Cache keys are built from the endpoint, chain and request parameters only;
+API keys are never part of a key.
+
+Configuration (environment):
+    SNAPSHOT_CACHE_BACKEND  memory | sqlite | redis   (default: sqlite)
+    SNAPSHOT_CACHE_URL      redis://host:port/db      (redis backend only)
+
+For local development a tiny Redis stand-in can be started with:
+
+    python snapshot_cache.py redis-standin --port 6379
+"""
+import argparse
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from datasets import cache_path
+from json_codec import dumps, loads
+from request_scheduler import BACKGROUND, request_context
+
+# ---- Cache policy ----
+
+# Fresh lifetime per endpoint, in seconds
+ENDPOINT_TTLS = {
+    "account": 60,
+    "token": 600,
+    "transfers": 300,
+    "extrinsics": 300,
+    "staking_history": 900,
+    "referenda_votes": 600,
+}
+DEFAULT_TTL = 300
+
+# How long an expired entry may still be served while it is refreshed
+STALE_SECONDS = 3600
+
+KEY_PREFIX = "subscan:v1"
+
+
+# Request parameters that carry credentials; never part of a key. Only exact
+# names: a substring match would also drop e.g. the account "key" param and
+# make every address share one entry.
+SECRET_PARAMS = {"api_key", "apikey", "x-api-key", "token", "secret"}
+
+
+def make_cache_key(endpoint, chain_key, params):
+    """
+    Deterministic cache key. `params` must not contain secrets;
+    credential parameters (SECRET_PARAMS) are dropped defensively.
+    """
+    safe_params = {k: v for k, v in sorted(params.items()) if k.lower() not in SECRET_PARAMS}
+    digest = hashlib.sha256(json.dumps(safe_params, sort_keys=True, default=str).encode()).hexdigest()[:24]
+    return f"{KEY_PREFIX}:{endpoint}:{chain_key}:{digest}"
+
+
+# ---- Backends ----
+# Every backend stores opaque bytes: get(key) -> bytes | None,
+# set(key, value, ttl) and delete(key). `ttl` is the hard expiry.
+
+class MemoryBackend:
+    """
+    In-process LRU bounded by entry count.
+    """
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """
+    On-disk LRU bounded by total payload bytes. Safe to share across processes.
+    """
+    def __init__(self, path=None, max_bytes=512 * 1024 * 1024):
+        self.path = path or cache_path("subscan_cache.sqlite")
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries (last_access)")
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections can't cross threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.commit()
+            return None
+        conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        conn.commit()
+        return bytes(row[0])
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value), now + ttl, now)
+        )
+        self._evict(conn, now)
+        conn.commit()
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we're back under budget
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def delete(self, key):
+        conn = self._conn()
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        conn.commit()
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM entries")
+        conn.commit()
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class RedisBackend:
+    """
+    Minimal RESP client (GET / SET PX / DEL) so no extra dependency is needed.
+    Size-bounded eviction is delegated to the server; configure it with
+    `maxmemory` and `maxmemory-policy allkeys-lru`.
+    """
+    def __init__(self, url="redis://localhost:6379/0", timeout=2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int((parsed.path or "/0").lstrip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._send("AUTH", self.password)
+        if self.db:
+            self._send("SELECT", self.db)
+
+    def _send(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RuntimeError(f"Redis error: {rest.decode()}")
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(rest)
+            return None if count == -1 else [self._read_reply() for _ in range(count)]
+        raise RuntimeError(f"Unexpected Redis reply: {line!r}")
+
+    def _command(self, *args):
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._send(*args)
+            except (OSError, ConnectionError):
+                # Reconnect once on a dropped connection
+                self._close()
+                self._connect()
+                return self._send(*args)
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def get(self, key):
+        return self._command("GET", key)
+
+    def set(self, key, value, ttl):
+        self._command("SET", key, value, "PX", int(ttl * 1000))
+
+    def delete(self, key):
+        self._command("DEL", key)
+
+    def clear(self):
+        self._command("FLUSHDB")
+
+    def __len__(self):
+        return self._command("DBSIZE")
+
+
+# ---- Cache front-end ----
+
+class SnapshotCache:
+    """
+    TTL + stale-while-revalidate layer over a byte backend.
+    Values must be JSON-serializable (raw Subscan payloads are).
+    """
+    def __init__(self, backend, ttls=None, stale_seconds=STALE_SECONDS):
+        self.backend = backend
+        self.ttls = dict(ENDPOINT_TTLS, **(ttls or {}))
+        self.stale_seconds = stale_seconds
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+
+    def ttl_for(self, endpoint):
+        return self.ttls.get(endpoint, DEFAULT_TTL)
+
+    def _read(self, key):
+        raw = None
+        try:
+            raw = self.backend.get(key)
+        except Exception as e:
+            print(f"Snapshot cache read failed ({key}): {e}")
+        if raw is None:
+            return None
+        try:
+            return loads(raw)
+        except ValueError:
+            return None
+
+    def _write(self, key, endpoint, value):
+        envelope = {"stored_at": time.time(), "value": value}
+        try:
+            self.backend.set(
+                key,
+                dumps(envelope),
+                self.ttl_for(endpoint) + self.stale_seconds
+            )
+        except Exception as e:
+            print(f"Snapshot cache write failed ({key}): {e}")
+
+    def put(self, endpoint, chain_key, params, value):
+        self._write(make_cache_key(endpoint, chain_key, params), endpoint, value)
+
+    def peek(self, endpoint, chain_key, params):
+        """
+        Return (value, age_seconds) without fetching, or (None, None) on a miss.
+        """
+        envelope = self._read(make_cache_key(endpoint, chain_key, params))
+        if envelope is None:
+            return None, None
+        return envelope["value"], time.time() - envelope.get("stored_at", 0)
+
+    def get_or_fetch(self, endpoint, chain_key, params, fetch_fn):
+        """
+        Return the cached value for (endpoint, chain_key, params), calling
+        fetch_fn() on a miss. Stale entries are returned immediately and
+        refreshed in a background thread.
+        """
+        key = make_cache_key(endpoint, chain_key, params)
+        envelope = self._read(key)
+        if envelope is not None:
+            age = time.time() - envelope.get("stored_at", 0)
+            if age > self.ttl_for(endpoint):
+                self._refresh_in_background(key, endpoint, fetch_fn)
+            return envelope["value"]
+
+        value = fetch_fn()
+        self._write(key, endpoint, value)
+        return value
+
+    def _refresh_in_background(self, key, endpoint, fetch_fn):
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                with request_context(BACKGROUND, user="cache-refresh"):
+                    value = fetch_fn()
+                self._write(key, endpoint, value)
+            except Exception as e:
+                print(f"Background refresh failed ({key}): {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+def create_backend(kind=None, url=None):
+    """
+    Build a backend from arguments or the SNAPSHOT_CACHE_* environment.
+    """
+    kind = (kind or os.environ.get("SNAPSHOT_CACHE_BACKEND", "sqlite")).lower()
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "redis":
+        return RedisBackend(url or os.environ.get("SNAPSHOT_CACHE_URL", "redis://localhost:6379/0"))
+    if kind == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"Unknown snapshot cache backend: {kind}")
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_snapshot_cache():
+    """
+    Process-wide SnapshotCache built from the environment.
+    Falls back to the in-memory backend if the configured one is unavailable.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            try:
+                backend = create_backend()
+            except Exception as e:
+                print(f"Snapshot cache backend unavailable, using memory: {e}")
+                backend = MemoryBackend()
+            _default_cache = SnapshotCache(backend)
+        return _default_cache
+
+
+# ---- Local Redis stand-in ----
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _bulk(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            args = self._read_command()
+            if not args:
+                return
+            cmd = args[0].upper()
+            if cmd == b"PING":
+                reply = b"+PONG\r\n"
+            elif cmd in (b"SELECT", b"AUTH"):
+                reply = b"+OK\r\n"
+            elif cmd == b"GET":
+                reply = self._bulk(store.get(args[1].decode()))
+            elif cmd == b"SET":
+                ttl = 10 ** 9
+                if len(args) >= 5 and args[3].upper() == b"PX":
+                    ttl = int(args[4]) / 1000
+                elif len(args) >= 5 and args[3].upper() == b"EX":
+                    ttl = int(args[4])
+                store.set(args[1].decode(), args[2], ttl)
+                reply = b"+OK\r\n"
+            elif cmd == b"DEL":
+                for key in args[1:]:
+                    store.delete(key.decode())
+                reply = b":%d\r\n" % (len(args) - 1)
+            elif cmd == b"FLUSHDB":
+                store.clear()
+                reply = b"+OK\r\n"
+            elif cmd == b"DBSIZE":
+                reply = b":%d\r\n" % len(store)
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    """
+    In-process server speaking enough RESP for RedisBackend, backed by a
+    MemoryBackend so it also enforces LRU eviction. Development use only.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, max_entries=4096):
+        super().__init__((host, port), _StandInHandler)
+        self.store = MemoryBackend(max_entries=max_entries)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or serve the Subscan snapshot cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show the number of cached entries")
+    sub.add_parser("clear", help="Remove every cached entry")
+    standin = sub.add_parser("redis-standin", help="Run a local Redis-protocol stand-in server")
+    standin.add_argument("--host", default="127.0.0.1")
+    standin.add_argument("--port", type=int, default=6379)
+    standin.add_argument("--max-entries", type=int, default=4096)
+    args = parser.parse_args()
+
+    if args.command == "redis-standin":
+        server = RedisStandIn(args.host, args.port, args.max_entries)
+        print(f"Redis stand-in listening on {server.url}")
+        server.serve_forever()
+        return
+
+    backend = create_backend()
+    if args.command == "clear":
+        backend.clear()
+        print("Snapshot cache cleared")
+    else:
+        print(f"{len(backend)} cached entries ({type(backend).__name__})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# staking.py
+"""
+Staking reward/slash analytics over an account's full reward history.
+
+Reward and slash events are aggregated per era with one vectorized groupby,
+then laid onto the full era range of the history so that eras without a
+reward (missed eras: chilled, oversubscribed or offline validators, ...)
+show up as zero rows. Monthly figures and realized APY are derived from
+that era table, which is small (one row per era) however many events there
+are.
+
+Era aggregates are cached per (chain, address) as Parquet in CACHE_DIR.
+On each update only events from the last cached era onward are
+aggregated and appended, so new eras never recompute the whole history.
+
+    events = staking_events(staking_df, decimals)
+    eras = update_era_cache(chain_key, address, events)
+    table = era_table(eras)
+    months = aggregate_months(table, bonded, chain_key)
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from datasets import cache_path
+from instrumentation import span
+
+# Era length per chain; used to annualize per-era returns
+ERA_HOURS = {"polkadot": 24, "kusama": 6}
+
+EVENT_COLUMNS = ["era", "block_timestamp", "reward", "slash"]
+ERA_COLUMNS = ["era", "block_timestamp", "rewards", "slashes", "net", "events"]
+
+
+def eras_per_year(chain_key):
+    return 365.25 * 24 / ERA_HOURS.get(chain_key, 24)
+
+
+def era_cache_path(chain_key, address):
+    return cache_path(f"staking_eras_{chain_key}_{address}.parquet")
+
+
+def staking_events(staking_df, decimals):
+    """
+    One row per reward/slash event: era, timestamp and the amount in
+    tokens, in a `reward` or `slash` column (slashes as positive amounts).
+    """
+    if staking_df.empty or not {"era", "amount"} <= set(staking_df.columns):
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    amount = pd.to_numeric(staking_df["amount"], errors="coerce").fillna(0).to_numpy(dtype=float) / 10**decimals
+    event_id = staking_df.get("event_id", pd.Series("", index=staking_df.index)).astype(str)
+    is_slash = event_id.str.contains("slash", case=False).to_numpy()
+    return pd.DataFrame({
+        "era": pd.to_numeric(staking_df["era"], errors="coerce").fillna(-1).astype(np.int64).to_numpy(),
+        "block_timestamp": pd.to_numeric(staking_df["block_timestamp"], errors="coerce").fillna(0).astype(np.int64).to_numpy(),
+        "reward": np.where(is_slash, 0.0, amount),
+        "slash": np.where(is_slash, amount, 0.0),
+    }).query("era >= 0")
+
+
+def aggregate_eras(events):
+    """
+    Rewards, slashes, net and event count per era (ascending), timestamped
+    with the era's first event.
+    """
+    if events.empty:
+        return pd.DataFrame(columns=ERA_COLUMNS)
+
+    with span("transform.staking_eras", rows=len(events)):
+        eras = events.groupby("era", sort=True).agg(
+            block_timestamp=("block_timestamp", "min"),
+            rewards=("reward", "sum"),
+            slashes=("slash", "sum"),
+            events=("reward", "size"),
+        ).reset_index()
+        eras["net"] = eras["rewards"] - eras["slashes"]
+    return eras[ERA_COLUMNS]
+
+
+def load_era_cache(chain_key, address):
+    path = era_cache_path(chain_key, address)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=ERA_COLUMNS)
+    return pd.read_parquet(path)
+
+
+def update_era_cache(chain_key, address, events):
+    """
+    Era aggregates of `events` (the account's full reward/slash stream),
+    reusing the cached aggregates: only events from the last cached era
+    onward are aggregated (that era may have been cached before all of its
+    events arrived), unless the stream reaches further back than the
+    cache. Returns the full era aggregate table.
+    """
+    cached = load_era_cache(chain_key, address)
+    # Start over when the stream reaches further back than the cache
+    if cached.empty or (not events.empty and events["era"].min() < cached["era"].min()):
+        eras = aggregate_eras(events)
+    else:
+        last_era = int(cached["era"].max())
+        new = aggregate_eras(events[events["era"] >= last_era])
+        if new.empty:
+            return cached
+        eras = pd.concat([cached[cached["era"] < last_era], new], ignore_index=True)
+        if len(new) == 1 and new.equals(cached[cached["era"] == last_era].reset_index(drop=True)):
+            return cached  # nothing new since the last update
+
+    if not eras.empty:
+        eras.to_parquet(era_cache_path(chain_key, address), index=False)
+    return eras
+
+
+def era_table(eras):
+    """
+    One row per era from the first to the last rewarded era, missed eras
+    included with zero amounts and `paid` False. Timestamps of missed eras
+    are interpolated from their neighbours.
+    """
+    if eras.empty:
+        return pd.DataFrame(columns=ERA_COLUMNS + ["paid", "datetime"])
+
+    all_eras = np.arange(int(eras["era"].min()), int(eras["era"].max()) + 1)
+    table = eras.set_index("era").reindex(all_eras)
+    table.index.name = "era"
+    table["paid"] = table["events"].notna()
+    table[["rewards", "slashes", "net"]] = table[["rewards", "slashes", "net"]].fillna(0.0)
+    table["events"] = table["events"].fillna(0).astype(np.int64)
+    table["block_timestamp"] = np.interp(
+        all_eras, eras["era"].to_numpy(dtype=float), eras["block_timestamp"].to_numpy(dtype=float)
+    ).astype(np.int64)
+    table["datetime"] = pd.to_datetime(table["block_timestamp"], unit="s")
+    return table.reset_index()
+
+
+def missed_eras(table):
+    """
+    Runs of consecutive unpaid eras: first/last missed era and run length.
+    """
+    columns = ["first_era", "last_era", "eras", "from", "to"]
+    if table.empty:
+        return pd.DataFrame(columns=columns)
+
+    paid = table["paid"].to_numpy(dtype=bool)
+    # Run boundaries are where the paid flag flips
+    edges = np.diff(np.concatenate([[1], paid.astype(np.int8), [1]]))
+    starts, ends = np.flatnonzero(edges == -1), np.flatnonzero(edges == 1) - 1
+    eras, dates = table["era"].to_numpy(), table["datetime"].to_numpy()
+    return pd.DataFrame({
+        "first_era": eras[starts],
+        "last_era": eras[ends],
+        "eras": ends - starts + 1,
+        "from": dates[starts],
+        "to": dates[ends],
+    }, columns=columns)
+
+
+def realized_apy(net, eras, bonded, chain_key):
+    """
+    Realized APY (%) of earning `net` tokens over `eras` eras on a bonded
+    balance, compounding once per era. Works on scalars and arrays; NaN
+    without a bonded balance.
+    """
+    net = np.asarray(net, dtype=float)
+    if not bonded or bonded <= 0:
+        return net * np.nan
+    per_era = net / bonded / np.asarray(eras, dtype=float)
+    return ((1 + per_era) ** eras_per_year(chain_key) - 1) * 100
+
+
+def aggregate_months(table, bonded, chain_key):
+    """
+    Rewards, slashes, net, paid/missed era counts and realized APY per
+    calendar month of the era table. APY uses the current bonded balance
+    for every month.
+    """
+    columns = ["month", "rewards", "slashes", "net", "eras", "missed", "apy_pct"]
+    if table.empty:
+        return pd.DataFrame(columns=columns)
+
+    months = table.groupby(table["datetime"].dt.to_period("M"), sort=True).agg(
+        rewards=("rewards", "sum"),
+        slashes=("slashes", "sum"),
+        net=("net", "sum"),
+        eras=("era", "size"),
+        paid=("paid", "sum"),
+    )
+    months["missed"] = months["eras"] - months["paid"]
+    months["apy_pct"] = realized_apy(months["net"].to_numpy(), months["eras"].to_numpy(), bonded, chain_key)
+    months.index = months.index.to_timestamp()
+    return months.rename_axis("month").reset_index()[columns]
+
+
+def summarize(table, bonded, chain_key):
+    """
+    Totals over the whole era table, with realized APY and missed-era count.
+    """
+    n_eras = len(table)
+    net = float(table["net"].sum()) if n_eras else 0.0
+    return {
+        "rewards": float(table["rewards"].sum()) if n_eras else 0.0,
+        "slashes": float(table["slashes"].sum()) if n_eras else 0.0,
+        "net": net,
+        "eras": n_eras,
+        "missed": int((~table["paid"]).sum()) if n_eras else 0,
+        "apy_pct": float(realized_apy(net, n_eras, bonded, chain_key)) if n_eras else float("nan"),
+    }
@@ -0,0 +1,279 @@
+# summary_cache.py
+"""
+Persistent cache for AI proposal summaries.
+
+Summaries are keyed by (the proposal's fields as prompted, prompt template
+hash, dataset version, model) and stored in SQLite so every Streamlit session and worker
+on the host shares them. Run this module directly to pre-generate summaries
+for all open referenda:
+
+    python summary_cache.py prewarm --chain Polkadot
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from datasets import PROPOSALS_CSV, cache_path, dataset_version
+from instrumentation import span
+
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_SYSTEM_PROMPT = "You are an expert Polkadot governance analyst."
+SUMMARY_PROMPT_TEMPLATE = """
+You are an expert on Polkadot governance.
+Based on the following proposal data, provide a comprehensive analysis:
+
+Proposal Details:
+{proposal}
+
+Recent Proposals Context:
+{context}
+
+Please provide:
+1. A clear summary of what this proposal is about
+2. Key insights and implications
+3. Arguments for voting YES
+4. Arguments for voting NO
+5. Overall recommendation for voters
+"""
+
+CONTEXT_COLUMNS = [
+    "chain", "origin", "referenda_id", "status", "title",
+    "proposed_by_name", "proposed_by", "start_time", "end_time"
+]
+
+# Referenda that can still be voted on
+OPEN_STATUSES = {"Submitted", "Decision Started", "Confirm Started"}
+
+
+def template_hash():
+    """
+    Short hash of the system prompt + template; editing either invalidates the cache.
+    """
+    text = SUMMARY_SYSTEM_PROMPT + SUMMARY_PROMPT_TEMPLATE
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+
+def proposal_fields(proposal_row, proposals):
+    """
+    The proposal as sent to the model. Only dataset columns are included so
+    UI-only helper columns (e.g. display_title) don't change it, the title is
+    blank-filled and stripped as the proposal selector shows it, and numpy
+    scalars become plain values, so the dashboard and the prewarm job prompt
+    (and key) a proposal the same way.
+    """
+    proposal = {}
+    for k, v in dict(proposal_row).items():
+        if k in proposals.columns:
+            proposal[k] = v.item() if hasattr(v, "item") else v
+    if "title" in proposal:
+        proposal["title"] = "" if pd.isna(proposal["title"]) else str(proposal["title"]).strip()
+    return proposal
+
+
+def summary_key(proposal, data_version, model=SUMMARY_MODEL):
+    """
+    Cache key for one proposal summary, from the same fields the prompt uses.
+    """
+    fields = json.dumps(proposal, sort_keys=True, default=str)
+    raw = f"{fields}|{template_hash()}|{data_version}|{model}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def build_summary_prompt(proposal, proposals):
+    """
+    Render the summary prompt for one proposal (see proposal_fields).
+    """
+    key_columns = [c for c in CONTEXT_COLUMNS if c in proposals.columns]
+    context_df = proposals[key_columns].head(25) if key_columns else proposals.head(10)
+    return SUMMARY_PROMPT_TEMPLATE.format(
+        proposal=proposal,
+        context=context_df.to_dict(orient="records"),
+    )
+
+
+class SummaryCache:
+    """
+    SQLite-backed summary store with least-recently-used eviction.
+    A new connection is opened per operation, so one instance can be
+    shared between Streamlit threads and separate processes.
+    """
+    def __init__(self, path=None, max_entries=2000):
+        self.path = path or cache_path("ai_summaries.sqlite")
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS summaries (
+                    key TEXT PRIMARY KEY,
+                    chain TEXT,
+                    referenda_id TEXT,
+                    model TEXT,
+                    content TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_access ON summaries (last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        """
+        Return the cached summary for key, or None.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT content FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE summaries SET last_access = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, key, content, chain=None, referenda_id=None, model=SUMMARY_MODEL):
+        """
+        Store a summary and evict the least recently used entries beyond max_entries.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, chain, str(referenda_id), model, content, now, now)
+            )
+            conn.execute(
+                """
+                DELETE FROM summaries WHERE key IN (
+                    SELECT key FROM summaries ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+
+_default_cache = None
+
+
+def get_summary_cache():
+    """
+    Process-wide SummaryCache instance.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SummaryCache()
+    return _default_cache
+
+
+def generate_proposal_summary(client, proposal_row, proposals, cache=None, data_version=None):
+    """
+    Return (summary_text, from_cache) for a proposal, calling the model only on a cache miss.
+    """
+    cache = cache or get_summary_cache()
+    data_version = data_version or dataset_version(PROPOSALS_CSV)
+    proposal = proposal_fields(proposal_row, proposals)
+    chain = proposal.get("chain", "")
+    referenda_id = proposal.get("referenda_id", "")
+    key = summary_key(proposal, data_version)
+
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, True
+
+    with span("llm.proposal_summary", model=SUMMARY_MODEL):
+        response = client.chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": build_summary_prompt(proposal, proposals)}
+            ],
+            temperature=0.3,
+            max_tokens=1000
+        )
+    content = response.choices[0].message.content
+    cache.put(key, content, chain=chain, referenda_id=referenda_id)
+    return content, False
+
+
+def selectable_proposals(proposals, n=20):
+    """
+    Proposals offered in the dashboard's selector: every open referendum
+    (the ones prewarm_open_referenda covers), newest first, then the most
+    recently started closed ones up to `n` in total.
+    """
+    ordered = proposals
+    if "start_time" in proposals.columns:
+        started = pd.to_datetime(proposals["start_time"], errors="coerce", utc=True).reset_index(drop=True)
+        ordered = proposals.iloc[started.sort_values(ascending=False, kind="stable").index]
+    if "status" not in ordered.columns:
+        return ordered.head(n)
+    is_open = ordered["status"].isin(OPEN_STATUSES)
+    return pd.concat([ordered[is_open], ordered[~is_open].head(max(n - int(is_open.sum()), 0))])
+
+
+# ---- Offline batch job ----
+
+def prewarm_open_referenda(client, proposals, chain=None, limit=None, cache=None):
+    """
+    Generate summaries for every open referendum that isn't cached yet.
+    Returns (generated, already_cached) counts.
+    """
+    open_df = proposals[proposals["status"].isin(OPEN_STATUSES)]
+    if chain:
+        open_df = open_df[open_df["chain"] == chain]
+    if limit:
+        open_df = open_df.head(limit)
+
+    data_version = dataset_version(PROPOSALS_CSV)
+    generated = already_cached = 0
+    for _, row in open_df.iterrows():
+        try:
+            _, from_cache = generate_proposal_summary(
+                client, row, proposals, cache=cache, data_version=data_version
+            )
+        except Exception as e:
+            print(f"Summary failed for {row.get('chain')} #{row.get('referenda_id')}: {e}")
+            continue
+        if from_cache:
+            already_cached += 1
+        else:
+            generated += 1
+            print(f"Generated summary for {row.get('chain')} #{row.get('referenda_id')}")
+    return generated, already_cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the AI proposal summary cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prewarm = sub.add_parser("prewarm", help="Pre-generate summaries for all open referenda")
+    prewarm.add_argument("--chain", help="Only this chain (e.g. Polkadot, Kusama)")
+    prewarm.add_argument("--limit", type=int, help="Maximum number of referenda to process")
+    sub.add_parser("stats", help="Show number of cached summaries")
+    args = parser.parse_args()
+
+    cache = get_summary_cache()
+    if args.command == "stats":
+        print(f"{len(cache)} cached summaries in {cache.path}")
+        return
+
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        parser.error("OPENAI_API_KEY must be set to generate summaries")
+    from openai import OpenAI
+
+    proposals = pd.read_csv(PROPOSALS_CSV)
+    generated, already_cached = prewarm_open_referenda(
+        OpenAI(api_key=api_key), proposals, chain=args.chain, limit=args.limit, cache=cache
+    )
+    print(f"Done: {generated} generated, {already_cached} already cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# treasury.py
+"""
+Treasury flow analytics over the monthly `polkadot_treasury_flow.csv` rows.
+
+Each month has a signed amount per category: inflows (inflation,
+transaction fees and tips) are positive and outflows (burn, proposals,
+bounties) negative. TreasuryAnalytics derives everything once per dataset
+version:
+  - monthly inflow, outflow, net flow and cumulative balance
+  - rolling 3/6/12-month inflow, outflow and net sums
+  - prefix sums per category, so totals and category shares for any
+    selected window are two row lookups rather than a recompute
+Runway projections extend a balance by the trailing average net flow (and
+by the average outflow alone) for every rolling horizon at once.
+
+The dataset holds flows, not the treasury's balance, so the cumulative
+balance is the net change since the first month plus an optional opening
+balance.
+
+    analytics = TreasuryAnalytics.from_frame(df)
+    window = analytics.window(start, end)
+    runway = analytics.runway(opening_balance, end)
+"""
+import numpy as np
+import pandas as pd
+
+from instrumentation import span
+
+CATEGORIES = ["inflation", "txn_fees", "txn_tips", "burnt", "proposal", "bounties"]
+ROLLING_MONTHS = (3, 6, 12)
+PROJECTION_MONTHS = 36
+
+
+class TreasuryAnalytics:
+    """
+    Monthly treasury flows with precomputed rolling and prefix sums.
+    Read-only once built.
+    """
+
+    def __init__(self, months, flows, categories):
+        self.months = months
+        self.flows = flows
+        self.categories = categories
+        # Row 0 is all zeros so window sums are prefix[end + 1] - prefix[start]
+        self._prefix = np.vstack([np.zeros((1, flows.shape[1])), np.cumsum(flows, axis=0)])
+        self.monthly = self._monthly()
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build from the treasury flow frame (one row per month, block_time
+        plus one column per category).
+        """
+        with span("transform.treasury_analytics", rows=len(df)):
+            categories = [c for c in CATEGORIES if c in df.columns]
+            months = pd.DatetimeIndex(df["block_time"]).tz_localize(None).to_period("M").to_timestamp()
+            flows = df[categories].apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(dtype=float)
+            return cls(months, flows, categories)
+
+    def _monthly(self):
+        inflow = np.where(self.flows > 0, self.flows, 0).sum(axis=1)
+        outflow = -np.where(self.flows < 0, self.flows, 0).sum(axis=1)
+        monthly = pd.DataFrame({
+            "month": self.months,
+            "inflow": inflow,
+            "outflow": outflow,
+            "net": inflow - outflow,
+        })
+        monthly["cumulative"] = monthly["net"].cumsum()
+        for n in ROLLING_MONTHS:
+            rolling = monthly[["inflow", "outflow", "net"]].rolling(n, min_periods=n).sum()
+            for col in ["inflow", "outflow", "net"]:
+                monthly[f"{col}_{n}m"] = rolling[col]
+        return monthly
+
+    def __len__(self):
+        return len(self.months)
+
+    def position(self, month):
+        """
+        Row of the last month at or before `month`.
+        """
+        return max(int(self.months.searchsorted(pd.Timestamp(month), side="right")) - 1, 0)
+
+    def window(self, start, end):
+        """
+        Totals of the months from `start` to `end` (inclusive): inflow,
+        outflow, net, and per category amount and share of its side
+        (inflows or outflows).
+        """
+        i, j = self.position(start), self.position(end)
+        totals = self._prefix[j + 1] - self._prefix[i]
+        inflow, outflow = totals[totals > 0].sum(), -totals[totals < 0].sum()
+        side_total = np.where(totals >= 0, inflow, outflow)
+        shares = pd.DataFrame({
+            "category": self.categories,
+            "side": np.where(totals >= 0, "inflow", "outflow"),
+            "amount": np.abs(totals),
+            "share_pct": np.divide(np.abs(totals), side_total, out=np.zeros(len(totals)), where=side_total > 0) * 100,
+        }).sort_values(["side", "amount"], ascending=[True, False]).reset_index(drop=True)
+        return {
+            "months": j - i + 1,
+            "inflow": float(inflow),
+            "outflow": float(outflow),
+            "net": float(inflow - outflow),
+            "categories": shares,
+        }
+
+    def runway(self, opening_balance=0.0, end=None, horizon=PROJECTION_MONTHS):
+        """
+        Balance projected `horizon` months past `end` (default: the last
+        month) at the trailing 3/6/12-month average net flow, and runway
+        in months at that rate and on outflows alone (no new inflows).
+        Runway is inf when the balance does not run out.
+        """
+        j = len(self) - 1 if end is None else self.position(end)
+        balance = opening_balance + float(self.monthly["cumulative"].iloc[j])
+        # Trailing averages; horizons longer than the history use all of it
+        starts = np.maximum(j + 1 - np.array(ROLLING_MONTHS), 0)
+        lengths = j + 1 - starts
+        net_prefix = np.concatenate([[0.0], np.cumsum(self.monthly["net"].to_numpy())])
+        outflow_prefix = np.concatenate([[0.0], np.cumsum(self.monthly["outflow"].to_numpy())])
+        net = (net_prefix[j + 1] - net_prefix[starts]) / lengths
+        outflow = (outflow_prefix[j + 1] - outflow_prefix[starts]) / lengths
+
+        steps = np.arange(1, horizon + 1)
+        projection = pd.DataFrame(
+            balance + np.outer(steps, net),
+            index=pd.date_range(self.months[j], periods=horizon + 1, freq="MS")[1:],
+            columns=[f"{n}m average" for n in ROLLING_MONTHS],
+        )
+        projection.index.name = "month"
+        runway = pd.DataFrame({
+            "basis": [f"{n}m average" for n in ROLLING_MONTHS],
+            "net_per_month": net,
+            "outflow_per_month": outflow,
+            "runway_months": _months_until_empty(balance, -net),
+            "runway_without_inflows_months": _months_until_empty(balance, outflow),
+        })
+        return balance, projection, runway
+
+
+def _months_until_empty(balance, burn):
+    """
+    Months until `balance` is spent at each monthly `burn` rate
+    (inf when nothing is burnt, 0 when already empty).
+    """
+    if balance <= 0:
+        return np.zeros(len(burn))
+    return np.divide(balance, burn, out=np.full(len(burn), np.inf), where=burn > 0)
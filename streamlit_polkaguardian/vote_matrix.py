@@ -0,0 +1,300 @@
+# vote_matrix.py
+"""
+Voter x referendum vote matrix, co-voting similarity and voter clusters.
+
+Votes are ingested per referendum from Subscan (every voter's vote on it)
+into a Parquet file per chain. The matrix has one column per
+(referendum, aye/nay/abstain) holding conviction-weighted tokens, stored
+as scipy CSR. From it an offline build precomputes, for every voter, the
+top-k most similar voters by cosine (on log-scaled weights) and by Jaccard
+(same-direction co-votes), plus cluster labels from a truncated SVD
+followed by k-means. The dashboard only loads that neighbor index, so
+"voters most like this address" is an array lookup.
+
+    python vote_matrix.py ingest --chain polkadot --from 0 --to 1500
+    python vote_matrix.py build --chain polkadot
+    python vote_matrix.py query --chain polkadot <address>
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from datasets import cache_path
+from governance_aggregates import DIRECTIONS, ballot
+from instrumentation import span
+
+VOTE_COLUMNS = ["voter", "referendum"] + list(DIRECTIONS)
+NEIGHBORS = 20
+CLUSTERS = 8
+BLOCK_ROWS = 512  # voters per dense similarity block
+
+
+def votes_path(chain_key):
+    return cache_path(f"referendum_votes_{chain_key}.parquet")
+
+
+def index_path(chain_key):
+    return cache_path(f"vote_neighbors_{chain_key}.npz")
+
+
+# ---- Ingestion ----
+
+def votes_frame(records, referendum, decimals):
+    """
+    One row per (voter, referendum) of the votes fetched for `referendum`,
+    with conviction-weighted aye/nay/abstain tokens (see
+    governance_aggregates.ballot).
+    """
+    rows = []
+    for record in records:
+        row = ballot(record, referendum, decimals)
+        if row:
+            rows.append((row["voter"], row["referendum"], *(row[d] * row["conviction"] for d in DIRECTIONS)))
+    return pd.DataFrame(rows, columns=VOTE_COLUMNS)
+
+
+def load_votes(chain_key):
+    path = votes_path(chain_key)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=VOTE_COLUMNS)
+    return pd.read_parquet(path)
+
+
+def ingest(chain_key, referenda, api_key, decimals):
+    """
+    Fetch the votes of `referenda` and upsert them into the chain's vote
+    file (re-ingesting a referendum replaces its rows). Returns rows added.
+    """
+    from subscan import fetch_referendum_votes
+
+    fetched = []
+    for referendum in referenda:
+        try:
+            records = fetch_referendum_votes(chain_key, referendum, api_key)
+        except Exception as e:
+            print(f"Referendum {referendum} votes fetch failed: {e}")
+            continue
+        fetched.append(votes_frame(records, referendum, decimals))
+        print(f"Referendum {referendum}: {len(records)} votes")
+
+    if not fetched:
+        return 0
+    new = pd.concat(fetched, ignore_index=True)
+    existing = load_votes(chain_key)
+    existing = existing[~existing["referendum"].isin(new["referendum"].unique())]
+    combined = pd.concat([existing, new], ignore_index=True) if not existing.empty else new
+    combined = combined.groupby(["voter", "referendum"], as_index=False, sort=False)[list(DIRECTIONS)].sum()
+    combined.to_parquet(votes_path(chain_key), index=False)
+    return len(new)
+
+
+# ---- Matrix and similarity ----
+
+class VoteMatrix:
+    """
+    CSR matrix of conviction-weighted tokens, row = voter,
+    column = (referendum, direction).
+    """
+
+    def __init__(self, voters, referenda, matrix):
+        self.voters = voters
+        self.referenda = referenda
+        self.matrix = matrix
+
+    @classmethod
+    def from_votes(cls, votes):
+        voter_codes, voters = pd.factorize(votes["voter"])
+        ref_codes, referenda = pd.factorize(votes["referendum"], sort=True)
+        rows = np.tile(voter_codes, len(DIRECTIONS))
+        cols = np.concatenate([ref_codes * len(DIRECTIONS) + d for d in range(len(DIRECTIONS))])
+        data = np.concatenate([votes[d].to_numpy(dtype=float) for d in DIRECTIONS])
+        keep = data > 0
+        matrix = sparse.csr_matrix(
+            (data[keep], (rows[keep], cols[keep])),
+            shape=(len(voters), len(referenda) * len(DIRECTIONS))
+        )
+        return cls(np.asarray(voters, dtype=str), np.asarray(referenda), matrix)
+
+    def _normalized(self):
+        """
+        log1p weights scaled to unit rows, so cosine is a plain dot product
+        and one whale doesn't define every voter's nearest neighbors.
+        """
+        weighted = self.matrix.copy()
+        weighted.data = np.log1p(weighted.data)
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        return (sparse.diags(1.0 / np.maximum(norms, 1e-12)) @ weighted).tocsr().astype(np.float32)
+
+    def neighbors(self, k=NEIGHBORS):
+        """
+        (cosine ids, cosine scores, jaccard ids, jaccard scores), each
+        n_voters x k, computed in dense blocks of BLOCK_ROWS voters.
+        """
+        n = len(self.voters)
+        k = max(0, min(k, n - 1))
+        normalized = self._normalized()
+        binary = (self.matrix > 0).astype(np.float32).tocsr()
+        sizes = np.asarray(binary.sum(axis=1)).ravel()
+        result = [np.zeros((n, k), dtype=dtype) for dtype in (np.int32, np.float32) * 2]
+        if not k:
+            return tuple(result)
+
+        for start in range(0, n, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, n)
+            rows = np.arange(stop - start)
+            cosine = (normalized[start:stop] @ normalized.T).toarray()
+            shared = (binary[start:stop] @ binary.T).toarray()
+            jaccard = shared / np.maximum(sizes[start:stop, None] + sizes[None, :] - shared, 1)
+            for offset, scores in ((0, cosine), (2, jaccard)):
+                scores[rows, rows + start] = -1  # not your own neighbor
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                top_scores = np.take_along_axis(scores, top, axis=1)
+                order = np.argsort(-top_scores, axis=1)
+                result[offset][start:stop] = np.take_along_axis(top, order, axis=1)
+                result[offset + 1][start:stop] = np.take_along_axis(top_scores, order, axis=1)
+        return tuple(result)
+
+    def clusters(self, n_clusters=CLUSTERS, dims=16, seed=0):
+        """
+        Cluster label per voter: k-means on a truncated SVD of the
+        normalized matrix.
+        """
+        n = len(self.voters)
+        dims = min(dims, min(self.matrix.shape) - 1)
+        if dims < 1 or n <= n_clusters:
+            return np.zeros(n, dtype=np.int16)
+        # Only the offline index build clusters; the dashboard just loads the index
+        from scipy.cluster.vq import kmeans2
+        from scipy.sparse.linalg import svds
+
+        u, s, _ = svds(self._normalized().astype(np.float64), k=dims, random_state=seed)
+        embedding = u * s
+        embedding /= np.maximum(np.linalg.norm(embedding, axis=1, keepdims=True), 1e-12)
+        _, labels = kmeans2(embedding, n_clusters, minit="++", seed=seed)
+        return labels.astype(np.int16)
+
+
+# ---- Precomputed neighbor index ----
+
+class NeighborIndex:
+    """
+    Top-k similar voters per voter, loaded once and queried by address.
+    """
+
+    def __init__(self, voters, cosine_ids, cosine_scores, jaccard_ids, jaccard_scores, clusters, votes_cast):
+        self.voters = voters
+        self.ids = {"cosine": cosine_ids, "jaccard": jaccard_ids}
+        self.scores = {"cosine": cosine_scores, "jaccard": jaccard_scores}
+        self.clusters = clusters
+        self.votes_cast = votes_cast
+        self._rows = pd.Index(voters)
+
+    @classmethod
+    def build(cls, votes, k=NEIGHBORS, n_clusters=CLUSTERS):
+        with span("transform.vote_neighbors", rows=len(votes)):
+            matrix = VoteMatrix.from_votes(votes)
+            cosine_ids, cosine_scores, jaccard_ids, jaccard_scores = matrix.neighbors(k)
+            votes_cast = np.diff(matrix.matrix.indptr).astype(np.int32)
+            return cls(
+                matrix.voters, cosine_ids, cosine_scores, jaccard_ids, jaccard_scores,
+                matrix.clusters(n_clusters), votes_cast
+            )
+
+    def save(self, path):
+        np.savez_compressed(
+            path, voters=self.voters,
+            cosine_ids=self.ids["cosine"], cosine_scores=self.scores["cosine"],
+            jaccard_ids=self.ids["jaccard"], jaccard_scores=self.scores["jaccard"],
+            clusters=self.clusters, votes_cast=self.votes_cast,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data["voters"], data["cosine_ids"], data["cosine_scores"],
+                data["jaccard_ids"], data["jaccard_scores"], data["clusters"], data["votes_cast"]
+            )
+
+    def __len__(self):
+        return len(self.voters)
+
+    def similar(self, address, metric="cosine", n=10):
+        """
+        Most similar voters to `address` (empty frame if it never voted).
+        """
+        columns = ["voter", "similarity", "cluster", "votes_cast"]
+        try:
+            row = self._rows.get_loc(address)
+        except KeyError:
+            return pd.DataFrame(columns=columns)
+        ids = self.ids[metric][row, :n]
+        return pd.DataFrame({
+            "voter": self.voters[ids],
+            "similarity": self.scores[metric][row, :n],
+            "cluster": self.clusters[ids],
+            "votes_cast": self.votes_cast[ids],
+        }, columns=columns)
+
+    def cluster_of(self, address):
+        try:
+            return int(self.clusters[self._rows.get_loc(address)])
+        except KeyError:
+            return None
+
+
+def build_index(chain_key, k=NEIGHBORS, n_clusters=CLUSTERS):
+    votes = load_votes(chain_key)
+    if votes.empty:
+        raise Exception(f"No ingested votes for {chain_key}; run `python vote_matrix.py ingest` first")
+    index = NeighborIndex.build(votes, k, n_clusters)
+    index.save(index_path(chain_key))
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest referendum votes and build the voter similarity index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest_cmd = sub.add_parser("ingest", help="Fetch votes for a range of referenda")
+    ingest_cmd.add_argument("--chain", default="polkadot")
+    ingest_cmd.add_argument("--from", dest="first", type=int, default=0)
+    ingest_cmd.add_argument("--to", dest="last", type=int, required=True, help="Last referendum index (inclusive)")
+    build_cmd = sub.add_parser("build", help="Precompute neighbors and clusters")
+    build_cmd.add_argument("--chain", default="polkadot")
+    build_cmd.add_argument("--neighbors", type=int, default=NEIGHBORS)
+    build_cmd.add_argument("--clusters", type=int, default=CLUSTERS)
+    query_cmd = sub.add_parser("query", help="Show the voters most like an address")
+    query_cmd.add_argument("--chain", default="polkadot")
+    query_cmd.add_argument("--metric", choices=["cosine", "jaccard"], default="cosine")
+    query_cmd.add_argument("address")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        api_key = os.environ.get("SUBSCAN_API_KEY")
+        if not api_key:
+            parser.error("SUBSCAN_API_KEY must be set to fetch votes")
+        from request_scheduler import BACKGROUND, request_context
+        from subscan import get_token_metadata
+
+        decimals = get_token_metadata(args.chain, api_key)["decimals"]
+        with request_context(BACKGROUND, user="vote-ingest"):
+            rows = ingest(args.chain, range(args.first, args.last + 1), api_key, decimals)
+        print(f"Done: {rows} votes ingested into {votes_path(args.chain)}")
+    elif args.command == "build":
+        start = time.perf_counter()
+        index = build_index(args.chain, args.neighbors, args.clusters)
+        print(f"Indexed {len(index):,} voters in {time.perf_counter() - start:.1f}s -> {index_path(args.chain)}")
+    else:
+        index = NeighborIndex.load(index_path(args.chain))
+        start = time.perf_counter()
+        similar = index.similar(args.address, args.metric)
+        print(similar.to_string(index=False) if not similar.empty else "Address not in the index")
+        print(f"({(time.perf_counter() - start) * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()